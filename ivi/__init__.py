@@ -52,9 +52,11 @@ __all__ = [
         "jdsu",
         "lecroy",
         "rigol",
+        "tdklambda",
         "tektronix",
         "testequity"]
 
 from .ivi import *
+from .index import open
 from . import *
 
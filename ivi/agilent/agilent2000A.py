@@ -58,9 +58,9 @@ class agilent2000A(agilentBaseInfiniiVision, fgen.Base, fgen.StdFunc, fgen.Modul
         
         super(agilent2000A, self).__init__(*args, **kwargs)
         
-        self._analog_channel_name = list()
+        self._analog_channel_name = ivi.SelectorList()
         self._analog_channel_count = 4
-        self._digital_channel_name = list()
+        self._digital_channel_name = ivi.SelectorList()
         self._digital_channel_count = 16
         self._channel_count = self._analog_channel_count + self._digital_channel_count
         self._bandwidth = 200e6
@@ -86,7 +86,7 @@ class agilent2000A(agilentBaseInfiniiVision, fgen.Base, fgen.StdFunc, fgen.Modul
             super(agilent2000A, self)._init_outputs()
         except AttributeError:
             pass
-        self._output_name = list()
+        self._output_name = ivi.SelectorList()
         self._output_operation_mode = list()
         self._output_enabled = list()
         self._output_impedance = list()
@@ -34,9 +34,9 @@ class agilent4000A(agilent3000A):
         
         super(agilent3000A, self).__init__(*args, **kwargs)
         
-        self._analog_channel_name = list()
+        self._analog_channel_name = ivi.SelectorList()
         self._analog_channel_count = 4
-        self._digital_channel_name = list()
+        self._digital_channel_name = ivi.SelectorList()
         self._digital_channel_count = 16
         self._channel_count = self._analog_channel_count + self._digital_channel_count
         self._bandwidth = 1.5e9
@@ -27,7 +27,6 @@ THE SOFTWARE.
 from .. import ivi
 from .. import pwrmeter
 
-import time
 
 class agilent436A(ivi.Driver, pwrmeter.Base, pwrmeter.ZeroCorrection, pwrmeter.ManualRange):
     "Agilent 436A RF power meter"
@@ -152,7 +151,7 @@ class agilent436A(ivi.Driver, pwrmeter.Base, pwrmeter.ZeroCorrection, pwrmeter.M
         except AttributeError:
             pass
         
-        self._channel_name = list()
+        self._channel_name = ivi.SelectorList()
         self._channel_averaging_count_auto = list()
         self._channel_correction_frequency = list()
         self._channel_offset = list()
@@ -243,10 +242,6 @@ class agilent436A(ivi.Driver, pwrmeter.Base, pwrmeter.ZeroCorrection, pwrmeter.M
         cmd = "9+AT"
         self._write(cmd)
     
-    def _measurement_read(self, maximum_time):
-        self._measurement_initiate()
-        return self._measurement_fetch()
-    
     def _get_channel_range_lower(self, index):
         index = ivi.get_index(self._channel_name, index)
         return self._channel_range_lower[index]
@@ -274,25 +269,13 @@ class agilent436A(ivi.Driver, pwrmeter.Base, pwrmeter.ZeroCorrection, pwrmeter.M
         if self._driver_operation_simulate:
             return
         
-        it = 0
-        while True:
-            val = self._ask("Z1T")
-            if (int(val[4:8]) < 2):
-                break
-            time.sleep(0.5)
-            it += 1
-            if it > 20:
-                return
-        
-        it = 0
-        while True:
-            val = self._ask("9+AI")
-            if val[0] < 'T':
-                break
-            time.sleep(0.5)
-            it += 1
-            if it > 10:
-                return
+        try:
+            self._wait_for_query("Z1T", lambda val: int(val[4:8]) < 2, maximum_time=10,
+                    interval=0.05, max_interval=0.5, name='channels[].zero')
+            self._wait_for_query("9+AI", lambda val: val[0] < 'T', maximum_time=5,
+                    interval=0.05, max_interval=0.5, name='channels[].zero')
+        except ivi.MaxTimeoutExceededException:
+            return
         
         self._channel_zero_state[index] = 'complete'
     
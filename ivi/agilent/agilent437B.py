@@ -27,7 +27,6 @@ THE SOFTWARE.
 from .. import ivi
 from .. import pwrmeter
 
-import time
 
 Units = set(['dBm', 'Watts'])
 
@@ -37,6 +36,9 @@ class agilent437B(ivi.Driver, pwrmeter.Base, pwrmeter.ManualRange,
                 pwrmeter.ReferenceOscillator):
     "Agilent 437B RF power meter"
     
+    # identity query sent by _load_id_string, see ivi.Driver
+    _identity_cache_query = '*IDN?'
+    
     def __init__(self, *args, **kwargs):
         self.__dict__.setdefault('_instrument_id', '437B')
         
@@ -85,7 +87,7 @@ class agilent437B(ivi.Driver, pwrmeter.Base, pwrmeter.ManualRange,
             self._identity_instrument_model = "Not available while simulating"
             self._identity_instrument_firmware_revision = "Not available while simulating"
         else:
-            lst = self._ask("*IDN?").split(",")
+            lst = self._ask_identity_query("*IDN?").split(",")
             self._identity_instrument_manufacturer = lst[0]
             self._identity_instrument_model = lst[1]
             self._identity_instrument_firmware_revision = lst[3]
@@ -155,7 +157,7 @@ class agilent437B(ivi.Driver, pwrmeter.Base, pwrmeter.ManualRange,
         except AttributeError:
             pass
         
-        self._channel_name = list()
+        self._channel_name = ivi.SelectorList()
         self._channel_averaging_count_auto = list()
         self._channel_correction_frequency = list()
         self._channel_offset = list()
@@ -252,10 +254,6 @@ class agilent437B(ivi.Driver, pwrmeter.Base, pwrmeter.ManualRange,
             return
         self._write("TR1")
     
-    def _measurement_read(self, maximum_time):
-        self._measurement_initiate()
-        return self._measurement_fetch()
-    
     def _get_channel_range_lower(self, index):
         index = ivi.get_index(self._channel_name, index)
         return self._channel_range_lower[index]
@@ -321,14 +319,14 @@ class agilent437B(ivi.Driver, pwrmeter.Base, pwrmeter.ManualRange,
 
         self._write("CS")
         self._write("ZE")
-        it = 0
-        while True:
-            val = self._read_stb()
-            if val & 2:
-                break
-            if val & 8 or it > 20:
-                return
-            time.sleep(0.5)
+        try:
+            # bit 1: done, bit 3: error
+            val = self._wait_for_status_byte(0x0a, maximum_time=10, interval=0.05,
+                    max_interval=0.5, name='channels[].zero')
+        except ivi.MaxTimeoutExceededException:
+            return
+        if val & 8:
+            return
         
         self._channel_zero_state[index] = 'complete'
     
@@ -343,14 +341,14 @@ class agilent437B(ivi.Driver, pwrmeter.Base, pwrmeter.ManualRange,
 
         self._write("CS")
         self._write("CLEN")
-        it = 0
-        while True:
-            val = self._read_stb()
-            if val & 2:
-                break
-            if val & 8 or it > 20:
-                return
-            time.sleep(0.5)
+        try:
+            # bit 1: done, bit 3: error
+            val = self._wait_for_status_byte(0x0a, maximum_time=10, interval=0.05,
+                    max_interval=0.5, name='channels[].calibrate')
+        except ivi.MaxTimeoutExceededException:
+            return
+        if val & 8:
+            return
 
         self._channel_calibration_state[index] = 'complete'
 
@@ -34,9 +34,9 @@ class agilent6000(agilentBaseScope):
         
         super(agilent6000, self).__init__(*args, **kwargs)
         
-        self._analog_channel_name = list()
+        self._analog_channel_name = ivi.SelectorList()
         self._analog_channel_count = 4
-        self._digital_channel_name = list()
+        self._digital_channel_name = ivi.SelectorList()
         self._digital_channel_count = 16
         self._channel_count = self._analog_channel_count + self._digital_channel_count
         self._bandwidth = 1e9
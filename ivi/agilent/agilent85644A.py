@@ -44,6 +44,9 @@ SweeptuneSetting = set(['default', 'custom'])
 class agilent85644A(ivi.Driver, scpi.common.Memory):
     "Agilent 85644A IVI tracking source driver"
 
+    # identity query sent by _load_id_string, see ivi.Driver
+    _identity_cache_query = '*IDN?'
+
     def __init__(self, *args, **kwargs):
         self.__dict__.setdefault('_instrument_id', '85644A')
 
@@ -168,7 +171,7 @@ class agilent85644A(ivi.Driver, scpi.common.Memory):
             self._identity_instrument_model = "Not available while simulating"
             self._identity_instrument_firmware_revision = "Not available while simulating"
         else:
-            lst = self._ask("*IDN?").split(",")
+            lst = self._ask_identity_query("*IDN?").split(",")
             self._identity_instrument_manufacturer = lst[0]
             self._identity_instrument_model = lst[1]
             self._identity_instrument_firmware_revision = lst[3]
@@ -24,7 +24,6 @@ THE SOFTWARE.
 
 """
 
-import time
 
 from .agilent85644A import *
 
@@ -66,7 +65,17 @@ class agilent85645A(agilent85644A):
     def _rf_ytm_peak(self):
         if not self._driver_operation_simulate:
             self._write("calibration:peaking:execute")
-            for i in range(30):
-                time.sleep(1)
-                if (int(self._ask("status:operation:condition?")) & (1 << 0)) == 0:
-                    break
+            try:
+                # the busy bit is not set right away, give the source up to
+                # a second to start peaking before waiting for it to finish
+                self._wait_for_query("status:operation:condition?",
+                        lambda val: int(val) & (1 << 0) != 0, maximum_time=1,
+                        interval=0.05, max_interval=0.2, name='rf.ytm_peak start')
+            except ivi.MaxTimeoutExceededException:
+                pass
+            try:
+                self._wait_for_query("status:operation:condition?",
+                        lambda val: int(val) & (1 << 0) == 0, maximum_time=30,
+                        interval=0.1, max_interval=1, name='rf.ytm_peak')
+            except ivi.MaxTimeoutExceededException:
+                pass
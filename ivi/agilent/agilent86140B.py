@@ -43,6 +43,9 @@ ScreenshotImageFormatMapping = {
 class agilent86140B(ivi.Driver, extra.common.Screenshot, scpi.common.Memory):
     "Agilent 86140B Series Optical Spectrum Analyzer Driver"
     
+    # identity query sent by _load_id_string, see ivi.Driver
+    _identity_cache_query = '*IDN?'
+    
     def __init__(self, *args, **kwargs):
         self.__dict__.setdefault('_instrument_id', '86140B')
         
@@ -66,7 +69,7 @@ class agilent86140B(ivi.Driver, extra.common.Screenshot, scpi.common.Memory):
         self._acquisition_sweep_mode_continuous = True
         self._sweep_coupling_sweep_time = 1e-1
         self._sweep_coupling_sweep_time_auto = False
-        self._trace_name = list()
+        self._trace_name = ivi.SelectorList()
         self._trace_type = list()
         self._acquisition_vertical_scale = 'logarithmic'
         self._sweep_coupling_video_bandwidth = 1e2
@@ -387,7 +390,7 @@ class agilent86140B(ivi.Driver, extra.common.Screenshot, scpi.common.Memory):
             self._identity_instrument_model = "Not available while simulating"
             self._identity_instrument_firmware_revision = "Not available while simulating"
         else:
-            lst = self._ask("*IDN?").split(",")
+            lst = self._ask_identity_query("*IDN?").split(",")
             self._identity_instrument_manufacturer = lst[0]
             self._identity_instrument_model = lst[1]
             self._identity_instrument_firmware_revision = lst[3]
@@ -456,7 +459,7 @@ class agilent86140B(ivi.Driver, extra.common.Screenshot, scpi.common.Memory):
         except AttributeError:
             pass
         
-        self._trace_name = list()
+        self._trace_name = ivi.SelectorList()
         self._trace_type = list()
         for i in range(self._trace_count):
             self._trace_name.append("tr%c" % chr(i+ord('a')))
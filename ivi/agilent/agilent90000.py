@@ -52,11 +52,14 @@ SampleMode = set(['real_time', 'equivalent_time', 'segmented'])
 class agilent90000(agilentBaseInfiniium):
     "Agilent Infiniium 90000A/90000X series IVI oscilloscope driver"
     
+    _waveform_setup = ":waveform:byteorder msbfirst;:waveform:streaming on"
+    _waveform_invalid_types = (1,)
+    
     def __init__(self, *args, **kwargs):
         self.__dict__.setdefault('_instrument_id', '')
-        self._analog_channel_name = list()
+        self._analog_channel_name = ivi.SelectorList()
         self._analog_channel_count = 4
-        self._digital_channel_name = list()
+        self._digital_channel_name = ivi.SelectorList()
         self._digital_channel_count = 16
         self._channel_count = self._analog_channel_count + self._digital_channel_count
         self._channel_common_mode = list()
@@ -69,9 +72,9 @@ class agilent90000(agilentBaseInfiniium):
         
         super(agilent90000, self).__init__(*args, **kwargs)
         
-        self._analog_channel_name = list()
+        self._analog_channel_name = ivi.SelectorList()
         self._analog_channel_count = 4
-        self._digital_channel_name = list()
+        self._digital_channel_name = ivi.SelectorList()
         self._digital_channel_count = 16
         self._channel_count = self._analog_channel_count + self._digital_channel_count
         self._bandwidth = 13e9
@@ -193,9 +196,7 @@ class agilent90000(agilentBaseInfiniium):
         
         format = ScreenshotImageFormatMapping[format]
         
-        self._write(":display:data? %s, screen, on, %s" % (format, 'invert' if invert else 'normal'))
-        
-        return self._read_ieee_block()
+        return self._ask_for_ieee_block(":display:data? %s, screen, on, %s" % (format, 'invert' if invert else 'normal'))
     
     def _get_channel_common_mode(self, index):
         index = ivi.get_index(self._analog_channel_name, index)
@@ -334,10 +335,8 @@ class agilent90000(agilentBaseInfiniium):
         if format != 2:
             raise UnexpectedResponseException()
         
-        self._write(":waveform:data?")
-        
         # Read waveform data
-        raw_data = self._read_ieee_block()
+        raw_data = self._ask_for_ieee_block(":waveform:data?")
         
         # Split out points and convert to time and voltage pairs
         
@@ -357,9 +356,6 @@ class agilent90000(agilentBaseInfiniium):
         
         return data
     
-    def _measurement_read_waveform(self, index, maximum_time):
-        return self._measurement_fetch_waveform(index)
-    
     def _measurement_initiate(self):
         if not self._driver_operation_simulate:
             self._write(":acquire:complete 100")
@@ -53,6 +53,9 @@ class agilentBase8590(ivi.Driver, specan.Base,
                 extra.common.Memory, extra.common.Title, extra.common.SystemSetup, extra.common.Screenshot):
     "Agilent Base8590 series IVI spectrum analyzer driver"
     
+    # no *IDN?, the serial number identifies the instrument
+    _identity_cache_query = "SER?"
+    
     def __init__(self, *args, **kwargs):
         self.__dict__.setdefault('_instrument_id', '')
         
@@ -252,7 +255,7 @@ class agilentBase8590(ivi.Driver, specan.Base,
         except AttributeError:
             pass
 
-        self._trace_name = list()
+        self._trace_name = ivi.SelectorList()
         self._trace_type = list()
         for i in range(self._trace_count):
             self._trace_name.append("trace%d" % (i+1))
@@ -315,11 +315,6 @@ class agilentBaseESG(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
             return int(self._ask("status:questionable:power:condition?")) & (1 << 1) == 0
         return True
 
-    def _rf_wait_until_settled(self, maximum_time):
-        t = 0
-        while not self._rf_is_settled() and t < maximum_time:
-            time.sleep(0.01)
-            t = t + 0.01
 
     def _get_analog_modulation_am_enabled(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
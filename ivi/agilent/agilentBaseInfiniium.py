@@ -52,11 +52,15 @@ SampleMode = set(['real_time', 'equivalent_time', 'segmented'])
 class agilentBaseInfiniium(agilentBaseScope):
     "Agilent Infiniium series IVI oscilloscope driver"
     
+    _waveform_setup = ":waveform:byteorder msbfirst"
+    _waveform_formats = {'word': ('word', 2, '>i2', 31232)}
+    _waveform_invalid_types = ()
+    
     def __init__(self, *args, **kwargs):
         self.__dict__.setdefault('_instrument_id', '')
-        self._analog_channel_name = list()
+        self._analog_channel_name = ivi.SelectorList()
         self._analog_channel_count = 4
-        self._digital_channel_name = list()
+        self._digital_channel_name = ivi.SelectorList()
         self._digital_channel_count = 16
         self._channel_count = self._analog_channel_count + self._digital_channel_count
         self._channel_common_mode = list()
@@ -69,9 +73,9 @@ class agilentBaseInfiniium(agilentBaseScope):
         
         super(agilentBaseInfiniium, self).__init__(*args, **kwargs)
         
-        self._analog_channel_name = list()
+        self._analog_channel_name = ivi.SelectorList()
         self._analog_channel_count = 4
-        self._digital_channel_name = list()
+        self._digital_channel_name = ivi.SelectorList()
         self._digital_channel_count = 16
         self._channel_count = self._analog_channel_count + self._digital_channel_count
         self._bandwidth = 13e9
@@ -156,9 +160,7 @@ class agilentBaseInfiniium(agilentBaseScope):
         
         format = self._display_screenshot_image_format_mapping[format]
         
-        self._write(":display:data? %s, screen, on, %s" % (format, 'invert' if invert else 'normal'))
-        
-        return self._read_ieee_block()
+        return self._ask_for_ieee_block(":display:data? %s, screen, on, %s" % (format, 'invert' if invert else 'normal'))
     
     def _get_display_vectors(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
@@ -238,10 +240,8 @@ class agilentBaseInfiniium(agilentBaseScope):
         if format != 2:
             raise UnexpectedResponseException()
         
-        self._write(":waveform:data?")
-        
         # Read waveform data
-        raw_data = self._read_ieee_block()
+        raw_data = self._ask_for_ieee_block(":waveform:data?")
         
         # Split out points and convert to time and voltage pairs
         
@@ -261,9 +261,6 @@ class agilentBaseInfiniium(agilentBaseScope):
         
         return data
     
-    def _measurement_read_waveform(self, index, maximum_time):
-        return self._measurement_fetch_waveform(index)
-    
     def _measurement_initiate(self):
         if not self._driver_operation_simulate:
             self._write(":acquire:complete 100")
@@ -27,6 +27,8 @@ THE SOFTWARE.
 import time
 import struct
 
+import numpy as np
+
 from .. import ivi
 from .. import scope
 from .. import scpi
@@ -168,11 +170,22 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
                        ivi.Driver):
     "Agilent generic IVI oscilloscope driver"
     
+    # :digitize blocks until the acquisition completes
+    _sequential_commands = (':digitize',)
+    # waveform transfer settings, see _measurement_fetch_waveforms
+    _waveform_setup = ":waveform:byteorder msbfirst;:waveform:unsigned 1;:waveform:points normal"
+    # transfer format: (format command, preamble format code, numpy dtype, hole value)
+    _waveform_formats = {
+            'byte': ('byte', 0, 'u1', 0),
+            'word': ('word', 1, '>u2', 0)}
+    # preamble acquisition types fetch_waveform does not support
+    _waveform_invalid_types = (1,)
+    
     def __init__(self, *args, **kwargs):
         self.__dict__.setdefault('_instrument_id', '')
-        self._analog_channel_name = list()
+        self._analog_channel_name = ivi.SelectorList()
         self._analog_channel_count = 4
-        self._digital_channel_name = list()
+        self._digital_channel_name = ivi.SelectorList()
         self._digital_channel_count = 16
         self._channel_count = self._analog_channel_count + self._digital_channel_count
         self._channel_label = list()
@@ -187,9 +200,9 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
         self._self_test_delay = 40
         self._memory_size = 10
         
-        self._analog_channel_name = list()
+        self._analog_channel_name = ivi.SelectorList()
         self._analog_channel_count = 4
-        self._digital_channel_name = list()
+        self._digital_channel_name = ivi.SelectorList()
         self._digital_channel_count = 16
         self._channel_count = self._analog_channel_count + self._digital_channel_count
         self._bandwidth = 1e9
@@ -210,6 +223,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
         self._display_screenshot_image_format_mapping = ScreenshotImageFormatMapping
         self._display_vectors = True
         self._display_labels = True
+        self._measurement_waveform_format = 'word'
         
         self._identity_description = "Agilent generic IVI oscilloscope driver"
         self._identity_identifier = ""
@@ -446,6 +460,38 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
                         oscilloscope is running, all the data in active channels and functions is
                         erased; however, new data is displayed on the next acquisition.
                         """))
+        self._add_property('measurement.waveform_format',
+                        self._get_measurement_waveform_format,
+                        self._set_measurement_waveform_format,
+                        None,
+                        ivi.Doc("""
+                        Selects the format waveforms are transferred in.  The oscilloscope ADC
+                        has 8 bits of resolution, 'byte' transfers one byte per point and halves
+                        the transfer time.  'word' transfers two bytes per point and keeps the
+                        additional resolution of averaged and high resolution acquisitions.
+                        
+                        The sample codes and scaling of the transferred waveforms are available
+                        from measurement.fetch_waveforms, so waveforms can be stored in the
+                        transfer format and converted to volts later.
+                        
+                        Values:
+                        * 'byte'
+                        * 'word'
+                        """))
+        self._add_method('measurement.fetch_waveforms',
+                        self._measurement_fetch_waveforms,
+                        ivi.Doc("""
+                        Returns the waveforms of several channels from a previously initiated
+                        acquisition as a dict keyed by channel name.  The transfer format is set
+                        once for all channels, and the preamble and data of every channel are
+                        read with one query each.  Each waveform is a scope.Waveform with the
+                        sample codes in the format selected by measurement.waveform_format and
+                        the scaling; iterating it yields the same (x, y) pairs as
+                        channels[].measurement.fetch_waveform.
+                        
+                        If channels is None, the waveforms of all enabled analog channels are
+                        returned.
+                        """))
         self._add_method('system.display_string',
                         self._system_display_string,
                         ivi.Doc("""
@@ -494,7 +540,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
         except AttributeError:
             pass
         
-        self._channel_name = list()
+        self._channel_name = ivi.SelectorList()
         self._channel_label = list()
         self._channel_probe_skew = list()
         self._channel_invert = list()
@@ -502,7 +548,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
         self._channel_scale = list()
         self._channel_bw_limit = list()
         
-        self._analog_channel_name = list()
+        self._analog_channel_name = ivi.SelectorList()
         for i in range(self._analog_channel_count):
             self._channel_name.append("channel%d" % (i+1))
             self._channel_label.append("%d" % (i+1))
@@ -514,7 +560,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
             self._channel_bw_limit.append(False)
         
         # digital channels
-        self._digital_channel_name = list()
+        self._digital_channel_name = ivi.SelectorList()
         if (self._digital_channel_count > 0):
             for i in range(self._digital_channel_count):
                 self._channel_name.append("digital%d" % i)
@@ -536,17 +582,21 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
         if self._driver_operation_simulate:
             return b''
         
-        self._write(":system:setup?")
-        
-        return self._read_ieee_block()
+        data = self._ask_for_ieee_block(":system:setup?")
+        self._setup_fetched(data)
+        return data
     
     def _system_load_setup(self, data):
         if self._driver_operation_simulate:
             return
         
+        if self._setup_unchanged(data):
+            return
+        
         self._write_ieee_block(data, ':system:setup ')
         
-        self.driver_operation.invalidate_all_attributes()
+        self._cache_operation('system.load_setup')
+        self._setup_loaded(data)
     
     def _system_display_string(self, string = None):
         if string is None:
@@ -565,9 +615,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
         format = self._display_screenshot_image_format_mapping[format]
         
         self._write(":hardcopy:inksaver %d" % int(bool(invert)))
-        self._write(":display:data? %s" % format)
-        
-        return self._read_ieee_block()
+        return self._ask_for_ieee_block(":display:data? %s" % format)
     
     def _acquisition_segmented_analyze(self):
         if not self._driver_operation_simulate:
@@ -1308,59 +1356,74 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
         if self._driver_operation_simulate:
             return list()
         
-        self._write(":waveform:byteorder msbfirst")
-        self._write(":waveform:unsigned 1")
-        self._write(":waveform:format word")
-        self._write(":waveform:points normal")
-        self._write(":waveform:source %s" % self._channel_name[index])
-        
-        # Read preamble
-        
-        pre = self._ask(":waveform:preamble?").split(',')
-        
-        format = int(pre[0])
-        type = int(pre[1])
-        points = int(pre[2])
-        count = int(pre[3])
-        xincrement = float(pre[4])
-        xorigin = float(pre[5])
-        xreference = int(float(pre[6]))
-        yincrement = float(pre[7])
-        yorigin = float(pre[8])
-        yreference = int(float(pre[9]))
-        
-        if type == 1:
-            raise scope.InvalidAcquisitionTypeException()
+        return list(self._measurement_fetch_waveforms([index])[self._channel_name[index]])
+    
+    def _get_measurement_waveform_format(self):
+        return self._measurement_waveform_format
+    
+    def _set_measurement_waveform_format(self, value):
+        value = str(value).lower()
+        if value not in self._waveform_formats:
+            raise ivi.ValueNotSupportedException()
+        self._measurement_waveform_format = value
+    
+    def _measurement_fetch_waveforms(self, channels = None):
+        if channels is None:
+            channels = [i for i in range(self._analog_channel_count) if self._get_channel_enabled(i)]
+        indices = [ivi.get_index(self._channel_name, c) for c in channels]
         
-        if format != 1:
-            raise UnexpectedResponseException()
+        waveforms = dict()
         
-        self._write(":waveform:data?")
+        command, format_code, dtype, hole = self._waveform_formats[self._measurement_waveform_format]
         
-        # Read waveform data
-        raw_data = raw_data = self._read_ieee_block()
+        if self._driver_operation_simulate:
+            for index in indices:
+                waveforms[self._channel_name[index]] = scope.Waveform(np.zeros(0, dtype))
+            return waveforms
         
-        # Split out points and convert to time and voltage pairs
+        self._write(self._waveform_setup + ";:waveform:format %s" % command)
         
-        data = list()
-        for i in range(points):
-            x = ((i - xreference) * xincrement) + xorigin
+        for index in indices:
+            # Read preamble
             
-            yval = struct.unpack(">H", raw_data[i*2:i*2+2])[0]
+            pre = self._ask(":waveform:source %s;:waveform:preamble?" % self._channel_name[index]).split(',')
             
-            if yval == 0:
-                # hole value
-                y = float('nan')
-            else:
-                y = ((yval - yreference) * yincrement) + yorigin
+            format = int(pre[0])
+            type = int(pre[1])
+            points = int(pre[2])
+            count = int(pre[3])
+            xincrement = float(pre[4])
+            xorigin = float(pre[5])
+            xreference = int(float(pre[6]))
+            yincrement = float(pre[7])
+            yorigin = float(pre[8])
+            yreference = int(float(pre[9]))
             
-            data.append((x, y))
+            if type in self._waveform_invalid_types:
+                raise scope.InvalidAcquisitionTypeException()
+            
+            if format != format_code:
+                raise ivi.UnexpectedResponseException()
+            
+            # Read waveform data
+            raw = self._ask_for_ieee_block(":waveform:data?", dtype)[:points].astype(np.dtype(dtype).newbyteorder('='))
+            
+            waveforms[self._channel_name[index]] = scope.Waveform(raw,
+                    xincrement, xorigin, xreference, yincrement, yorigin, yreference, hole)
         
-        return data
+        return waveforms
     
     def _measurement_read_waveform(self, index, maximum_time):
+        self._measurement_acquire(maximum_time)
         return self._measurement_fetch_waveform(index)
     
+    def _measurement_acquire(self, maximum_time):
+        "Acquire a waveform and wait up to maximum_time seconds for it to complete"
+        if not self._driver_operation_simulate:
+            self._write(":acquire:complete 100")
+            self._wait_for_operation_complete(":digitize", maximum_time)
+            self._set_cache_valid(False, 'trigger_continuous')
+    
     def _measurement_initiate(self):
         if not self._driver_operation_simulate:
             self._write(":acquire:complete 100")
@@ -1433,6 +1496,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
         return 0
     
     def _measurement_read_waveform_measurement(self, index, measurement_function, maximum_time):
+        self._measurement_acquire(maximum_time)
         return self._measurement_fetch_waveform_measurement(index, measurement_function)
     
     def _get_acquisition_number_of_envelopes(self):
@@ -1447,6 +1511,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
         return data
     
     def _measurement_read_waveform_min_max(self, index, maximum_time):
+        self._measurement_acquire(maximum_time)
         return self._measurement_fetch_waveform_min_max(index)
     
     def _get_trigger_continuous(self):
@@ -1496,6 +1561,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
     def _measurement_auto_setup(self):
         if not self._driver_operation_simulate:
             self._write(":autoscale")
+        self._cache_operation('measurement.auto_setup')
     
     
     
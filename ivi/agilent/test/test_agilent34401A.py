@@ -24,177 +24,35 @@ THE SOFTWARE.
 
 """
 
-import io
 import unittest
 
 from .. import agilent34401A
+from ...test import virtual
 
-class Virtual34401A(object):
+class Virtual34401A(virtual.VirtualInstrument):
     def __init__(self):
-        self.read_buffer = io.BytesIO()
-        self.tx_log = list()
-        self.rx_log = list()
-        self.cmd_log = list()
-
-        self.cmds = {
-            '*cls' : None,
-            '*idn?' : str,
-            '*rst' : None,
-            '*trg' : None,
-            '*tst?' : int,
-            'system:error?' : str,
-            'abort' : None,
-            'fetch?' : float,
-            'initiate' : None,
-            'read?' : float,
-            'sense:function' : 'qstr',
-            'sense:function?' : 'qstr',
-            'volt:dc:range' : float,
-            'volt:dc:range?' : float,
-            'volt:ac:range' : float,
-            'volt:ac:range?' : float,
-            'curr:dc:range' : float,
-            'curr:dc:range?' : float,
-            'curr:ac:range' : float,
-            'curr:ac:range?' : float,
-            'res:range' : float,
-            'res:range?' : float,
-            'fres:range' : float,
-            'fres:range?' : float,
-            'freq:range:lower' : float,
-            'freq:range:lower?' : float,
-            'per:range:lower' : float,
-            'per:range:lower?' : float,
-            'cap:range' : float,
-            'cap:range?' : float,
-            'volt:dc:range:auto' : int,
-            'volt:dc:range:auto?' : int,
-            'volt:ac:range:auto' : int,
-            'volt:ac:range:auto?' : int,
-            'curr:dc:range:auto' : int,
-            'curr:dc:range:auto?' : int,
-            'curr:ac:range:auto' : int,
-            'curr:ac:range:auto?' : int,
-            'res:range:auto' : int,
-            'res:range:auto?' : int,
-            'fres:range:auto' : int,
-            'fres:range:auto?' : int,
-            'freq:range:auto' : int,
-            'freq:range:auto?' : int,
-            'per:range:auto' : int,
-            'per:range:auto?' : int,
-            'cap:range:auto' : int,
-            'cap:range:auto?' : int,
-            'volt:dc:resolution' : float,
-            'volt:dc:resolution?' : float,
-            'volt:ac:resolution' : float,
-            'volt:ac:resolution?' : float,
-            'curr:dc:resolution' : float,
-            'curr:dc:resolution?' : float,
-            'curr:ac:resolution' : float,
-            'curr:ac:resolution?' : float,
-            'res:resolution' : float,
-            'res:resolution?' : float,
-            'fres:resolution' : float,
-            'fres:resolution?' : float,
-            'trigger:delay' : float,
-            'trigger:delay?' : float,
-            'trigger:delay:auto' : int,
-            'trigger:delay:auto?' : int,
-            'trigger:source' : str,
-            'trigger:source?' : str,
-            'sample:count' : int,
-            'sample:count?' : int,
-            'trigger:count' : int,
-            'trigger:count?' : int,
-        }
-        self.vals = {
-            '*idn' : 'HEWLETT-PACKARD,34401A,0,1.7-5.0-1.0',
-            '*tst' : 0,
-            'system:error' : '+0,"No error"',
-            'fetch?' : 1.0,
-            'read?' : 1.0,
-            'sense:function' : 'dc_volts',
-            'volt:dc:range' : 1.0,
-            'volt:ac:range' : 1.0,
-            'curr:dc:range' : 1.0,
-            'curr:ac:range' : 1.0,
-            'res:range' : 1.0,
-            'fres:range' : 1.0,
-            'freq:range:lower' : 1.0,
-            'per:range:lower' : 1.0,
-            'cap:range' : 1.0,
-            'volt:dc:range:auto' : 1,
-            'volt:ac:range:auto' : 1,
-            'curr:dc:range:auto' : 1,
-            'curr:ac:range:auto' : 1,
-            'res:range:auto' : 1,
-            'fres:range:auto' : 1,
-            'freq:range:auto' : 1,
-            'per:range:auto' : 1,
-            'cap:range:auto' : 1,
-            'volt:dc:resolution' : 0.001,
-            'volt:ac:resolution' : 0.001,
-            'curr:dc:resolution' : 0.001,
-            'curr:ac:resolution' : 0.001,
-            'res:resolution' : 0.001,
-            'fres:resolution' : 0.001,
-            'trigger:delay' : 0.01,
-            'trigger:delay:auto' : 1,
-            'trigger:source' : 'imm',
-            'sample:count' : 1,
-            'trigger:count' : 1,
-        }
-
-        for n in range(4):
-            ch = 'output%d' % (n+1)
-            self.cmds[ch+':voltage'] = float
-            self.cmds[ch+':voltage?'] = float
-            self.vals[ch+':voltage'] = 0.0
-
-    def write_raw(self, data):
-        self.rx_log.append(data)
-        cmd = data.split(b' ')[0].decode()
-
-        print("Got command %s" % cmd)
-
-        cmd = cmd.lower().lstrip(':')
-
-        self.cmd_log.append(cmd)
-
-        t = self.cmds[cmd]
-
-        if '?' in cmd:
-            cmd = cmd.strip('?')
-
-            if t is int:
-                d = '{0:+d}'.format(self.vals[cmd]).encode()
-                self.tx_log.append(d)
-                self.read_buffer = io.BytesIO(d)
-            elif t is float:
-                d = '{0:+E}'.format(self.vals[cmd]).encode()
-                self.tx_log.append(d)
-                self.read_buffer = io.BytesIO(d)
-            elif t is str:
-                d = self.vals[cmd].encode()
-                self.tx_log.append(d)
-                self.read_buffer = io.BytesIO(d)
-            elif t == 'qstr':
-                d = '"{0}"'.format(self.vals[cmd]).encode()
-                self.tx_log.append(d)
-                self.read_buffer = io.BytesIO(d)
-        else:
-            if t is int:
-                self.vals[cmd] = int(data.split(b' ')[1].decode())
-            elif t is float:
-                self.vals[cmd] = float(data.split(b' ')[1].decode())
-            elif t is str:
-                self.vals[cmd] = data.split(b' ')[1].decode()
-            elif t == 'qstr':
-                self.vals[cmd] = data.split(b' ')[1].decode().strip("'\"")
-
-    def read_raw(self, num=-1):
-        return self.read_buffer.read(num)
+        super(Virtual34401A, self).__init__('HEWLETT-PACKARD,34401A,0,1.7-5.0-1.0', strict=True)
+
+        self.add_command('abort')
+        self.add_command('initiate')
+        self.add_command('fetch', float, 1.0, settable=False)
+        self.add_command('read', float, 1.0, settable=False)
+        self.add_command('sense:function', 'qstr', 'dc_volts')
+
+        for func in ('volt:dc', 'volt:ac', 'curr:dc', 'curr:ac', 'res', 'fres', 'cap'):
+            self.add_command(func + ':range', float, 1.0)
+            self.add_command(func + ':range:auto', int, 1)
+        for func in ('freq', 'per'):
+            self.add_command(func + ':range:lower', float, 1.0)
+            self.add_command(func + ':range:auto', int, 1)
+        for func in ('volt:dc', 'volt:ac', 'curr:dc', 'curr:ac', 'res', 'fres'):
+            self.add_command(func + ':resolution', float, 0.001)
+
+        self.add_command('trigger:delay', float, 0.01)
+        self.add_command('trigger:delay:auto', int, 1)
+        self.add_command('trigger:source', str, 'imm')
+        self.add_command('sample:count', int, 1)
+        self.add_command('trigger:count', int, 1)
 
 
 class TestAgilent34401A(unittest.TestCase):
@@ -220,7 +78,7 @@ class TestAgilent34401A(unittest.TestCase):
 
     def test_error_query(self):
         self.assertEqual(self.dmm.utility.error_query(), (0, 'No error'))
-        self.vdmm.vals['system:error'] = '-113,"Undefined header"'
+        self.vdmm.push_error(-113, 'Undefined header')
         self.assertEqual(self.dmm.utility.error_query(), (-113, 'Undefined header'))
 
     def test_measurement_function(self):
@@ -399,8 +257,11 @@ class TestAgilent34401A(unittest.TestCase):
         self.assertEqual('initiate' in self.vdmm.cmd_log, True)
 
     def test_measurement_read(self):
-        self.vdmm.vals['read'] = 1.2345
+        self.vdmm.vals['fetch'] = 1.2345
         self.assertEqual(self.dmm.measurement.read(1.0), 1.2345)
+        # completion is polled by serial poll, which is not a command
+        self.assertEqual(self.vdmm.cmd_log[-8:],
+                ['*esr?', '*ese?', '*ese', 'initiate', '*opc', '*ese', '*esr?', 'fetch?'])
 
     def test_trigger_multi_point_sample_count(self):
         for cache in (True, False):
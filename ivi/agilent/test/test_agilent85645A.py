@@ -0,0 +1,66 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import time
+import unittest
+
+from .. import agilent85645A
+from ...test import virtual
+
+class Virtual85645A(virtual.VirtualInstrument):
+    "Tracking source that starts peaking shortly after the command"
+    def __init__(self, delay, duration):
+        super(Virtual85645A, self).__init__('HEWLETT-PACKARD,85645A,0,1.0')
+        self.delay = delay
+        self.duration = duration
+        self.start_time = None
+        self.add_command(':CALibration:PEAKing:EXECute', set=self.peak)
+        self.add_command(':STATus:OPERation:CONDition', int, get=self.get_condition, settable=False)
+
+    def peak(self, key, value):
+        self.start_time = time.time() + self.delay
+
+    def get_condition(self, key):
+        now = time.time()
+        if self.start_time is not None and self.start_time <= now < self.start_time + self.duration:
+            return 1
+        return 0
+
+class TestAgilent85645A(unittest.TestCase):
+
+    def test_ytm_peak(self):
+        instr = Virtual85645A(0.05, 0.1)
+        src = agilent85645A(instr)
+        start = time.time()
+        src.rf.ytm_peak()
+        self.assertTrue(time.time() - start >= 0.15)
+        self.assertTrue(instr.start_time + instr.duration <= time.time())
+        stats = src.driver_operation.wait_statistics
+        self.assertEqual(stats['rf.ytm_peak start']['timeouts'], 0)
+        self.assertEqual(stats['rf.ytm_peak']['timeouts'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import math
+import unittest
+
+import numpy as np
+
+from .. import agilentMSO7104A
+from ... import ivi
+from ... import scope
+from ...test import virtual
+
+class VirtualMSO7104A(virtual.VirtualInstrument):
+    def __init__(self, points=1000):
+        super(VirtualMSO7104A, self).__init__('AGILENT TECHNOLOGIES,MSO7104A,0,06.16', strict=True)
+
+        self.points = points
+        self.add_command(':WAVeform:BYTeorder', str, 'msbf')
+        self.add_command(':WAVeform:UNSigned', int, 1)
+        self.add_command(':WAVeform:FORMat', str, 'byte')
+        self.add_command(':WAVeform:POINts', str, 'norm')
+        self.add_command(':WAVeform:SOURce', str, 'channel1')
+        self.add_command(':WAVeform:PREamble', str, get=self.get_preamble, settable=False)
+        self.add_command(':WAVeform:DATA', 'block', get=self.get_data, settable=False)
+        for i in range(1, 5):
+            self.add_command(':CHANnel%d:DISPlay' % i, int, 1 if i < 3 else 0)
+
+    def get_channel(self):
+        return int(self.vals.get('waveform:source', 'channel1')[-1])
+
+    def get_codes(self):
+        codes = np.arange(self.points) * self.get_channel() + 128
+        codes[2] = 0
+        return codes
+
+    def get_preamble(self, key):
+        # format, type normal, points, count, x increment, origin and
+        # reference, y increment, origin and reference
+        return '+%d,+0,+%d,+1,+1.0E-06,-5.0E-04,+0,+1.0E-03,+0.0E+00,+128' % (
+                self.get_format(), self.points)
+
+    def get_format(self):
+        return 0 if self.vals['waveform:format'] == 'byte' else 1
+
+    def get_data(self, key):
+        if self.get_format() == 0:
+            return self.get_codes().astype('u1').tobytes()
+        return self.get_codes().astype('>u2').tobytes()
+
+class TestAgilentMSO7104A(unittest.TestCase):
+
+    def setUp(self):
+        self.vscope = VirtualMSO7104A()
+        self.scope = agilentMSO7104A(self.vscope)
+
+    def test_fetch_waveform(self):
+        data = self.scope.channels['channel2'].measurement.fetch_waveform()
+        self.assertEqual(len(data), 1000)
+        self.assertEqual(data[0], (-5.0e-4, 0.0))
+        self.assertTrue(math.isnan(data[2][1]))
+        self.assertAlmostEqual(data[10][1], (10 * 2) * 1e-3)
+
+    def test_fetch_waveforms(self):
+        del self.vscope.cmd_log[:]
+        waveforms = self.scope.measurement.fetch_waveforms(['channel1', 'channel3'])
+        self.assertEqual(sorted(waveforms), ['channel1', 'channel3'])
+        # the transfer format is set once
+        self.assertEqual(self.vscope.cmd_log, ['waveform:byteorder', 'waveform:unsigned',
+                'waveform:points', 'waveform:format', 'waveform:source', 'waveform:preamble?',
+                'waveform:data?', 'waveform:source', 'waveform:preamble?', 'waveform:data?'])
+        self.assertEqual(self.vscope.vals['waveform:format'], 'word')
+        wfm = waveforms['channel3']
+        self.assertIsInstance(wfm, scope.Waveform)
+        self.assertTrue(np.array_equal(wfm.raw, self.vscope.get_codes()))
+        self.assertAlmostEqual(wfm.x[1] - wfm.x[0], 1e-6)
+        self.assertAlmostEqual(wfm.y[10], 30 * 1e-3)
+        self.assertTrue(np.isnan(wfm.y[2]))
+        self.assertEqual(list(wfm)[1], (wfm.x[1], wfm.y[1]))
+        points = iter(wfm)
+        self.assertTrue(iter(points) is points)
+        self.assertEqual(next(points), (wfm.x[0], wfm.y[0]))
+
+        # enabled channels by default
+        self.assertEqual(sorted(self.scope.measurement.fetch_waveforms()), ['channel1', 'channel2'])
+
+    def test_waveform_format(self):
+        self.vscope.points = 100
+        self.assertEqual(self.scope.measurement.waveform_format, 'word')
+        self.scope.measurement.waveform_format = 'byte'
+        wfm = self.scope.measurement.fetch_waveforms(['channel1'])['channel1']
+        self.assertEqual(self.vscope.vals['waveform:format'], 'byte')
+        self.assertEqual(wfm.raw.dtype, np.uint8)
+        self.assertTrue(np.array_equal(wfm.raw, self.vscope.get_codes()))
+        self.assertAlmostEqual(wfm.y[10], 10 * 1e-3)
+        self.assertEqual(len(self.scope.channels[0].measurement.fetch_waveform()), 100)
+        self.assertRaises(ivi.ValueNotSupportedException, setattr,
+                self.scope.measurement, 'waveform_format', 'ascii')
+
+if __name__ == '__main__':
+    unittest.main()
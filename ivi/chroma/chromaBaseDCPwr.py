@@ -81,7 +81,7 @@ class chromaBaseDCPwr(scpi.dcpwr.Base, scpi.dcpwr.Trigger, scpi.dcpwr.SoftwareTr
         except AttributeError:
             pass
 
-        self._output_name = list()
+        self._output_name = ivi.SelectorList()
         self._output_current_limit = list()
         self._output_current_limit_behavior = list()
         self._output_enabled = list()
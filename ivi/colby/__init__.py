@@ -24,7 +24,10 @@ THE SOFTWARE.
 
 """
 
-# Phase shifters
-from .colbyPDL10A import colbyPDL10A
+from .. import ivi
 
+__all__ = [
+        # Phase shifters
+        "colbyPDL10A"]
 
+__getattr__, __dir__ = ivi.register_drivers(__name__, __all__)
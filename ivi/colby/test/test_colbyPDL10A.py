@@ -24,74 +24,19 @@ THE SOFTWARE.
 
 """
 
-import io
 import unittest
 
 from .. import colbyPDL10A
+from ...test import virtual
 
-class VirtualPDL10A(object):
+class VirtualPDL10A(virtual.VirtualInstrument):
     def __init__(self):
-        self.read_buffer = io.BytesIO()
-        self.tx_log = list()
-        self.rx_log = list()
-        self.cmd_log = list()
-
-        self.cmds = {
-            '*cls' : None,
-            '*idn?' : str,
-            '*rst': None,
-            '*tst?': int,
-            'del?': float,
-            'del': float,
-            'err?': str,
-            'mode?': str,
-            'mode' : str,
-        }
-        self.vals = {
-            '*idn': 'Colby Instruments Inc,PDL 10A5 ,123            ,V2.1',
-            '*tst': 0,
-            'del': 0.0,
-            'err': '0',
-            'mode': '',
-        }
-
-    def write_raw(self, data):
-        self.rx_log.append(data)
-        cmd = data.split(b' ')[0].decode()
-
-        print("Got command %s" % cmd)
-
-        cmd = cmd.lower().lstrip(':')
-
-        self.cmd_log.append(cmd)
-
-        t = self.cmds[cmd]
-
-        if '?' in cmd:
-            cmd = cmd.strip('?')
-
-            if t is int:
-                d = '{0:d}'.format(self.vals[cmd]).encode()
-                self.tx_log.append(d)
-                self.read_buffer = io.BytesIO(d)
-            elif t is float:
-                d = '{0:+E}'.format(self.vals[cmd]).encode()
-                self.tx_log.append(d)
-                self.read_buffer = io.BytesIO(d)
-            elif t is str:
-                d = self.vals[cmd].encode()
-                self.tx_log.append(d)
-                self.read_buffer = io.BytesIO(d)
-        else:
-            if t is int:
-                self.vals[cmd] = int(data.split(b' ')[1].decode())
-            elif t is float:
-                self.vals[cmd] = float(data.split(b' ')[1].decode())
-            elif t is str:
-                self.vals[cmd] = data.split(b' ')[1].decode()
-
-    def read_raw(self, num=-1):
-        return self.read_buffer.read(num)
+        super(VirtualPDL10A, self).__init__('Colby Instruments Inc,PDL 10A5 ,123            ,V2.1',
+                strict=True)
+
+        self.add_command('del', float, 0.0, fmt='{0:+E}')
+        self.add_command('err', str, '0', settable=False)
+        self.add_command('mode', str, '')
 
 
 class TestColbyPDL10A(unittest.TestCase):
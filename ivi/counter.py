@@ -50,7 +50,7 @@ class Base(ivi.IviContainer):
         ivi.add_group_capability(self, cls+grp)
         
         self._measurement_function = 'frequency'
-        self._channel_name = list()
+        self._channel_name = ivi.SelectorList()
         self._channel_impedance = list()
         self._channel_coupling = list()
         self._channel_attenuation = list()
@@ -916,7 +916,7 @@ class Base(ivi.IviContainer):
         except AttributeError:
             pass
         
-        self._channel_name = list()
+        self._channel_name = ivi.SelectorList()
         self._channel_impedance = list()
         self._channel_coupling = list()
         self._channel_attenuation = list()
@@ -1519,6 +1519,8 @@ class Base(ivi.IviContainer):
         pass
     
     def _measurement_read(self, maximum_time):
+        self._measurement_initiate()
+        self._wait_until(lambda: self._measurement_is_measurement_complete() != 'in_progress', maximum_time)
         return self._measurement_fetch()
     
     
@@ -65,7 +65,7 @@ class Base(ivi.IviContainer):
         self._output_ovp_enabled = list()
         self._output_ovp_limit = list()
         self._output_voltage_level = list()
-        self._output_name = list()
+        self._output_name = ivi.SelectorList()
         self._output_count = 1
         
         self._output_spec = [
@@ -279,7 +279,7 @@ class Base(ivi.IviContainer):
         except AttributeError:
             pass
         
-        self._output_name = list()
+        self._output_name = ivi.SelectorList()
         self._output_current_limit = list()
         self._output_current_limit_behavior = list()
         self._output_enabled = list()
@@ -24,7 +24,10 @@ THE SOFTWARE.
 
 """
 
-# Programmable fiberoptic instrument
-from .diconGP700 import diconGP700
+from .. import ivi
 
+__all__ = [
+        # Programmable fiberoptic instrument
+        "diconGP700"]
 
+__getattr__, __dir__ = ivi.register_drivers(__name__, __all__)
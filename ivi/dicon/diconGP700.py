@@ -34,6 +34,9 @@ class diconGP700(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common.Res
                  ivi.Driver):
     "DiCon Fiberoptics GP700 Programmable Fiberoptic Instrument"
     
+    # the installed modules, see _get_config
+    _identity_cache_attributes = {'config': '_config'}
+    
     def __init__(self, *args, **kwargs):
         self.__dict__.setdefault('_instrument_id', 'GP700')
         
@@ -58,23 +61,23 @@ class diconGP700(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common.Res
         self._config = ""
         
         self._attenuator_count = 0
-        self._attenuator_name = list()
+        self._attenuator_name = ivi.SelectorList()
         self._attenuator_level = list()
         self._attenuator_level_max = list()
         
         self._filter_count = 0
-        self._filter_name = list()
+        self._filter_name = ivi.SelectorList()
         self._filter_wavelength = list()
         self._filter_wavelength_max = list()
         self._filter_wavelength_min = list()
         
         self._matrix_input_count = 0
-        self._matrix_input_name = list()
+        self._matrix_input_name = ivi.SelectorList()
         self._matrix_output_count = 0
         self._matrix_input_output = list()
         
         self._switch_count = 0
-        self._switch_name = list()
+        self._switch_name = ivi.SelectorList()
         self._switch_output = list()
         self._switch_input = list()
         self._switch_output_count = list()
@@ -240,23 +243,23 @@ class diconGP700(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common.Res
         config = self._get_config()
         
         self._attenuator_count = 0
-        self._attenuator_name = list()
+        self._attenuator_name = ivi.SelectorList()
         self._attenuator_level = list()
         self._attenuator_level_max = list()
         
         self._filter_count = 0
-        self._filter_name = list()
+        self._filter_name = ivi.SelectorList()
         self._filter_wavelength = list()
         self._filter_wavelength_max = list()
         self._filter_wavelength_min = list()
         
         self._matrix_input_count = 0
-        self._matrix_input_name = list()
+        self._matrix_input_name = ivi.SelectorList()
         self._matrix_output_count = 0
         self._matrix_input_output = list()
         
         self._switch_count = 0
-        self._switch_name = list()
+        self._switch_name = ivi.SelectorList()
         self._switch_output = list()
         self._switch_input = list()
         self._switch_output_count = list()
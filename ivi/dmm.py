@@ -86,7 +86,14 @@ class Base(ivi.IviContainer):
         self._add_method('measurement.abort',
                         self._measurement_abort)
         self._add_method('measurement.fetch',
-                        self._measurement_fetch)
+                        self._measurement_fetch,
+                        ivi.Doc("""
+                        This function returns the value from a previously initiated measurement.
+                        The max_time parameter is the maximum time in seconds to wait for the
+                        measurement to complete (the IVI specification gives it in
+                        milliseconds). If the measurement does not complete within that time,
+                        the function returns the Max Time Exceeded error.
+                        """, cls, grp))
         self._add_method('measurement.initiate',
                         self._measurement_initiate)
         self._add_method('measurement.is_out_of_range',
@@ -96,7 +103,15 @@ class Base(ivi.IviContainer):
         self._add_method('measurement.is_under_range',
                         self._measurement_is_under_range)
         self._add_method('measurement.read',
-                        self._measurement_read)
+                        self._measurement_read,
+                        ivi.Doc("""
+                        This function initiates a measurement, waits until the DMM has returned
+                        to the Idle state, and returns the measured value. The max_time
+                        parameter is the maximum time in seconds to wait for the measurement to
+                        complete (the IVI specification gives it in milliseconds). If the
+                        measurement does not complete within that time, the function returns the
+                        Max Time Exceeded error.
+                        """, cls, grp))
     
     def _get_measurement_function(self):
         return self._measurement_function
@@ -446,9 +461,21 @@ class MultiPoint(ivi.IviContainer):
         self._add_method('trigger.multi_point.configure',
                         self._trigger_multi_point_configure)
         self._add_method('measurement.fetch_multi_point',
-                        self._measurement_fetch_multi_point)
+                        self._measurement_fetch_multi_point,
+                        ivi.Doc("""
+                        This function returns the values from a previously initiated multiple
+                        point acquisition. The max_time parameter is the maximum time in
+                        seconds to wait for the acquisition to complete (the IVI specification
+                        gives it in milliseconds).
+                        """, cls, grp))
         self._add_method('measurement.read_multi_point',
-                        self._measurement_read_multi_point)
+                        self._measurement_read_multi_point,
+                        ivi.Doc("""
+                        This function initiates a multiple point acquisition, waits for it to
+                        complete, and returns the measured values. The max_time parameter is
+                        the maximum time in seconds to wait for the acquisition to complete
+                        (the IVI specification gives it in milliseconds).
+                        """, cls, grp))
         
     
     def _get_trigger_measurement_complete_destination(self):
@@ -137,7 +137,8 @@ class SystemSetup(ivi.IviContainer):
                         self._system_load_setup,
                         ivi.Doc("""
                         Transfers a binary block of setup data to the instrument to reload a setup
-                        previously saved with system.fetch_setup.
+                        previously saved with system.fetch_setup.  If the instrument is still in
+                        the setup that was last loaded or fetched, the transfer is skipped.
                         """))
     
     def _system_fetch_setup(self):
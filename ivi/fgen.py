@@ -59,7 +59,7 @@ class Base(ivi.IviContainer):
         grp = 'Base'
         ivi.add_group_capability(self, cls+grp)
         
-        self._output_name = list()
+        self._output_name = ivi.SelectorList()
         self._output_operation_mode = list()
         self._output_enabled = list()
         self._output_impedance = list()
@@ -222,7 +222,7 @@ class Base(ivi.IviContainer):
             super(Base, self)._init_outputs()
         except AttributeError:
             pass
-        self._output_name = list()
+        self._output_name = ivi.SelectorList()
         self._output_operation_mode = list()
         self._output_enabled = list()
         self._output_impedance = list()
@@ -2237,7 +2237,7 @@ class DataMarker(ivi.IviContainer):
         ivi.add_group_capability(self, cls+grp)
         
         self._data_marker_count = 1
-        self._data_marker_name = list()
+        self._data_marker_name = ivi.SelectorList()
         self._data_marker_amplitude = list()
         self._data_marker_bit_position = list()
         self._data_marker_delay = list()
@@ -2329,7 +2329,7 @@ class DataMarker(ivi.IviContainer):
         except AttributeError:
             pass
         
-        self._data_marker_name = list()
+        self._data_marker_name = ivi.SelectorList()
         self._data_marker_amplitude = list()
         self._data_marker_bit_position = list()
         self._data_marker_delay = list()
@@ -2465,7 +2465,7 @@ class SparseMarker(ivi.IviContainer):
         ivi.add_group_capability(self, cls+grp)
         
         self._sparse_marker_count = 1
-        self._sparse_marker_name = list()
+        self._sparse_marker_name = ivi.SelectorList()
         self._sparse_marker_amplitude = list()
         self._sparse_marker_delay = list()
         self._sparse_marker_destination = list()
@@ -2561,7 +2561,7 @@ class SparseMarker(ivi.IviContainer):
         except AttributeError:
             pass
         
-        self._sparse_marker_name = list()
+        self._sparse_marker_name = ivi.SelectorList()
         self._sparse_marker_amplitude = list()
         self._sparse_marker_delay = list()
         self._sparse_marker_destination = list()
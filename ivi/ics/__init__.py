@@ -24,9 +24,10 @@ THE SOFTWARE.
 
 """
 
-# Ethernet to Modbus bridge
-from .ics8099 import ics8099
-
-
+from .. import ivi
 
+__all__ = [
+        # Ethernet to Modbus bridge
+        "ics8099"]
 
+__getattr__, __dir__ = ivi.register_drivers(__name__, __all__)
@@ -0,0 +1,249 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+
+from . import ivi
+
+# manufacturer strings reported in *IDN? responses, by driver package
+manufacturers = {
+        'agilent': ['AGILENT', 'KEYSIGHT', 'HEWLETT-PACKARD', 'HEWLETT PACKARD', 'HP'],
+        'chroma': ['CHROMA'],
+        'colby': ['COLBY'],
+        'dicon': ['DICON'],
+        'ics': ['ICS'],
+        'jdsu': ['JDSU', 'JDS UNIPHASE', 'JDS'],
+        'lecroy': ['LECROY', 'TELEDYNE'],
+        'rigol': ['RIGOL'],
+        'tdklambda': ['TDK-LAMBDA', 'TDK', 'LAMBDA'],
+        'tektronix': ['TEKTRONIX', 'SONY/TEK'],
+        'testequity': ['TESTEQUITY']
+    }
+
+_instrument_id_re = re.compile(r"""_instrument_id['"]\s*,\s*['"]([^'"]*)['"]""")
+
+_index = None
+
+def normalize_model(model):
+    "Reduce a model string to upper case letters and digits"
+    return re.sub(r'[^0-9A-Z]', '', model.upper())
+
+def get_vendor(manufacturer):
+    "Get the driver package name for an *IDN? manufacturer string"
+    manufacturer = manufacturer.strip().upper()
+    for vendor in sorted(manufacturers):
+        for m in manufacturers[vendor]:
+            if manufacturer == m or manufacturer.startswith(m + ' '):
+                return vendor
+    return None
+
+def _get_source_files():
+    files = []
+    for name in sorted(ivi.driver_registry):
+        path = ivi.driver_registry[name]
+        package, module = path.rsplit('.', 1)
+        try:
+            base = os.path.dirname(sys.modules[package].__file__)
+        except (KeyError, AttributeError, TypeError):
+            continue
+        files.append((name, path, os.path.join(base, module + '.py')))
+    return files
+
+def _get_signature(files):
+    h = hashlib.sha1(ivi.version.encode('utf-8'))
+    for name, path, filename in files:
+        try:
+            st = os.stat(filename)
+            h.update(("%s %d %d\n" % (path, st.st_mtime, st.st_size)).encode('utf-8'))
+        except OSError:
+            h.update(("%s\n" % path).encode('utf-8'))
+    return h.hexdigest()
+
+def build_index(files=None):
+    """Build the model index from the driver sources
+
+    Maps normalized model strings to lists of [module path, vendor, exact]
+    entries.  Models come from the driver class names and from the
+    _instrument_id each driver declares; the latter is matched as a prefix of
+    the reported model, the same way the drivers check it on id_query.  The
+    sources are scanned as text, no driver module is imported.
+    """
+    if files is None:
+        files = _get_source_files()
+
+    models = dict()
+
+    def add(key, path, vendor, exact):
+        if not key:
+            return
+        lst = models.setdefault(key, list())
+        for entry in lst:
+            if entry[0] == path:
+                entry[2] = entry[2] or exact
+                return
+        lst.append([path, vendor, exact])
+
+    for name, path, filename in files:
+        vendor = path.split('.')[-2]
+        if name.startswith(vendor):
+            add(normalize_model(name[len(vendor):]), path, vendor, True)
+        try:
+            with io.open(filename, encoding='utf-8') as f:
+                m = _instrument_id_re.search(f.read())
+        except (IOError, OSError):
+            continue
+        if m:
+            add(normalize_model(m.group(1)), path, vendor, False)
+
+    return models
+
+def _get_index_file():
+    return os.path.join(ivi.get_cache_dir(), 'driver_index.json')
+
+def get_index(rebuild=False):
+    """Get the model index
+
+    The index is kept in memory and in the cache directory, and is rebuilt
+    when the driver sources change.
+    """
+    global _index
+    files = _get_source_files()
+    signature = _get_signature(files)
+
+    if not rebuild and _index is not None and _index['signature'] == signature:
+        return _index['models']
+
+    filename = _get_index_file()
+
+    if not rebuild:
+        try:
+            with io.open(filename, encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('signature') == signature:
+                _index = index
+                return _index['models']
+        except (IOError, OSError, ValueError):
+            pass
+
+    _index = {'signature': signature, 'models': build_index(files)}
+
+    try:
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        with io.open(filename, 'wb') as f:
+            f.write(json.dumps(_index, sort_keys=True).encode('utf-8'))
+    except (IOError, OSError):
+        pass
+
+    return _index['models']
+
+def find_drivers(idn):
+    """Find driver module paths matching an *IDN? response
+
+    Returns a list of module paths, best match first.
+    """
+    lst = [s.strip() for s in idn.split(',')]
+    if len(lst) < 2:
+        return []
+    vendor = get_vendor(lst[0])
+    model = normalize_model(lst[1])
+    models = get_index()
+
+    # exact matches first, then the longest declared ID that prefixes the model
+    candidates = list(models.get(model, []))
+    if not candidates:
+        for n in range(len(model)-1, 2, -1):
+            candidates = [e for e in models.get(model[:n], []) if not e[2]]
+            if candidates:
+                break
+
+    if vendor is not None and any(e[1] == vendor for e in candidates):
+        candidates = [e for e in candidates if e[1] == vendor]
+
+    candidates.sort(key=lambda e: not e[2])
+    return [e[0] for e in candidates]
+
+def find_driver(idn):
+    "Find the driver class for an *IDN? response"
+    paths = find_drivers(idn)
+    if not paths:
+        raise ivi.IviException("No driver found for instrument: %s" % idn.strip())
+    return ivi.get_driver_class(paths[0].rsplit('.', 1)[1])
+
+def open(resource, id_query = False, reset = False, **keywargs):
+    """Open an instrument with the driver matching its *IDN? response
+
+    The instrument is identified with a single *IDN? query, then the matching
+    driver is initialized on the same connection and returned.  Options are
+    the same as for the driver constructors.
+
+    Example:
+
+    scope = ivi.open("TCPIP0::192.168.1.104::INSTR")
+    """
+    if keywargs.get('simulate'):
+        raise ivi.IviException("Cannot identify a simulated instrument")
+
+    probe_options = dict((k, v) for k, v in keywargs.items()
+            if k in ('prefer_pyvisa', 'session_pool'))
+    probe = ivi.Driver()
+    probe._initialize(resource, **probe_options)
+
+    try:
+        idn = probe._ask("*IDN?")
+        cls = find_driver(idn)
+    except:
+        probe._close()
+        raise
+
+    interface = probe._interface
+    pooled = probe._interface_pooled
+    probe._interface = None
+    probe._interface_pooled = False
+
+    try:
+        # set up the driver before it is initialized, so the identity cache
+        # is looked up for the resource and the driver reuses the response
+        # instead of sending *IDN? again
+        driver = cls()
+        driver._interface_pooled = pooled
+        if isinstance(resource, str):
+            driver._driver_operation_io_resource_descriptor = resource
+        driver._identity_cache_response = ("*IDN?", idn)
+        driver.initialize(interface, id_query, reset, **keywargs)
+    except:
+        if pooled:
+            ivi.session_pool.checkin(interface)
+        else:
+            interface.close()
+        raise
+
+    return driver
@@ -0,0 +1,613 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2012-2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import re
+import select
+import socket
+import struct
+import threading
+import time
+
+# HiSLIP (IVI-6.1) protocol constants
+HISLIP_PORT = 4880
+HISLIP_PROTOCOL_VERSION = 0x0100
+HISLIP_PROLOGUE = b'HS'
+HISLIP_HEADER_FMT = '>2sBBIQ'
+HISLIP_HEADER_LEN = 16
+HISLIP_INITIAL_MESSAGE_ID = 0xffffff00
+
+# message types
+MSG_INITIALIZE = 0
+MSG_INITIALIZE_RESPONSE = 1
+MSG_FATAL_ERROR = 2
+MSG_ERROR = 3
+MSG_ASYNC_LOCK = 4
+MSG_ASYNC_LOCK_RESPONSE = 5
+MSG_DATA = 6
+MSG_DATA_END = 7
+MSG_DEVICE_CLEAR_COMPLETE = 8
+MSG_DEVICE_CLEAR_ACKNOWLEDGE = 9
+MSG_ASYNC_REMOTE_LOCAL_CONTROL = 10
+MSG_ASYNC_REMOTE_LOCAL_RESPONSE = 11
+MSG_TRIGGER = 12
+MSG_INTERRUPTED = 13
+MSG_ASYNC_INTERRUPTED = 14
+MSG_ASYNC_MAXIMUM_MESSAGE_SIZE = 15
+MSG_ASYNC_MAXIMUM_MESSAGE_SIZE_RESPONSE = 16
+MSG_ASYNC_INITIALIZE = 17
+MSG_ASYNC_INITIALIZE_RESPONSE = 18
+MSG_ASYNC_DEVICE_CLEAR = 19
+MSG_ASYNC_SERVICE_REQUEST = 20
+MSG_ASYNC_STATUS_QUERY = 21
+MSG_ASYNC_STATUS_RESPONSE = 22
+MSG_ASYNC_DEVICE_CLEAR_ACKNOWLEDGE = 23
+MSG_ASYNC_LOCK_INFO = 24
+MSG_ASYNC_LOCK_INFO_RESPONSE = 25
+
+# feature bits
+FEATURE_OVERLAP = 0x01
+
+# remote/local control codes
+RL_DISABLE_REMOTE = 0
+RL_ENABLE_REMOTE = 1
+RL_DISABLE_REMOTE_GOTO_LOCAL = 2
+RL_ENABLE_REMOTE_GOTO_REMOTE = 3
+RL_ENABLE_REMOTE_LOCK_LOCAL = 4
+RL_ENABLE_REMOTE_GOTO_REMOTE_LOCK_LOCAL = 5
+RL_GOTO_LOCAL = 6
+
+def parse_visa_resource_string(resource_string):
+    # valid resource strings:
+    # TCPIP::10.0.0.1::hislip0::INSTR
+    # TCPIP0::10.0.0.1::hislip0::INSTR
+    # TCPIP0::10.0.0.1::hislip0,4880::INSTR
+    m = re.match(r'^(?P<prefix>(?P<type>TCPIP)\d*)(::(?P<arg1>[^\s:]+))'
+            r'(::(?P<arg2>hislip\d+)(,(?P<port>\d+))?)(::(?P<suffix>INSTR))$',
+            resource_string, re.I)
+
+    if m is not None:
+        return dict(
+                type = m.group('type').upper(),
+                prefix = m.group('prefix'),
+                arg1 = m.group('arg1'),
+                arg2 = m.group('arg2'),
+                port = m.group('port'),
+                suffix = m.group('suffix'),
+        )
+
+# Exceptions
+class HislipException(Exception):
+    em = {0: "Unidentified error",
+          1: "Poorly formed message header",
+          2: "Attempt to use connection without both channels established",
+          3: "Invalid initialization sequence",
+          4: "Server refused connection due to maximum number of clients exceeded"}
+
+    def __init__(self, err = None, note = None):
+        self.err = err
+        self.note = note
+        self.msg = ''
+
+        if err is None:
+            self.msg = note
+        else:
+            if type(err) is int:
+                if err in self.em:
+                    self.msg = "%d: %s" % (err, self.em[err])
+                else:
+                    self.msg = "%d: Unknown error" % err
+            else:
+                self.msg = err
+            if note is not None:
+                self.msg = "%s [%s]" % (self.msg, note)
+
+    def __str__(self):
+        return self.msg
+
+class HislipTimeoutException(HislipException): pass
+
+def pack_message(msg_type, control_code = 0, parameter = 0, payload = b''):
+    "Build a HiSLIP message"
+    return struct.pack(HISLIP_HEADER_FMT, HISLIP_PROLOGUE, msg_type, control_code,
+            parameter & 0xffffffff, len(payload)) + payload
+
+def unpack_header(data):
+    "Split a HiSLIP header into (type, control_code, parameter, length)"
+    prologue, msg_type, control_code, parameter, length = struct.unpack(HISLIP_HEADER_FMT, data)
+    if prologue != HISLIP_PROLOGUE:
+        raise HislipException(1, 'header')
+    return msg_type, control_code, parameter, length
+
+def recv_exact(sock, num):
+    "Receive exactly num bytes from a socket"
+    data = bytearray()
+    while len(data) < num:
+        try:
+            chunk = sock.recv(num - len(data))
+        except socket.timeout:
+            raise HislipTimeoutException('Timeout', 'recv')
+        if not chunk:
+            raise HislipException('Connection closed', 'recv')
+        data += chunk
+    return bytes(data)
+
+def recv_message(sock):
+    "Receive one HiSLIP message, returns (type, control_code, parameter, payload)"
+    msg_type, control_code, parameter, length = unpack_header(recv_exact(sock, HISLIP_HEADER_LEN))
+    payload = b''
+    if length > 0:
+        payload = recv_exact(sock, length)
+    return msg_type, control_code, parameter, payload
+
+class HislipInstrument(object):
+    "HiSLIP instrument interface client"
+    def __init__(self, host, name = None, port = HISLIP_PORT, client_id = 'PY', overlap = False,
+                max_message_size = 1024*1024):
+        "Create new HiSLIP instrument object"
+
+        if host.upper().startswith('TCPIP') and '::' in host:
+            res = parse_visa_resource_string(host)
+
+            if res is None:
+                raise HislipException('Invalid resource string', 'init')
+
+            host = res['arg1']
+            name = res['arg2']
+            if res['port'] is not None:
+                port = int(res['port'])
+
+        if name is None:
+            name = "hislip0"
+
+        self.host = host
+        self.name = name
+        self.port = port
+        self.client_id = client_id
+
+        self.sync_sock = None
+        self.async_sock = None
+        self.sync_lock = threading.RLock()
+        self.async_lock = threading.RLock()
+
+        self.session_id = None
+        self.server_protocol_version = None
+        self.server_vendor_id = None
+
+        # requested and negotiated message overlap mode
+        self.overlap = overlap
+        self.overlap_mode = None
+
+        # maximum message sizes: ours is what we accept, the server's limits
+        # how much we can send in a single data message
+        self.max_message_size = max_message_size
+        self.server_max_message_size = None
+
+        self.message_id = HISLIP_INITIAL_MESSAGE_ID
+        self.last_message_id = None
+        self.rmt_delivered = False
+
+        self.read_buffer = bytearray()
+        self.read_end = False
+
+        self.status_byte = 0
+        self.srq_callback = None
+        # status byte of the last service request not yet returned by
+        # wait_for_srq, None if there is none
+        self._srq_pending = None
+
+        self.lock_timeout = 10
+        self.timeout = 10
+        self.locked = False
+
+    def __del__(self):
+        if self.sync_sock is not None:
+            self.close()
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, val):
+        self._timeout = val
+        if self.sync_sock is not None:
+            self.sync_sock.settimeout(val)
+        if self.async_sock is not None:
+            self.async_sock.settimeout(val)
+
+    @property
+    def lock_timeout(self):
+        return self._lock_timeout
+
+    @lock_timeout.setter
+    def lock_timeout(self, val):
+        self._lock_timeout = val
+        self._lock_timeout_ms = int(val * 1000)
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout)
+        return sock
+
+    def open(self):
+        "Open connection to HiSLIP device"
+        if self.sync_sock is not None:
+            return
+
+        # synchronous channel
+        sync_sock = self._connect()
+        try:
+            vendor = bytearray(str(self.client_id).encode('ascii')[:2].ljust(2, b' '))
+            parameter = (HISLIP_PROTOCOL_VERSION << 16) | (vendor[0] << 8) | vendor[1]
+            sync_sock.sendall(pack_message(MSG_INITIALIZE, 0, parameter, self.name.encode('ascii')))
+            msg_type, control_code, parameter, payload = recv_message(sync_sock)
+            if msg_type == MSG_FATAL_ERROR:
+                raise HislipException(control_code, payload.decode('ascii', 'replace'))
+            if msg_type != MSG_INITIALIZE_RESPONSE:
+                raise HislipException(3, 'open')
+            self.overlap_mode = bool(control_code & FEATURE_OVERLAP)
+            self.server_protocol_version = parameter >> 16
+            self.session_id = parameter & 0xffff
+
+            # asynchronous channel
+            async_sock = self._connect()
+            try:
+                async_sock.sendall(pack_message(MSG_ASYNC_INITIALIZE, 0, self.session_id))
+                msg_type, control_code, parameter, payload = recv_message(async_sock)
+                if msg_type == MSG_FATAL_ERROR:
+                    raise HislipException(control_code, payload.decode('ascii', 'replace'))
+                if msg_type != MSG_ASYNC_INITIALIZE_RESPONSE:
+                    raise HislipException(3, 'open')
+                self.server_vendor_id = struct.pack('>H', parameter & 0xffff)
+            except:
+                async_sock.close()
+                raise
+        except:
+            sync_sock.close()
+            raise
+
+        self.sync_sock = sync_sock
+        self.async_sock = async_sock
+
+        self.message_id = HISLIP_INITIAL_MESSAGE_ID
+        self.last_message_id = None
+        self.rmt_delivered = False
+        self.read_buffer = bytearray()
+        self.read_end = False
+
+        # negotiate maximum message size
+        msg_type, control_code, parameter, payload = self._async_transaction(
+                MSG_ASYNC_MAXIMUM_MESSAGE_SIZE, 0, 0, struct.pack('>Q', self.max_message_size),
+                MSG_ASYNC_MAXIMUM_MESSAGE_SIZE_RESPONSE)
+        self.server_max_message_size = struct.unpack('>Q', payload[:8])[0]
+
+        # negotiate overlap mode with a device clear if the server picked
+        # something other than what we asked for
+        if self.overlap_mode != bool(self.overlap):
+            self.clear()
+
+    def close(self):
+        "Close connection"
+        if self.sync_sock is None:
+            return
+
+        for sock in (self.async_sock, self.sync_sock):
+            try:
+                sock.close()
+            except socket.error:
+                pass
+
+        self.sync_sock = None
+        self.async_sock = None
+        self.locked = False
+
+    def _next_message_id(self):
+        self.last_message_id = self.message_id
+        self.message_id = (self.message_id + 2) & 0xffffffff
+        return self.last_message_id
+
+    def _send_sync(self, msg_type, payload = b''):
+        control_code = 1 if self.rmt_delivered else 0
+        self.rmt_delivered = False
+        self.sync_sock.sendall(pack_message(msg_type, control_code, self._next_message_id(), payload))
+
+    def _recv_sync(self):
+        msg_type, control_code, parameter, payload = recv_message(self.sync_sock)
+        if msg_type == MSG_FATAL_ERROR:
+            self.close()
+            raise HislipException(control_code, payload.decode('ascii', 'replace'))
+        if msg_type == MSG_ERROR:
+            raise HislipException(control_code, payload.decode('ascii', 'replace'))
+        return msg_type, control_code, parameter, payload
+
+    def _recv_async(self, expect):
+        while True:
+            msg_type, control_code, parameter, payload = recv_message(self.async_sock)
+            if msg_type == MSG_ASYNC_SERVICE_REQUEST:
+                self._handle_srq(control_code)
+                continue
+            if msg_type == MSG_ASYNC_INTERRUPTED:
+                continue
+            if msg_type == MSG_FATAL_ERROR:
+                self.close()
+                raise HislipException(control_code, payload.decode('ascii', 'replace'))
+            if msg_type == MSG_ERROR:
+                raise HislipException(control_code, payload.decode('ascii', 'replace'))
+            if msg_type != expect:
+                raise HislipException('Unexpected message type %d' % msg_type, 'async')
+            return msg_type, control_code, parameter, payload
+
+    def _async_transaction(self, msg_type, control_code, parameter, payload, expect):
+        with self.async_lock:
+            self.async_sock.sendall(pack_message(msg_type, control_code, parameter, payload))
+            return self._recv_async(expect)
+
+    def _handle_srq(self, stb):
+        self.status_byte = stb
+        self._srq_pending = stb
+        if self.srq_callback is not None:
+            self.srq_callback(stb)
+
+    def write_raw(self, data):
+        "Write binary data to instrument"
+        if self.sync_sock is None:
+            self.open()
+
+        data = bytes(data)
+        max_len = self.server_max_message_size - HISLIP_HEADER_LEN
+        if max_len <= 0:
+            max_len = len(data) or 1
+
+        with self.sync_lock:
+            # in synchronized mode any unread response is discarded by the
+            # server when a new message arrives
+            if not self.overlap_mode:
+                self.read_buffer = bytearray()
+                self.read_end = False
+
+            offset = 0
+            while True:
+                chunk = data[offset:offset+max_len]
+                offset += len(chunk)
+                if offset >= len(data):
+                    self._send_sync(MSG_DATA_END, chunk)
+                    break
+                self._send_sync(MSG_DATA, chunk)
+
+    def _fill_buffer(self):
+        "Receive data messages until the end of the current response"
+        while True:
+            msg_type, control_code, parameter, payload = self._recv_sync()
+            if msg_type == MSG_DATA:
+                self.read_buffer += payload
+            elif msg_type == MSG_DATA_END:
+                self.read_buffer += payload
+                self.read_end = True
+                self.rmt_delivered = True
+                return
+            elif msg_type == MSG_INTERRUPTED:
+                # response to an earlier message was abandoned
+                self.read_buffer = bytearray()
+            else:
+                raise HislipException('Unexpected message type %d' % msg_type, 'read')
+
+    def read_raw(self, num=-1):
+        "Read binary data from instrument"
+        if self.sync_sock is None:
+            self.open()
+
+        with self.sync_lock:
+            if num < 0:
+                if not self.read_end:
+                    self._fill_buffer()
+                data = bytes(self.read_buffer)
+                self.read_buffer = bytearray()
+                self.read_end = False
+                return data
+
+            while len(self.read_buffer) < num and not self.read_end:
+                msg_type, control_code, parameter, payload = self._recv_sync()
+                if msg_type == MSG_DATA:
+                    self.read_buffer += payload
+                elif msg_type == MSG_DATA_END:
+                    self.read_buffer += payload
+                    self.read_end = True
+                    self.rmt_delivered = True
+                elif msg_type == MSG_INTERRUPTED:
+                    self.read_buffer = bytearray()
+                else:
+                    raise HislipException('Unexpected message type %d' % msg_type, 'read')
+
+            data = bytes(self.read_buffer[:num])
+            del self.read_buffer[:num]
+            if self.read_end and len(self.read_buffer) == 0:
+                self.read_end = False
+            return data
+
+    def ask_raw(self, data, num=-1):
+        "Write then read binary data"
+        with self.sync_lock:
+            self.write_raw(data)
+            return self.read_raw(num)
+
+    def write(self, message, encoding = 'utf-8'):
+        "Write string to instrument"
+        if type(message) is tuple or type(message) is list:
+            # recursive call for a list of commands
+            for message_i in message:
+                self.write(message_i, encoding)
+            return
+
+        self.write_raw(str(message).encode(encoding))
+
+    def read(self, num=-1, encoding = 'utf-8'):
+        "Read string from instrument"
+        return self.read_raw(num).decode(encoding).rstrip('\r\n')
+
+    def ask(self, message, num=-1, encoding = 'utf-8'):
+        "Write then read string"
+        if type(message) is tuple or type(message) is list:
+            # recursive call for a list of commands
+            val = list()
+            for message_i in message:
+                val.append(self.ask(message_i, num, encoding))
+            return val
+
+        with self.sync_lock:
+            self.write(message, encoding)
+            return self.read(num, encoding)
+
+    def read_stb(self):
+        "Read status byte"
+        if self.sync_sock is None:
+            self.open()
+
+        control_code = 1 if self.rmt_delivered else 0
+        self.rmt_delivered = False
+        parameter = self.last_message_id
+        if parameter is None:
+            parameter = HISLIP_INITIAL_MESSAGE_ID - 2
+
+        msg_type, control_code, parameter, payload = self._async_transaction(
+                MSG_ASYNC_STATUS_QUERY, control_code, parameter, b'',
+                MSG_ASYNC_STATUS_RESPONSE)
+        self.status_byte = control_code
+        return control_code
+
+    def wait_for_srq(self, timeout = None):
+        "Wait for a service request, returns the status byte or None on timeout"
+        if self.sync_sock is None:
+            self.open()
+
+        if timeout is None:
+            timeout = self.timeout
+
+        deadline = time.time() + timeout
+
+        with self.async_lock:
+            while self._srq_pending is None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                r, w, x = select.select([self.async_sock], [], [], remaining)
+                if not r:
+                    return None
+                msg_type, control_code, parameter, payload = recv_message(self.async_sock)
+                if msg_type == MSG_ASYNC_SERVICE_REQUEST:
+                    self._handle_srq(control_code)
+                elif msg_type == MSG_FATAL_ERROR:
+                    self.close()
+                    raise HislipException(control_code, payload.decode('ascii', 'replace'))
+            stb = self._srq_pending
+            self._srq_pending = None
+            return stb
+
+    def trigger(self):
+        "Send trigger command"
+        if self.sync_sock is None:
+            self.open()
+
+        with self.sync_lock:
+            self._send_sync(MSG_TRIGGER)
+
+    def clear(self):
+        "Send clear command"
+        if self.sync_sock is None:
+            self.open()
+
+        feature = FEATURE_OVERLAP if self.overlap else 0
+
+        with self.async_lock:
+            self.async_sock.sendall(pack_message(MSG_ASYNC_DEVICE_CLEAR))
+            self._recv_async(MSG_ASYNC_DEVICE_CLEAR_ACKNOWLEDGE)
+
+        with self.sync_lock:
+            self.sync_sock.sendall(pack_message(MSG_DEVICE_CLEAR_COMPLETE, feature))
+
+            # discard anything still in flight from before the clear
+            while True:
+                msg_type, control_code, parameter, payload = self._recv_sync()
+                if msg_type == MSG_DEVICE_CLEAR_ACKNOWLEDGE:
+                    break
+
+            self.overlap_mode = bool(control_code & FEATURE_OVERLAP)
+            self.message_id = HISLIP_INITIAL_MESSAGE_ID
+            self.last_message_id = None
+            self.rmt_delivered = False
+            self.read_buffer = bytearray()
+            self.read_end = False
+
+    def _remote_local(self, code):
+        if self.sync_sock is None:
+            self.open()
+
+        parameter = self.last_message_id
+        if parameter is None:
+            parameter = HISLIP_INITIAL_MESSAGE_ID - 2
+
+        self._async_transaction(MSG_ASYNC_REMOTE_LOCAL_CONTROL, code, parameter, b'',
+                MSG_ASYNC_REMOTE_LOCAL_RESPONSE)
+
+    def remote(self):
+        "Send remote command"
+        self._remote_local(RL_ENABLE_REMOTE_GOTO_REMOTE)
+
+    def local(self):
+        "Send local command"
+        self._remote_local(RL_GOTO_LOCAL)
+
+    def lock(self):
+        "Send lock command"
+        if self.sync_sock is None:
+            self.open()
+
+        msg_type, control_code, parameter, payload = self._async_transaction(
+                MSG_ASYNC_LOCK, 1, self._lock_timeout_ms, b'',
+                MSG_ASYNC_LOCK_RESPONSE)
+
+        if control_code not in (1, 2):
+            raise HislipException('Lock failed', 'lock')
+
+        self.locked = True
+
+    def unlock(self):
+        "Send unlock command"
+        if self.sync_sock is None:
+            self.open()
+
+        parameter = self.last_message_id
+        if parameter is None:
+            parameter = HISLIP_INITIAL_MESSAGE_ID - 2
+
+        msg_type, control_code, parameter, payload = self._async_transaction(
+                MSG_ASYNC_LOCK, 0, parameter, b'',
+                MSG_ASYNC_LOCK_RESPONSE)
+
+        if control_code != 1:
+            raise HislipException('No lock held', 'unlock')
+
+        self.locked = False
@@ -0,0 +1,199 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import threading
+
+class MultiDropBus(object):
+    "Multi-drop serial bus (RS-485) with software addressed units"
+    def __init__(self, interface, address_command = 'ADR %d', address_response = True):
+        self.interface = interface
+        self.address_command = address_command
+        self.address_response = address_response
+        self.current_address = None
+        self.lock = threading.RLock()
+        self.queue = dict()
+        self.address_count = 0
+        self.address_skip_count = 0
+
+    def select(self, address):
+        "Address a unit, skipping the command if it is already addressed"
+        with self.lock:
+            if address == self.current_address:
+                self.address_skip_count += 1
+                return
+            # forget the current address until the unit has acknowledged
+            self.current_address = None
+            if self.address_response:
+                self.interface.ask(self.address_command % address)
+            else:
+                self.interface.write(self.address_command % address)
+            self.current_address = address
+            self.address_count += 1
+
+    def invalidate(self):
+        "Force the next command to readdress its unit"
+        with self.lock:
+            self.current_address = None
+
+    def unit(self, address):
+        "Get a virtual interface for the unit at address"
+        return MultiDropUnit(self, address)
+
+    def enqueue(self, address, message):
+        "Queue a command for a unit, to be sent by flush"
+        with self.lock:
+            self.queue.setdefault(address, list()).append(message)
+
+    def flush(self, encoding = 'utf-8'):
+        "Send queued commands grouped by unit, starting with the addressed unit"
+        with self.lock:
+            queue = self.queue
+            self.queue = dict()
+            order = sorted(queue.keys(), key=lambda a: (a != self.current_address, a))
+            responses = dict()
+            for address in order:
+                self.select(address)
+                val = list()
+                for message in queue[address]:
+                    if self.address_response:
+                        val.append(self.interface.ask(message, encoding=encoding))
+                    else:
+                        self.interface.write(message, encoding)
+                responses[address] = val
+            return responses
+
+    def get_statistics(self):
+        "Return addressing statistics as a dict"
+        with self.lock:
+            return dict(
+                    current_address = self.current_address,
+                    address_count = self.address_count,
+                    address_skip_count = self.address_skip_count,
+            )
+
+class MultiDropUnit(object):
+    "Instrument interface for one unit on a multi-drop bus"
+    def __init__(self, bus, address):
+        self.bus = bus
+        self.address = address
+
+    @property
+    def term_char(self):
+        return getattr(self.bus.interface, 'term_char', None)
+
+    @term_char.setter
+    def term_char(self, val):
+        with self.bus.lock:
+            self.bus.interface.term_char = val
+
+    def close(self):
+        "Close unit interface, the shared port stays open"
+        pass
+
+    def _call(self, name, *args):
+        func = getattr(self.bus.interface, name)
+        with self.bus.lock:
+            self.bus.select(self.address)
+            try:
+                return func(*args)
+            except NotImplementedError:
+                # nothing was sent, the unit stays addressed
+                raise
+            except:
+                # unit state unknown after a failed transfer
+                self.bus.invalidate()
+                raise
+
+    def write_raw(self, data):
+        "Write binary data to instrument"
+        self._call('write_raw', data)
+
+    def read_raw(self, num=-1):
+        "Read binary data from instrument"
+        return self._call('read_raw', num)
+
+    def ask_raw(self, data, num=-1):
+        "Write then read binary data"
+        return self._call('ask_raw', data, num)
+
+    def write(self, message, encoding = 'utf-8'):
+        "Write string to instrument"
+        self._call('write', message, encoding)
+
+    def read(self, num=-1, encoding = 'utf-8'):
+        "Read string from instrument"
+        return self._call('read', num, encoding)
+
+    def ask(self, message, num=-1, encoding = 'utf-8'):
+        "Write then read string"
+        return self._call('ask', message, num, encoding)
+
+    def enqueue(self, message):
+        "Queue a command to be sent with the next bus flush"
+        self.bus.enqueue(self.address, message)
+
+    def read_stb(self):
+        "Read status byte to the addressed unit"
+        return self._call('read_stb')
+
+    def trigger(self):
+        "Send trigger command to the addressed unit"
+        self._call('trigger')
+
+    def clear(self):
+        "Send clear command to the addressed unit"
+        self._call('clear')
+
+    def remote(self):
+        "Send remote command to the addressed unit"
+        self._call('remote')
+
+    def local(self):
+        "Send local command to the addressed unit"
+        self._call('local')
+
+    def lock(self):
+        "Keep the unit addressed until unlock is called"
+        self.bus.lock.acquire()
+        self.bus.select(self.address)
+
+    def unlock(self):
+        "Release the bus held by lock"
+        self.bus.lock.release()
+
+# registry of open multi-drop buses by resource string
+_buses = dict()
+_buses_lock = threading.Lock()
+
+def get_bus(resource, **kwargs):
+    "Get the multi-drop bus on a serial port, opening the port on first use"
+    with _buses_lock:
+        bus = _buses.get(resource)
+        if bus is None:
+            from . import pyserial
+            bus = MultiDropBus(pyserial.SerialInstrument(resource), **kwargs)
+            _buses[resource] = bus
+        return bus
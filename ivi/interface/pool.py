@@ -0,0 +1,198 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import re
+import threading
+import time
+
+def normalize_resource_string(resource_string):
+    "Convert a VISA resource string to a canonical form for use as a key"
+    m = re.match(r'^(?P<type>TCPIP|USB|GPIB|ASRL)(?P<board>\d*)(::(?P<arg1>[^\s:]+))?'
+            r'(::(?P<arg2>[^\s:]+(\[.+\])?))?(::(?P<arg3>[^\s:]+))?(::(?P<suffix>INSTR))$',
+            resource_string, re.I)
+
+    if m is None:
+        return resource_string
+
+    res_type = m.group('type').upper()
+    board = int(m.group('board') or 0)
+    args = [m.group('arg1'), m.group('arg2'), m.group('arg3')]
+
+    if res_type == 'TCPIP':
+        args[0] = args[0].lower()
+        if args[1] is None:
+            args[1] = 'inst0'
+        args[1] = args[1].lower()
+    elif res_type == 'USB':
+        # vendor and product IDs may be given in decimal or hex
+        for i in (0, 1):
+            if args[i] is not None:
+                try:
+                    args[i] = '0x%04x' % int(args[i], 0)
+                except ValueError:
+                    pass
+
+    return '::'.join(['%s%d' % (res_type, board)] + [a for a in args if a is not None] + ['INSTR'])
+
+def default_health_check(interface):
+    "Check that a pooled interface still responds"
+    try:
+        interface.read_stb()
+    except (AttributeError, NotImplementedError):
+        # no out-of-band status read, assume usable
+        pass
+    except Exception:
+        return False
+    return True
+
+class SessionPool(object):
+    """Pool of open instrument interfaces keyed by resource string
+
+    Interfaces that stay idle for idle_timeout seconds are closed by a
+    background timer, even if the pool is not used again.
+    """
+    def __init__(self, idle_timeout = 300, health_check = default_health_check):
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check
+        self.lock = threading.Lock()
+        self.reaper = None
+        self.idle = dict()
+        self.checked_out = dict()
+        self.hit_count = 0
+        self.miss_count = 0
+
+    def checkout(self, resource, open_interface):
+        "Get an open interface for resource, calling open_interface() if none is available"
+        key = normalize_resource_string(resource)
+        self.purge()
+
+        while True:
+            with self.lock:
+                entries = self.idle.get(key)
+                if not entries:
+                    break
+                interface, last_used = entries.pop()
+                if not entries:
+                    del self.idle[key]
+
+            if self.health_check is None or self.health_check(interface):
+                with self.lock:
+                    self.checked_out[id(interface)] = key
+                    self.hit_count += 1
+                return interface
+
+            # stale link, drop it and try the next one
+            self._close_interface(interface)
+
+        interface = open_interface()
+        with self.lock:
+            self.checked_out[id(interface)] = key
+            self.miss_count += 1
+        return interface
+
+    def checkin(self, interface):
+        "Return an interface to the pool"
+        with self.lock:
+            key = self.checked_out.pop(id(interface), None)
+            if key is not None:
+                self.idle.setdefault(key, list()).append((interface, time.time()))
+        if key is None:
+            # not from this pool
+            self._close_interface(interface)
+        self.purge()
+
+    def discard(self, interface):
+        "Close an interface instead of returning it to the pool"
+        with self.lock:
+            self.checked_out.pop(id(interface), None)
+        self._close_interface(interface)
+
+    def purge(self, max_idle = None):
+        "Close interfaces that have been idle for longer than max_idle seconds"
+        if max_idle is None:
+            max_idle = self.idle_timeout
+        if max_idle is None:
+            return
+        limit = time.time() - max_idle
+        expired = list()
+        with self.lock:
+            for key in list(self.idle.keys()):
+                keep = list()
+                for entry in self.idle[key]:
+                    if entry[1] < limit:
+                        expired.append(entry[0])
+                    else:
+                        keep.append(entry)
+                if keep:
+                    self.idle[key] = keep
+                else:
+                    del self.idle[key]
+        for interface in expired:
+            self._close_interface(interface)
+        self._schedule_reaper()
+
+    def _schedule_reaper(self):
+        "Start a timer to purge the pool when the oldest idle interface expires"
+        if self.idle_timeout is None:
+            return
+        with self.lock:
+            if self.reaper is not None or not self.idle:
+                return
+            oldest = min(entry[1] for entries in self.idle.values() for entry in entries)
+            delay = max(oldest + self.idle_timeout - time.time(), 0)
+            self.reaper = threading.Timer(delay, self._reap)
+            self.reaper.daemon = True
+            self.reaper.start()
+
+    def _reap(self):
+        with self.lock:
+            self.reaper = None
+        self.purge()
+
+    def close_all(self):
+        "Close all idle interfaces"
+        with self.lock:
+            if self.reaper is not None:
+                self.reaper.cancel()
+                self.reaper = None
+        self.purge(-1)
+
+    def get_statistics(self):
+        "Return pool statistics as a dict"
+        with self.lock:
+            return dict(
+                    idle = sum(len(v) for v in self.idle.values()),
+                    checked_out = len(self.checked_out),
+                    hit_count = self.hit_count,
+                    miss_count = self.miss_count,
+                    resources = sorted(self.idle.keys()),
+            )
+
+    def _close_interface(self, interface):
+        try:
+            interface.close()
+        except:
+            pass
@@ -132,6 +132,10 @@ class SerialInstrument:
             self.wait_dsr = True
             self.message_delay = 0.1
     
+    def close(self):
+        "Close serial port"
+        self.serial.close()
+    
     def write_raw(self, data):
         "Write binary data to instrument"
         
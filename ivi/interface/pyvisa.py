@@ -24,11 +24,18 @@ THE SOFTWARE.
 
 """
 
-import io
+from __future__ import absolute_import
+
 import sys
 
+import numpy as np
+
 try:
-    import visa
+    try:
+        import pyvisa as visa
+    except ImportError:
+        # older PyVISA releases install as visa
+        import visa
 except ImportError:
     # PyVISA not installed, pass it up
     raise ImportError
@@ -39,40 +46,124 @@ except:
         (e.__class__.__name__, e.args[0]))
     raise ImportError
 
-class PyVisaInstrument:
+# shared resource manager, created on first use
+_resource_manager = None
+
+def get_resource_manager():
+    "Get the PyVISA resource manager shared by all instruments"
+    global _resource_manager
+    if _resource_manager is None:
+        _resource_manager = visa.ResourceManager()
+    return _resource_manager
+
+class PyVisaInstrument(object):
     "PyVisa wrapper instrument interface client"
-    def __init__(self, resource, *args, **kwargs):
+    def __init__(self, resource, chunk_size = None, *args, **kwargs):
         if type(resource) is str:
-            self.instrument = visa.instrument(resource, *args, **kwargs)
+            self.instrument = get_resource_manager().open_resource(resource, *args, **kwargs)
         else:
             self.instrument = resource
-        
-        self.buffer = io.BytesIO()
+
+        # size of the individual reads issued to VISA
+        if chunk_size is None:
+            chunk_size = getattr(self.instrument, 'chunk_size', 20*1024)
+        self.chunk_size = chunk_size
+
+    @property
+    def term_char(self):
+        return self.instrument.read_termination
+
+    @term_char.setter
+    def term_char(self, val):
+        self.instrument.read_termination = val
+        self.instrument.write_termination = val
+
+    @property
+    def timeout(self):
+        val = self.instrument.timeout
+        if val is None:
+            return None
+        return val / 1000.0
+
+    @timeout.setter
+    def timeout(self, val):
+        if val is not None:
+            val = int(val * 1000)
+        self.instrument.timeout = val
+
+    def close(self):
+        "Close connection"
+        self.instrument.close()
 
     def write_raw(self, data):
         "Write binary data to instrument"
-        
         self.instrument.write_raw(data)
 
     def read_raw(self, num=-1):
         "Read binary data from instrument"
-        
-        # PyVISA only supports reading entire buffer
-        #return self.instrument.read_raw()
-        
-        data = self.buffer.read(num)
-        
-        if len(data) == 0:
-            self.buffer = io.BytesIO(self.instrument.read_raw())
-            data = self.buffer.read(num)
-        
-        return data
-    
+        if num < 0:
+            # read everything up to END
+            return bytes(self.instrument.read_raw(self.chunk_size))
+
+        # read at most num bytes, stopping early at END or termination character
+        return bytes(self.instrument.read_bytes(num, chunk_size=self.chunk_size, break_on_termchar=True))
+
     def ask_raw(self, data, num=-1):
         "Write then read binary data"
         self.write_raw(data)
         return self.read_raw(num)
-    
+
+    def read_ieee_block(self, dtype=None):
+        "Read IEEE block, as bytes or as a NumPy array of the given dtype"
+        # IEEE block binary data is prefixed with #lnnnnnnnn
+        # where l is length of n and n is the
+        # length of the data
+        # ex: #800002000 prefixes 2000 data bytes
+
+        # skip anything before the block header
+        c = b''
+        while c != b'#':
+            c = bytes(self.instrument.read_bytes(1))
+
+        l = int(bytes(self.instrument.read_bytes(1)))
+
+        if l == 0:
+            # indefinite length block, runs to END
+            data = bytes(self.instrument.read_raw(self.chunk_size))
+            if dtype is None:
+                return data
+            dtype = np.dtype(dtype)
+            return np.frombuffer(data, dtype, len(data) // dtype.itemsize)
+
+        num = int(bytes(self.instrument.read_bytes(l)).decode('utf-8'))
+
+        if dtype is None:
+            chunks = list()
+        else:
+            # read block contents in chunks directly into the array
+            arr = np.empty(num, np.uint8)
+            view = memoryview(arr)
+        pos = 0
+        status = visa.constants.VI_SUCCESS_MAX_CNT
+        while pos < num:
+            chunk, status = self.instrument.visalib.read(self.instrument.session,
+                    min(self.chunk_size, num - pos))
+            if dtype is None:
+                chunks.append(bytes(chunk))
+            else:
+                view[pos:pos+len(chunk)] = chunk
+            pos += len(chunk)
+
+        # discard the message terminator; a termination character always
+        # follows the block, only END without one can come with the data
+        if self.instrument.read_termination or status != visa.constants.VI_SUCCESS:
+            self.instrument.read_raw(self.chunk_size)
+
+        if dtype is None:
+            return b''.join(chunks)
+        dtype = np.dtype(dtype)
+        return arr[:num - num % dtype.itemsize].view(dtype)
+
     def write(self, message, encoding = 'utf-8'):
         "Write string to instrument"
         if type(message) is tuple or type(message) is list:
@@ -80,7 +171,7 @@ class PyVisaInstrument:
             for message_i in message:
                 self.write(message_i, encoding)
             return
-        
+
         self.write_raw(str(message).encode(encoding))
 
     def read(self, num=-1, encoding = 'utf-8'):
@@ -95,36 +186,40 @@ class PyVisaInstrument:
             for message_i in message:
                 val.append(self.ask(message_i, num, encoding))
             return val
-        
+
         self.write(message, encoding)
         return self.read(num, encoding)
-    
+
     def read_stb(self):
         "Read status byte"
-        raise NotImplementedError()
-    
+        return self.instrument.read_stb()
+
     def trigger(self):
         "Send trigger command"
-        
-        self.instrument.trigger()
-    
+        self.instrument.assert_trigger()
+
     def clear(self):
         "Send clear command"
-        raise NotImplementedError()
-    
+        self.instrument.clear()
+
     def remote(self):
         "Send remote command"
-        raise NotImplementedError()
-    
+        try:
+            self.instrument.control_ren(visa.constants.VI_GPIB_REN_ASSERT_ADDRESS)
+        except AttributeError:
+            raise NotImplementedError()
+
     def local(self):
         "Send local command"
-        raise NotImplementedError()
-    
+        try:
+            self.instrument.control_ren(visa.constants.VI_GPIB_REN_ADDRESS_GTL)
+        except AttributeError:
+            raise NotImplementedError()
+
     def lock(self):
         "Send lock command"
-        raise NotImplementedError()
-    
+        self.instrument.lock_excl()
+
     def unlock(self):
         "Send unlock command"
-        raise NotImplementedError()
-
+        self.instrument.unlock()
@@ -0,0 +1,343 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+# Recording file format
+#
+# 8 byte header 'IVIREC' followed by the format version and a reserved byte,
+# then one record per interface call:
+#
+#   op        1 byte   W write_raw, R read_raw, S read_stb, T trigger,
+#                      C clear, M remote, L local, B read_ieee_block,
+#                      Q wait_for_srq, E failure of the last call
+#   start     float64  seconds since the start of the recording
+#   duration  float64  seconds spent in the call
+#   length    uint32   number of data bytes that follow
+#   data               bytes written or read, the block contents for B, the
+#                      status byte for S and Q (empty if the wait timed out)
+#                      and the exception message for E
+#
+# Records are flushed to the file as they are written, so a session is kept
+# up to the last call even if the process does not exit cleanly.
+#
+# All values are little endian.
+
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b'IVIREC'
+VERSION = 1
+
+_header = struct.Struct('<6sBx')
+_record = struct.Struct('<cddI')
+
+def read_records(filename):
+    "Read a recording, returns a list of (op, start, duration, data) tuples"
+    with open(filename, 'rb') as f:
+        data = f.read()
+
+    magic, version = _header.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise IOError("Not an I/O recording: %s" % filename)
+    if version != VERSION:
+        raise IOError("Unsupported recording version %d" % version)
+
+    records = list()
+    ind = _header.size
+    while ind < len(data):
+        op, start, duration, length = _record.unpack_from(data, ind)
+        ind += _record.size
+        records.append((op, start, duration, data[ind:ind+length]))
+        ind += length
+    return records
+
+class RecordingInstrument(object):
+    """Instrument interface that records the I/O of another interface
+
+    Every write_raw, read_raw and status byte read is passed to the wrapped
+    interface and logged with its timing, so the session can be replayed
+    later with ReplayInstrument.  Example:
+
+    instr = record.RecordingInstrument(vxi11.Instrument("TCPIP0::192.168.1.104::INSTR"),
+            "msox4154a.ivirec")
+    scope = ivi.agilent.agilentMSOX4154A(instr)
+    """
+    def __init__(self, interface, filename):
+        self.interface = interface
+        self.filename = filename
+        self.file = open(filename, 'wb')
+        self.file.write(_header.pack(MAGIC, VERSION))
+        self.file.flush()
+        self.start_time = time.time()
+
+        # optional interface methods the driver looks for
+        if hasattr(interface, 'read_ieee_block'):
+            self.read_ieee_block = self._read_ieee_block
+        if hasattr(interface, 'wait_for_srq'):
+            self.wait_for_srq = self._wait_for_srq
+        if hasattr(interface, 'transaction'):
+            self.transaction = interface.transaction
+
+    def _log(self, op, start, data = b''):
+        now = time.time()
+        self.file.write(_record.pack(op, start - self.start_time, now - start, len(data)))
+        self.file.write(data)
+        self.file.flush()
+
+    def _call(self, op, name, *args):
+        func = getattr(self.interface, name, None)
+        if func is None:
+            raise NotImplementedError()
+        start = time.time()
+        try:
+            ret = func(*args)
+        except NotImplementedError:
+            raise
+        except Exception as e:
+            self._log(op, start, args[0] if op == b'W' else b'')
+            self._log(b'E', start, str(e).encode('utf-8'))
+            raise
+        if op == b'S' or (op == b'Q' and ret is not None):
+            self._log(op, start, struct.pack('<B', ret & 0xff))
+        elif op == b'B':
+            self._log(op, start, ret if isinstance(ret, bytes) else ret.tobytes())
+        elif op == b'R':
+            self._log(op, start, ret)
+        elif op == b'W':
+            self._log(op, start, args[0])
+        else:
+            self._log(op, start)
+        return ret
+
+    @property
+    def term_char(self):
+        return getattr(self.interface, 'term_char', None)
+
+    @term_char.setter
+    def term_char(self, val):
+        self.interface.term_char = val
+
+    def close(self):
+        "Close the recording and the wrapped interface"
+        if not self.file.closed:
+            self.file.close()
+        self.interface.close()
+
+    def write_raw(self, data):
+        "Write binary data to instrument"
+        self._call(b'W', 'write_raw', data)
+
+    def read_raw(self, num=-1):
+        "Read binary data from instrument"
+        return self._call(b'R', 'read_raw', num)
+
+    def ask_raw(self, data, num=-1):
+        "Write then read binary data"
+        self.write_raw(data)
+        return self.read_raw(num)
+
+    def write(self, message, encoding = 'utf-8'):
+        "Write string to instrument"
+        if type(message) is tuple or type(message) is list:
+            # recursive call for a list of commands
+            for message_i in message:
+                self.write(message_i, encoding)
+            return
+
+        self.write_raw(str(message).encode(encoding))
+
+    def read(self, num=-1, encoding = 'utf-8'):
+        "Read string from instrument"
+        return self.read_raw(num).decode(encoding).rstrip('\r\n')
+
+    def ask(self, message, num=-1, encoding = 'utf-8'):
+        "Write then read string"
+        if type(message) is tuple or type(message) is list:
+            # recursive call for a list of commands
+            val = list()
+            for message_i in message:
+                val.append(self.ask(message_i, num, encoding))
+            return val
+
+        self.write(message, encoding)
+        return self.read(num, encoding)
+
+    def _read_ieee_block(self, dtype=None):
+        "Read IEEE block"
+        return self._call(b'B', 'read_ieee_block', dtype)
+
+    def _wait_for_srq(self, timeout=None):
+        "Wait for a service request, returns the status byte or None on timeout"
+        return self._call(b'Q', 'wait_for_srq', timeout)
+
+    def read_stb(self):
+        "Read status byte"
+        return self._call(b'S', 'read_stb')
+
+    def trigger(self):
+        "Send trigger command"
+        self._call(b'T', 'trigger')
+
+    def clear(self):
+        "Send clear command"
+        self._call(b'C', 'clear')
+
+    def remote(self):
+        "Send remote command"
+        self._call(b'M', 'remote')
+
+    def local(self):
+        "Send local command"
+        self._call(b'L', 'local')
+
+class ReplayInstrument(object):
+    """Instrument interface that serves a recorded session
+
+    Writes are checked against the recording and reads return the recorded
+    responses, so a driver can be run offline exactly as it ran against the
+    instrument.  Calls that fail in the recording raise IOError.  With
+    real_time set, every call takes as long as it did when recorded.  The
+    recorded I/O time of the calls replayed so far is kept in io_time, for
+    comparison with the time spent in the driver.  Example:
+
+    scope = ivi.agilent.agilentMSOX4154A(record.ReplayInstrument("msox4154a.ivirec"))
+    """
+    def __init__(self, filename, strict = True, real_time = False):
+        self.filename = filename
+        self.strict = strict
+        self.real_time = real_time
+        self.records = read_records(filename)
+        self.position = 0
+        self.io_time = 0.0
+        self.term_char = None
+
+        # provide the optional methods the recorded interface had
+        ops = set(r[0] for r in self.records)
+        if b'B' in ops:
+            self.read_ieee_block = self._read_ieee_block
+        if b'Q' in ops:
+            self.wait_for_srq = self._wait_for_srq
+
+    def _next(self, op):
+        if self.position >= len(self.records):
+            raise IOError("End of recording")
+        rec = self.records[self.position]
+        if rec[0] != op:
+            if op in (b'S', b'T', b'C', b'M', b'L'):
+                # the recorded interface did not support this call either
+                raise NotImplementedError()
+            raise IOError("Replay mismatch at record %d: expected %s, got %s" %
+                    (self.position, rec[0].decode(), op.decode()))
+        self.position += 1
+        self.io_time += rec[2]
+        if self.real_time:
+            time.sleep(rec[2])
+        if self.position < len(self.records) and self.records[self.position][0] == b'E':
+            self.position += 1
+            raise IOError(self.records[self.position-1][3].decode('utf-8'))
+        return rec[3]
+
+    def close(self):
+        pass
+
+    def write_raw(self, data):
+        "Write binary data to instrument"
+        rec = self.records[self.position] if self.position < len(self.records) else None
+        if self.strict and rec is not None and rec[0] == b'W' and rec[3] != data:
+            raise IOError("Replay mismatch at record %d: expected %r, got %r" %
+                    (self.position, rec[3], data))
+        self._next(b'W')
+
+    def read_raw(self, num=-1):
+        "Read binary data from instrument"
+        return self._next(b'R')
+
+    def ask_raw(self, data, num=-1):
+        "Write then read binary data"
+        self.write_raw(data)
+        return self.read_raw(num)
+
+    def write(self, message, encoding = 'utf-8'):
+        "Write string to instrument"
+        if type(message) is tuple or type(message) is list:
+            # recursive call for a list of commands
+            for message_i in message:
+                self.write(message_i, encoding)
+            return
+
+        self.write_raw(str(message).encode(encoding))
+
+    def read(self, num=-1, encoding = 'utf-8'):
+        "Read string from instrument"
+        return self.read_raw(num).decode(encoding).rstrip('\r\n')
+
+    def ask(self, message, num=-1, encoding = 'utf-8'):
+        "Write then read string"
+        if type(message) is tuple or type(message) is list:
+            # recursive call for a list of commands
+            val = list()
+            for message_i in message:
+                val.append(self.ask(message_i, num, encoding))
+            return val
+
+        self.write(message, encoding)
+        return self.read(num, encoding)
+
+    def _read_ieee_block(self, dtype=None):
+        "Read IEEE block"
+        data = self._next(b'B')
+        if dtype is None:
+            return data
+        dtype = np.dtype(dtype)
+        return np.frombuffer(data, dtype, len(data) // dtype.itemsize)
+
+    def _wait_for_srq(self, timeout=None):
+        "Wait for a service request, returns the status byte or None on timeout"
+        data = self._next(b'Q')
+        if len(data) == 0:
+            return None
+        return struct.unpack('<B', data)[0]
+
+    def read_stb(self):
+        "Read status byte"
+        return struct.unpack('<B', self._next(b'S'))[0]
+
+    def trigger(self):
+        "Send trigger command"
+        self._next(b'T')
+
+    def clear(self):
+        "Send clear command"
+        self._next(b'C')
+
+    def remote(self):
+        "Send remote command"
+        self._next(b'M')
+
+    def local(self):
+        "Send local command"
+        self._next(b'L')
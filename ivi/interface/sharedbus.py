@@ -0,0 +1,351 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import contextlib
+import re
+import threading
+import time
+
+try:
+    from . import linuxgpib
+except ImportError:
+    pass
+
+def parse_visa_resource_string(resource_string):
+    # valid resource strings:
+    # GPIB::10::INSTR
+    # GPIB0::10::INSTR
+    m = re.match(r'^(?P<prefix>(?P<type>GPIB)\d*)(::(?P<arg1>\d+))(::(?P<suffix>INSTR))$',
+            resource_string, re.I)
+
+    if m is not None:
+        return dict(
+                type = m.group('type').upper(),
+                prefix = m.group('prefix'),
+                arg1 = m.group('arg1'),
+                suffix = m.group('suffix'),
+        )
+
+class SharedBus(object):
+    "Physical bus shared by several instrument sessions"
+    def __init__(self, name, open_device = None):
+        self.name = name
+        self.open_device = open_device
+        self.devices = dict()
+
+        self._cond = threading.Condition(threading.Lock())
+        self._next_ticket = 0
+        self._now_serving = 0
+        self._owner = None
+        self._depth = 0
+        self._acquire_time = 0
+        self._current_address = None
+
+        self.reset_statistics()
+
+    def reset_statistics(self):
+        "Clear utilization counters"
+        with self._cond:
+            self._stats_start = time.time()
+            self._busy_time = 0.0
+            self._wait_time = 0.0
+            self._max_wait_time = 0.0
+            self._transactions = 0
+            self._address_stats = dict()
+
+    def acquire(self, address = None):
+        "Wait for exclusive use of the bus, served in request order"
+        me = threading.current_thread()
+        with self._cond:
+            if self._owner is me:
+                self._depth += 1
+                return
+            start = time.time()
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while self._now_serving != ticket:
+                self._cond.wait()
+            self._owner = me
+            self._depth = 1
+            self._acquire_time = time.time()
+            wait = self._acquire_time - start
+            self._wait_time += wait
+            self._max_wait_time = max(self._max_wait_time, wait)
+            self._transactions += 1
+            self._current_address = address
+
+    def release(self):
+        "Release the bus to the next waiting session"
+        with self._cond:
+            if self._owner is not threading.current_thread():
+                raise RuntimeError("bus not held by this thread")
+            self._depth -= 1
+            if self._depth > 0:
+                return
+            busy = time.time() - self._acquire_time
+            self._busy_time += busy
+            s = self._address_stats.setdefault(self._current_address, [0, 0.0])
+            s[0] += 1
+            s[1] += busy
+            self._owner = None
+            self._now_serving += 1
+            self._cond.notify_all()
+
+    def get_device(self, address):
+        "Get the open device handle for an address, opening it on first use"
+        with self._cond:
+            dev = self.devices.get(address)
+        if dev is None:
+            if self.open_device is None:
+                raise IOError("No device factory for bus %s" % self.name)
+            self.acquire(address)
+            try:
+                dev = self.devices.get(address)
+                if dev is None:
+                    dev = self.open_device(address)
+                    self.devices[address] = dev
+            finally:
+                self.release()
+        return dev
+
+    def session(self, address):
+        "Create a new session for the instrument at address"
+        return BusSession(self, address)
+
+    def utilization(self):
+        "Fraction of time the bus has been held since statistics were reset"
+        with self._cond:
+            busy = self._busy_time
+            if self._owner is not None:
+                busy += time.time() - self._acquire_time
+            elapsed = time.time() - self._stats_start
+        if elapsed <= 0:
+            return 0.0
+        return busy / elapsed
+
+    def get_statistics(self):
+        "Return bus utilization statistics as a dict"
+        utilization = self.utilization()
+        with self._cond:
+            return dict(
+                    name = self.name,
+                    utilization = utilization,
+                    elapsed_time = time.time() - self._stats_start,
+                    busy_time = self._busy_time,
+                    transactions = self._transactions,
+                    wait_time = self._wait_time,
+                    max_wait_time = self._max_wait_time,
+                    waiting = self._next_ticket - self._now_serving - (0 if self._owner is None else 1),
+                    addresses = dict((k, dict(transactions = v[0], busy_time = v[1]))
+                            for k, v in self._address_stats.items()),
+            )
+
+    def close(self):
+        "Close all open device handles"
+        self.acquire()
+        try:
+            for dev in self.devices.values():
+                try:
+                    dev.close()
+                except:
+                    pass
+            self.devices = dict()
+        finally:
+            self.release()
+
+class BusSession(object):
+    "Instrument interface for one address on a shared bus"
+    def __init__(self, bus, address):
+        self.bus = bus
+        self.address = address
+
+    @property
+    def device(self):
+        return self.bus.get_device(self.address)
+
+    @property
+    def term_char(self):
+        return getattr(self.device, 'term_char', None)
+
+    @term_char.setter
+    def term_char(self, val):
+        dev = self.device
+        self.bus.acquire(self.address)
+        try:
+            dev.term_char = val
+        finally:
+            self.bus.release()
+
+    def _call(self, name, *args):
+        dev = self.device
+        self.bus.acquire(self.address)
+        try:
+            return getattr(dev, name)(*args)
+        finally:
+            self.bus.release()
+
+    def close(self):
+        "Close session, the device handle stays open for other sessions"
+        pass
+
+    def write_raw(self, data):
+        "Write binary data to instrument"
+        self._call('write_raw', data)
+
+    def read_raw(self, num=-1):
+        "Read binary data from instrument"
+        return self._call('read_raw', num)
+
+    def ask_raw(self, data, num=-1):
+        "Write then read binary data"
+        self.bus.acquire(self.address)
+        try:
+            self.write_raw(data)
+            return self.read_raw(num)
+        finally:
+            self.bus.release()
+
+    def write(self, message, encoding = 'utf-8'):
+        "Write string to instrument"
+        if type(message) is tuple or type(message) is list:
+            # recursive call for a list of commands
+            for message_i in message:
+                self.write(message_i, encoding)
+            return
+
+        self.write_raw(str(message).encode(encoding))
+
+    def read(self, num=-1, encoding = 'utf-8'):
+        "Read string from instrument"
+        return self.read_raw(num).decode(encoding).rstrip('\r\n')
+
+    def ask(self, message, num=-1, encoding = 'utf-8'):
+        "Write then read string"
+        if type(message) is tuple or type(message) is list:
+            # recursive call for a list of commands
+            val = list()
+            for message_i in message:
+                val.append(self.ask(message_i, num, encoding))
+            return val
+
+        self.bus.acquire(self.address)
+        try:
+            self.write(message, encoding)
+            return self.read(num, encoding)
+        finally:
+            self.bus.release()
+
+    def read_stb(self):
+        "Read status byte"
+        return self._call('read_stb')
+
+    def trigger(self):
+        "Send trigger command"
+        self._call('trigger')
+
+    def clear(self):
+        "Send clear command"
+        self._call('clear')
+
+    def remote(self):
+        "Send remote command"
+        self._call('remote')
+
+    def local(self):
+        "Send local command"
+        self._call('local')
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Hold the bus for a sequence of calls
+
+        Other sessions on the bus cannot interleave traffic between the calls
+        made in the with block, for example a query and the read of its
+        response.
+        """
+        self.bus.acquire(self.address)
+        try:
+            yield self
+        finally:
+            self.bus.release()
+
+    def lock(self):
+        "Hold the bus until unlock is called from the same thread"
+        self.bus.acquire(self.address)
+
+    def unlock(self):
+        "Release the bus held by lock"
+        self.bus.release()
+
+# registry of shared buses by name
+_buses = dict()
+_buses_lock = threading.Lock()
+
+def get_bus(name, open_device = None):
+    "Get the shared bus with the given name, creating it if necessary"
+    with _buses_lock:
+        bus = _buses.get(name)
+        if bus is None:
+            bus = SharedBus(name, open_device)
+            _buses[name] = bus
+        elif bus.open_device is None:
+            bus.open_device = open_device
+        return bus
+
+def remove_bus(name):
+    "Close the shared bus with the given name and remove it from the registry"
+    with _buses_lock:
+        bus = _buses.pop(name, None)
+    if bus is not None:
+        bus.close()
+
+def get_buses():
+    "Get a list of all shared buses"
+    with _buses_lock:
+        return list(_buses.values())
+
+def open_session(resource):
+    "Open a session on a shared bus from a VISA resource string"
+    res = parse_visa_resource_string(resource)
+
+    if res is None:
+        raise IOError("Invalid resource string")
+
+    board = res['prefix'][4:]
+    if len(board) > 0:
+        board = int(board)
+    else:
+        board = 0
+
+    address = int(res['arg1'])
+
+    if 'linuxgpib' not in globals():
+        raise IOError("No GPIB interface available for shared bus")
+
+    def open_device(address):
+        return linuxgpib.LinuxGpibInstrument('GPIB%d::%d::INSTR' % (board, address))
+
+    return get_bus('GPIB%d' % board, open_device).session(address)
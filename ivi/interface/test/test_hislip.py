@@ -0,0 +1,221 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2012-2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import socket
+import struct
+import threading
+import unittest
+
+from ... import ivi
+from .. import hislip
+
+class VirtualHislipServer(object):
+    "Minimal HiSLIP server stand-in serving one client session"
+    def __init__(self, max_message_size = 32, overlap = False):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(2)
+        self.port = self.sock.getsockname()[1]
+
+        self.max_message_size = max_message_size
+        self.client_max_message_size = None
+        self.overlap = overlap
+        self.status_byte = 0x10
+        self.sub_address = None
+        self.rx_messages = list()
+        self.cmd_log = list()
+        self.vals = {'*idn': 'VIRTUAL,HISLIP1000,0,1.0'}
+
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def send(self, sock, msg_type, control_code = 0, parameter = 0, payload = b''):
+        sock.sendall(hislip.pack_message(msg_type, control_code, parameter, payload))
+
+    def run(self):
+        try:
+            self.serve()
+        except (socket.error, hislip.HislipException):
+            pass
+
+    def serve(self):
+        sync_sock, addr = self.sock.accept()
+        msg_type, control_code, parameter, payload = hislip.recv_message(sync_sock)
+        self.sub_address = payload.decode()
+        self.send(sync_sock, hislip.MSG_INITIALIZE_RESPONSE, int(self.overlap),
+                (hislip.HISLIP_PROTOCOL_VERSION << 16) | 1)
+
+        async_sock, addr = self.sock.accept()
+        msg_type, control_code, parameter, payload = hislip.recv_message(async_sock)
+        self.send(async_sock, hislip.MSG_ASYNC_INITIALIZE_RESPONSE, 0, 0x5653)
+
+        t = threading.Thread(target=self.run_async, args=(async_sock,))
+        t.daemon = True
+        t.start()
+
+        self.run_sync(sync_sock)
+
+    def run_sync(self, sock):
+        message = b''
+        try:
+            while True:
+                msg_type, control_code, parameter, payload = hislip.recv_message(sock)
+                self.rx_messages.append((msg_type, control_code, parameter, payload))
+                if msg_type == hislip.MSG_DATA:
+                    message += payload
+                elif msg_type == hislip.MSG_DATA_END:
+                    message += payload
+                    self.handle_message(sock, message, parameter)
+                    message = b''
+                elif msg_type == hislip.MSG_DEVICE_CLEAR_COMPLETE:
+                    self.overlap = bool(control_code & hislip.FEATURE_OVERLAP)
+                    self.send(sock, hislip.MSG_DEVICE_CLEAR_ACKNOWLEDGE, int(self.overlap))
+        except (socket.error, hislip.HislipException):
+            pass
+
+    def handle_message(self, sock, message, message_id):
+        cmd = message.decode().strip().lower()
+        self.cmd_log.append(cmd)
+        if cmd.endswith('?'):
+            resp = (self.vals.get(cmd.rstrip('?'), '0') + '\n').encode()
+            chunk = self.client_max_message_size - 16
+            while len(resp) > chunk:
+                self.send(sock, hislip.MSG_DATA, 0, message_id, resp[:chunk])
+                resp = resp[chunk:]
+            self.send(sock, hislip.MSG_DATA_END, 0, message_id, resp)
+
+    def run_async(self, sock):
+        try:
+            while True:
+                msg_type, control_code, parameter, payload = hislip.recv_message(sock)
+                if msg_type == hislip.MSG_ASYNC_MAXIMUM_MESSAGE_SIZE:
+                    self.client_max_message_size = struct.unpack('>Q', payload)[0]
+                    self.send(sock, hislip.MSG_ASYNC_MAXIMUM_MESSAGE_SIZE_RESPONSE, 0, 0,
+                            struct.pack('>Q', self.max_message_size))
+                elif msg_type == hislip.MSG_ASYNC_STATUS_QUERY:
+                    self.send(sock, hislip.MSG_ASYNC_STATUS_RESPONSE, self.status_byte)
+                elif msg_type == hislip.MSG_ASYNC_DEVICE_CLEAR:
+                    self.send(sock, hislip.MSG_ASYNC_DEVICE_CLEAR_ACKNOWLEDGE, int(self.overlap))
+                elif msg_type == hislip.MSG_ASYNC_LOCK:
+                    self.send(sock, hislip.MSG_ASYNC_LOCK_RESPONSE, 1)
+                elif msg_type == hislip.MSG_ASYNC_REMOTE_LOCAL_CONTROL:
+                    self.send(sock, hislip.MSG_ASYNC_REMOTE_LOCAL_RESPONSE)
+                    # raise a service request to exercise the async path
+                    self.send(sock, hislip.MSG_ASYNC_SERVICE_REQUEST, 0x40)
+        except (socket.error, hislip.HislipException):
+            pass
+
+    def close(self):
+        self.sock.close()
+
+
+class TestHislip(unittest.TestCase):
+
+    def setUp(self):
+        self.server = VirtualHislipServer()
+        self.instr = hislip.HislipInstrument('TCPIP::127.0.0.1::hislip0,%d::INSTR' % self.server.port,
+                max_message_size = 64)
+        self.instr.timeout = 5
+
+    def tearDown(self):
+        self.instr.close()
+        self.server.close()
+
+    def test_parse_resource_string(self):
+        res = hislip.parse_visa_resource_string('TCPIP0::10.0.0.1::hislip1,4881::INSTR')
+        self.assertEqual(res['arg1'], '10.0.0.1')
+        self.assertEqual(res['arg2'], 'hislip1')
+        self.assertEqual(res['port'], '4881')
+        self.assertEqual(hislip.parse_visa_resource_string('TCPIP::10.0.0.1::inst0::INSTR'), None)
+
+    def test_open_negotiates_session(self):
+        self.instr.open()
+        self.assertEqual(self.server.sub_address, 'hislip0')
+        self.assertEqual(self.instr.session_id, 1)
+        self.assertEqual(self.instr.server_max_message_size, 32)
+        self.assertEqual(self.server.client_max_message_size, 64)
+        self.assertEqual(self.instr.overlap_mode, False)
+
+    def test_ask(self):
+        self.assertEqual(self.instr.ask('*IDN?'), 'VIRTUAL,HISLIP1000,0,1.0')
+        self.assertEqual(self.instr.ask('*IDN?'), 'VIRTUAL,HISLIP1000,0,1.0')
+        data_msgs = [m for m in self.server.rx_messages if m[0] == hislip.MSG_DATA_END]
+        self.assertEqual(data_msgs[0][2], hislip.HISLIP_INITIAL_MESSAGE_ID)
+        self.assertEqual(data_msgs[1][2], hislip.HISLIP_INITIAL_MESSAGE_ID + 2)
+        # RMT delivered flag set on the message following a complete response
+        self.assertEqual(data_msgs[0][1], 0)
+        self.assertEqual(data_msgs[1][1], 1)
+
+    def test_long_write_is_split(self):
+        cmd = ':system:display:text "%s"' % ('x' * 40)
+        self.instr.write(cmd)
+        self.instr.ask('*IDN?')
+        msgs = [m for m in self.server.rx_messages if m[0] in (hislip.MSG_DATA, hislip.MSG_DATA_END)]
+        self.assertTrue(len(msgs) > 2)
+        for m in msgs:
+            self.assertTrue(len(m[3]) <= 16)
+        self.assertEqual(self.server.cmd_log[0], cmd)
+
+    def test_partial_read(self):
+        self.instr.write('*IDN?')
+        self.assertEqual(self.instr.read_raw(7), b'VIRTUAL')
+        self.assertEqual(self.instr.read_raw(), b',HISLIP1000,0,1.0\n')
+
+    def test_read_stb(self):
+        self.assertEqual(self.instr.read_stb(), 0x10)
+
+    def test_clear_negotiates_overlap(self):
+        self.instr.overlap = True
+        self.instr.clear()
+        self.assertEqual(self.instr.overlap_mode, True)
+        self.assertEqual(self.instr.ask('*IDN?'), 'VIRTUAL,HISLIP1000,0,1.0')
+
+    def test_lock_and_srq(self):
+        self.instr.lock()
+        self.assertTrue(self.instr.locked)
+        self.instr.unlock()
+        self.assertFalse(self.instr.locked)
+        self.instr.remote()
+        self.assertEqual(self.instr.wait_for_srq(5), 0x40)
+
+    def test_srq_not_queued(self):
+        # requests nobody waits for do not pile up
+        self.instr.open()
+        for i in range(1000):
+            self.instr._handle_srq(0x40 | (i & 1))
+        self.assertEqual(self.instr.wait_for_srq(1), 0x41)
+        self.assertEqual(self.instr.wait_for_srq(0.05), None)
+
+    def test_driver_initialize(self):
+        drv = ivi.Driver('TCPIP::127.0.0.1::hislip0,%d::INSTR' % self.server.port)
+        self.assertTrue(isinstance(drv._interface, hislip.HislipInstrument))
+        self.assertEqual(drv._ask('*IDN?'), 'VIRTUAL,HISLIP1000,0,1.0')
+        drv.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2012-2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import types
+import unittest
+
+from ... import ivi
+from .. import multidrop
+from ...tdklambda import tdklambdaGenesysSerial
+
+class VirtualGenesysChain(object):
+    "Serial port with a chain of Genesys supplies attached"
+    def __init__(self, addresses):
+        self.term_char = '\n'
+        self.message_delay = 0
+        self.timeout = None
+        self.units = dict()
+        for a in addresses:
+            self.units[a] = {'pv': 0.0, 'pc': 0.0, 'out': 'OFF'}
+        self.addressed = None
+        self.response = b''
+        self.cmd_log = list()
+        self.closed = False
+
+    def update_settings(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def write_raw(self, data):
+        cmd = data.decode().strip()
+        self.cmd_log.append(cmd)
+        unit = self.units.get(self.addressed)
+        resp = 'OK'
+        if cmd.startswith('ADR '):
+            self.addressed = int(cmd[4:])
+        elif cmd == 'IDN?':
+            resp = 'LAMBDA,GEN60-12.5'
+        elif cmd == 'REV?':
+            resp = '1U5:4.1'
+        elif cmd == 'PV?':
+            resp = '%f' % unit['pv']
+        elif cmd.startswith('PV '):
+            unit['pv'] = float(cmd[3:])
+        elif cmd.startswith('PC '):
+            unit['pc'] = float(cmd[3:])
+        elif cmd == '*STB?':
+            resp = '%d' % self.addressed
+        self.response = (resp + '\r').encode()
+
+    def read_raw(self, num=-1):
+        return self.response
+
+    def write(self, message, encoding = 'utf-8'):
+        self.write_raw(str(message).encode(encoding))
+
+    def ask(self, message, num=-1, encoding = 'utf-8'):
+        self.write(message, encoding)
+        return self.read_raw(num).decode(encoding).rstrip('\r\n')
+
+
+class TestMultiDrop(unittest.TestCase):
+
+    def setUp(self):
+        self.port = VirtualGenesysChain([1, 2, 3])
+        self.bus = multidrop.MultiDropBus(self.port)
+
+    def test_redundant_address_skipped(self):
+        u1 = self.bus.unit(1)
+        u2 = self.bus.unit(2)
+        u1.ask('PV 1.0')
+        u1.ask('PV 2.0')
+        u2.ask('PV 3.0')
+        u2.ask('PV?')
+        self.assertEqual(self.port.cmd_log, ['ADR 1', 'PV 1.0', 'PV 2.0', 'ADR 2', 'PV 3.0', 'PV?'])
+        stats = self.bus.get_statistics()
+        self.assertEqual(stats['address_count'], 2)
+        self.assertEqual(stats['address_skip_count'], 2)
+        self.assertEqual(self.port.units[1]['pv'], 2.0)
+        self.assertEqual(self.port.units[2]['pv'], 3.0)
+
+    def test_flush_groups_by_unit(self):
+        self.bus.unit(2).ask('PV?')
+        for a in (1, 2, 3, 1, 2, 3):
+            self.bus.unit(a).enqueue('PC %d' % a)
+        responses = self.bus.flush()
+        self.assertEqual(responses[1], ['OK', 'OK'])
+        adr = [c for c in self.port.cmd_log if c.startswith('ADR')]
+        # unit 2 is already addressed, so it is served first
+        self.assertEqual(adr, ['ADR 2', 'ADR 1', 'ADR 3'])
+
+    def test_failed_transfer_forces_readdress(self):
+        u1 = self.bus.unit(1)
+        u1.ask('PV?')
+        def fail(data):
+            raise IOError()
+        write_raw = self.port.write_raw
+        self.port.write_raw = fail
+        self.assertRaises(IOError, u1.ask, 'PV?')
+        self.port.write_raw = write_raw
+        u1.ask('PV?')
+        self.assertEqual(self.port.cmd_log[-2:], ['ADR 1', 'PV?'])
+
+    def test_genesys_drivers_share_port(self):
+        psu1 = tdklambdaGenesysSerial(self.bus.unit(1))
+        psu2 = tdklambdaGenesysSerial(self.bus.unit(2))
+        self.assertEqual(self.port.term_char, '\r')
+        self.assertEqual(psu1.identity.instrument_model, 'GEN60-12.5')
+        psu1.outputs[0].voltage_level = 10.0
+        psu2.outputs[0].voltage_level = 20.0
+        self.assertEqual(self.port.units[1]['pv'], 10.0)
+        self.assertEqual(self.port.units[2]['pv'], 20.0)
+        self.assertEqual(self.port.units[3]['pv'], 0.0)
+
+    def test_status_byte(self):
+        psu = tdklambdaGenesysSerial(self.bus.unit(2))
+        # the port has no serial poll, the driver falls back to *STB?
+        self.assertEqual(psu._read_stb(), 2)
+        self.port.read_stb = lambda: self.port.addressed * 16
+        self.assertEqual(self.bus.unit(3).read_stb(), 48)
+        self.assertEqual(psu._read_stb(), 32)
+        self.assertEqual([c for c in self.port.cmd_log if c.startswith('ADR')][-2:], ['ADR 3', 'ADR 2'])
+    def test_own_port(self):
+        # a port the driver opened itself is closed with the driver
+        pyserial = types.ModuleType('pyserial')
+        pyserial.SerialInstrument = VirtualGenesysChain
+        ivi.pyserial = pyserial
+        try:
+            port = VirtualGenesysChain([6])
+            psu = tdklambdaGenesysSerial(port)
+            self.assertEqual(psu.identity.instrument_model, 'GEN60-12.5')
+            psu.close()
+            self.assertTrue(port.closed)
+        finally:
+            del ivi.pyserial
+        psu = tdklambdaGenesysSerial(self.bus.unit(1))
+        psu.close()
+        self.assertFalse(self.port.closed)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2012-2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import time
+import unittest
+
+from ... import ivi
+from .. import pool
+
+class VirtualInterface(object):
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+
+    def write_raw(self, data):
+        pass
+
+    def read_raw(self, num=-1):
+        return b''
+
+    def read_stb(self):
+        if not self.healthy:
+            raise IOError()
+        return 0
+
+    def close(self):
+        self.closed = True
+
+class PooledDriver(ivi.Driver):
+    opened = list()
+
+    def _open_interface(self, resource):
+        intf = VirtualInterface()
+        self.opened.append(intf)
+        return intf
+
+
+class TestSessionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = pool.SessionPool(idle_timeout = 60)
+        self.opened = list()
+
+    def tearDown(self):
+        self.pool.close_all()
+
+    def open_interface(self):
+        intf = VirtualInterface()
+        self.opened.append(intf)
+        return intf
+
+    def test_normalize_resource_string(self):
+        n = pool.normalize_resource_string
+        self.assertEqual(n('TCPIP::10.0.0.1::INSTR'), n('tcpip0::10.0.0.1::inst0::INSTR'))
+        self.assertEqual(n('USB::4883::32842::INSTR'), n('USB0::0x1313::0x804a::INSTR'))
+        self.assertEqual(n('GPIB::10::INSTR'), 'GPIB0::10::INSTR')
+        self.assertNotEqual(n('GPIB::10::INSTR'), n('GPIB1::10::INSTR'))
+
+    def test_reuse(self):
+        a = self.pool.checkout('TCPIP::10.0.0.1::INSTR', self.open_interface)
+        self.pool.checkin(a)
+        b = self.pool.checkout('TCPIP0::10.0.0.1::inst0::INSTR', self.open_interface)
+        self.assertTrue(a is b)
+        c = self.pool.checkout('TCPIP0::10.0.0.1::inst0::INSTR', self.open_interface)
+        self.assertFalse(c is b)
+        stats = self.pool.get_statistics()
+        self.assertEqual(stats['hit_count'], 1)
+        self.assertEqual(stats['miss_count'], 2)
+
+    def test_health_check(self):
+        a = self.pool.checkout('GPIB0::10::INSTR', self.open_interface)
+        self.pool.checkin(a)
+        a.healthy = False
+        b = self.pool.checkout('GPIB0::10::INSTR', self.open_interface)
+        self.assertFalse(a is b)
+        self.assertTrue(a.closed)
+
+    def test_idle_timeout(self):
+        a = self.pool.checkout('GPIB0::10::INSTR', self.open_interface)
+        self.pool.checkin(a)
+        self.pool.purge(0)
+        self.assertTrue(a.closed)
+        self.assertEqual(self.pool.get_statistics()['idle'], 0)
+
+    def test_idle_reaper(self):
+        p = pool.SessionPool(idle_timeout = 0.05)
+        a = p.checkout('GPIB0::10::INSTR', self.open_interface)
+        b = p.checkout('GPIB0::10::INSTR', self.open_interface)
+        p.checkin(a)
+        time.sleep(0.02)
+        p.checkin(b)
+        # no further pool activity
+        deadline = time.time() + 5
+        while not b.closed and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(a.closed)
+        self.assertTrue(b.closed)
+        self.assertEqual(p.get_statistics()['idle'], 0)
+        self.assertTrue(p.reaper is None)
+
+    def test_driver_reuses_link(self):
+        ivi.session_pool.close_all()
+        del PooledDriver.opened[:]
+        d1 = PooledDriver('GPIB0::12::INSTR', session_pool = True)
+        d1.close()
+        self.assertFalse(PooledDriver.opened[0].closed)
+        d2 = PooledDriver('GPIB::12::INSTR', session_pool = True)
+        self.assertTrue(d2._interface is PooledDriver.opened[0])
+        self.assertEqual(len(PooledDriver.opened), 1)
+        d2.close()
+        d3 = PooledDriver('GPIB::12::INSTR')
+        self.assertEqual(len(PooledDriver.opened), 2)
+        d3.close()
+        self.assertTrue(PooledDriver.opened[1].closed)
+        ivi.session_pool.close_all()
+        self.assertTrue(PooledDriver.opened[0].closed)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2012-2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import importlib
+import sys
+import types
+import unittest
+
+import numpy as np
+
+from ... import ivi
+
+VI_SUCCESS = 0
+VI_SUCCESS_TERM_CHAR = 0x3FFF0005
+VI_SUCCESS_MAX_CNT = 0x3FFF0006
+
+class VirtualVisaLibrary(object):
+    def read(self, session, count):
+        res = session
+        data = res.output[:count]
+        res.output = res.output[count:]
+        if res.read_termination and data.endswith(res.read_termination.encode()):
+            return data, VI_SUCCESS_TERM_CHAR
+        return data, VI_SUCCESS if len(res.output) == 0 else VI_SUCCESS_MAX_CNT
+
+class VirtualResource(object):
+    "PyVISA message based resource serving canned responses"
+    def __init__(self, name):
+        self.name = name
+        self.session = self
+        self.visalib = VirtualVisaLibrary()
+        self.timeout = 2000
+        self.read_termination = None
+        self.write_termination = '\r\n'
+        self.chunk_size = 20*1024
+        self.written = list()
+        self.output = b''
+        self.stb = 0
+        self.calls = list()
+        self.closed = False
+
+    def write_raw(self, message):
+        self.written.append(message)
+
+    def read_raw(self, size=None):
+        count = len(self.output)
+        if self.read_termination:
+            ind = self.output.find(self.read_termination.encode())
+            if ind >= 0:
+                count = ind + len(self.read_termination)
+        data = self.output[:count]
+        self.output = self.output[count:]
+        return data
+
+    def read_bytes(self, count, chunk_size=None, break_on_termchar=False):
+        if break_on_termchar and self.read_termination:
+            ind = self.output.find(self.read_termination.encode())
+            if 0 <= ind < count:
+                count = ind + len(self.read_termination)
+        data = self.output[:count]
+        self.output = self.output[count:]
+        return data
+
+    def read_stb(self):
+        return self.stb
+
+    def assert_trigger(self):
+        self.calls.append('trigger')
+
+    def clear(self):
+        self.calls.append('clear')
+
+    def control_ren(self, mode):
+        self.calls.append(('ren', mode))
+
+    def close(self):
+        self.closed = True
+
+class VirtualResourceManager(object):
+    def __init__(self):
+        self.resources = list()
+
+    def open_resource(self, resource_name, **kwargs):
+        res = VirtualResource(resource_name)
+        self.resources.append(res)
+        return res
+
+def make_visa():
+    "PyVISA module stand in"
+    visa = types.ModuleType('pyvisa')
+    visa.ResourceManager = VirtualResourceManager
+    visa.constants = types.ModuleType('pyvisa.constants')
+    visa.constants.VI_SUCCESS = VI_SUCCESS
+    visa.constants.VI_SUCCESS_MAX_CNT = VI_SUCCESS_MAX_CNT
+    visa.constants.VI_GPIB_REN_ASSERT_ADDRESS = 1
+    visa.constants.VI_GPIB_REN_ADDRESS_GTL = 6
+    return visa
+
+class TestPyVisaInstrument(unittest.TestCase):
+
+    def setUp(self):
+        self.modules = dict((k, sys.modules.get(k)) for k in ('pyvisa', 'ivi.interface.pyvisa'))
+        sys.modules['pyvisa'] = make_visa()
+        sys.modules.pop('ivi.interface.pyvisa', None)
+        self.pyvisa = importlib.import_module('..pyvisa', __package__)
+        self.instr = self.pyvisa.PyVisaInstrument('GPIB0::7::INSTR')
+        self.res = self.instr.instrument
+
+    def tearDown(self):
+        for k, v in self.modules.items():
+            if v is None:
+                sys.modules.pop(k, None)
+            else:
+                sys.modules[k] = v
+        if self.modules['ivi.interface.pyvisa'] is None:
+            delattr(sys.modules['ivi.interface'], 'pyvisa')
+
+    def test_open(self):
+        rm = self.pyvisa.get_resource_manager()
+        self.assertIs(rm, self.pyvisa.get_resource_manager())
+        self.assertEqual(rm.resources, [self.res])
+        self.assertEqual(self.res.name, 'GPIB0::7::INSTR')
+        self.assertEqual(self.instr.timeout, 2.0)
+        self.instr.timeout = 0.5
+        self.assertEqual(self.res.timeout, 500)
+        self.instr.close()
+        self.assertTrue(self.res.closed)
+
+    def test_read_write(self):
+        self.instr.write(':chan1:scal 1')
+        self.instr.write([':chan2:disp 1', ':chan3:disp 0'])
+        # no termination added to the message
+        self.assertEqual(self.res.written, [b':chan1:scal 1', b':chan2:disp 1', b':chan3:disp 0'])
+        self.res.output = b'ACME,SCOPE1,0,1.0\n'
+        self.assertEqual(self.instr.ask('*IDN?'), 'ACME,SCOPE1,0,1.0')
+        self.res.output = b'abcdef'
+        self.assertEqual(self.instr.read_raw(4), b'abcd')
+        self.assertEqual(self.instr.read_raw(), b'ef')
+
+    def test_termination(self):
+        self.instr.term_char = '\n'
+        self.assertEqual(self.instr.term_char, '\n')
+        self.assertEqual(self.res.read_termination, '\n')
+        self.res.output = b'1\n2\n'
+        self.assertEqual(self.instr.read(10), '1')
+        self.assertEqual(self.instr.read(10), '2')
+        self.instr.write('*RST')
+        self.assertEqual(self.res.written, [b'*RST'])
+
+    def test_stb_clear(self):
+        self.res.stb = 0x60
+        self.assertEqual(self.instr.read_stb(), 0x60)
+        self.instr.clear()
+        self.instr.trigger()
+        self.instr.remote()
+        self.instr.local()
+        self.assertEqual(self.res.calls, ['clear', 'trigger', ('ren', 1), ('ren', 6)])
+
+    def test_read_ieee_block(self):
+        data = bytes(bytearray(range(256))) * 100
+        self.instr.chunk_size = 1000
+        self.res.output = b'#525600' + data + b'\n'
+        self.assertEqual(self.instr.read_ieee_block(), data)
+        self.assertEqual(self.res.output, b'')
+        self.res.output = b'#525600' + data
+        arr = self.instr.read_ieee_block('>u2')
+        self.assertTrue(np.array_equal(arr, np.frombuffer(data, '>u2')))
+        self.res.output = b'#0' + data[:10]
+        self.assertEqual(self.instr.read_ieee_block(), data[:10])
+
+    def test_read_ieee_block_terminator(self):
+        # the last data byte is the termination character, and the read of
+        # the block ends with VI_SUCCESS_TERM_CHAR
+        self.instr.term_char = '\n'
+        self.res.output = b'#14abc\n\n1\n#14defg\n#14hij\n\n2\n'
+        self.assertEqual(self.instr.read_ieee_block(), b'abc\n')
+        self.assertEqual(self.instr.read(), '1')
+        self.assertEqual(self.instr.read_ieee_block(), b'defg')
+        self.assertEqual(self.instr.read_ieee_block(), b'hij\n')
+        self.assertEqual(self.instr.read(), '2')
+        self.assertEqual(self.res.output, b'')
+        # END with the data and no termination character
+        self.instr.term_char = None
+        self.res.output = b'#14abcd'
+        self.assertEqual(self.instr.read_ieee_block(), b'abcd')
+
+    def test_driver(self):
+        drv = ivi.Driver(self.instr)
+        self.res.output = b'#14abcd\n'
+        drv._write(':wav:data?')
+        self.assertEqual(drv._read_ieee_block(), b'abcd')
+        self.res.output = b'#14abcd\n'
+        self.assertEqual(list(drv._read_ieee_block('u1')), [97, 98, 99, 100])
+        drv._set_termination_character('\n')
+        self.assertEqual(drv._get_termination_character(), '\n')
+
+if __name__ == '__main__':
+    unittest.main()
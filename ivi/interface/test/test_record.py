@@ -0,0 +1,136 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from ... import ivi
+from ...test import virtual
+from .. import record
+
+class VirtualBlockInstrument(virtual.VirtualInstrument):
+    "Virtual instrument with its own block reader and service requests"
+    def read_ieee_block(self, dtype=None):
+        data = ivi.decode_ieee_block(self.read_raw())
+        if dtype is None:
+            return data
+        return np.frombuffer(data, dtype)
+
+    def wait_for_srq(self, timeout=None):
+        return ivi.STB_ESB | ivi.STB_RQS
+
+class TestRecord(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, 'session.ivirec')
+        self.instr = virtual.VirtualInstrument('ACME,DMM1,0,1.0')
+        self.instr.add_command(':FETCh', float, 1.5, settable=False)
+        self.instr.add_command(':TRACe:DATA', 'block', bytes(bytearray(range(256))) * 64)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def record(self):
+        drv = ivi.Driver(record.RecordingInstrument(self.instr, self.filename))
+        self.assertEqual(drv._ask('*IDN?'), 'ACME,DMM1,0,1.0')
+        drv._wait_for_operation_complete(':initiate', 1.0)
+        self.assertEqual(drv._ask(':fetch?'), '+1.500000E+00')
+        drv._write(':trace:data?')
+        data = drv._read_ieee_block()
+        self.assertRaises(ivi.IOTimeoutException, drv._read)
+        drv._clear()
+        drv.close()
+        return data
+
+    def test_record(self):
+        data = self.record()
+        records = record.read_records(self.filename)
+        self.assertEqual([r[0] for r in records[:3]], [b'W', b'R', b'W'])
+        self.assertEqual(records[0][3], b'*IDN?')
+        self.assertEqual(records[1][3], b'ACME,DMM1,0,1.0\n')
+        self.assertTrue(b'S' in [r[0] for r in records])
+        self.assertEqual([r[0] for r in records[-3:]], [b'R', b'E', b'C'])
+        self.assertTrue(all(r[2] >= 0 for r in records))
+
+        drv = ivi.Driver(record.ReplayInstrument(self.filename))
+        self.assertEqual(drv._ask('*IDN?'), 'ACME,DMM1,0,1.0')
+        drv._wait_for_operation_complete(':initiate', 1.0)
+        self.assertEqual(drv._ask(':fetch?'), '+1.500000E+00')
+        drv._write(':trace:data?')
+        self.assertEqual(drv._read_ieee_block(), data)
+        self.assertRaises(IOError, drv._read)
+        drv._clear()
+        self.assertRaises(IOError, drv._write, '*RST')
+
+    def test_mismatch(self):
+        self.record()
+        drv = ivi.Driver(record.ReplayInstrument(self.filename))
+        self.assertRaises(IOError, drv._ask, '*OPT?')
+
+        replay = record.ReplayInstrument(self.filename, strict=False)
+        drv = ivi.Driver(replay)
+        self.assertEqual(drv._ask('*OPT?'), 'ACME,DMM1,0,1.0')
+        self.assertTrue(replay.io_time > 0)
+
+    def test_not_implemented(self):
+        # the virtual instrument has no trigger, the driver falls back to *TRG
+        drv = ivi.Driver(record.RecordingInstrument(self.instr, self.filename))
+        drv._trigger()
+        drv.close()
+        self.assertEqual([r[3] for r in record.read_records(self.filename)], [b'*TRG'])
+        drv = ivi.Driver(record.ReplayInstrument(self.filename))
+        drv._trigger()
+
+    def test_flush(self):
+        instr = record.RecordingInstrument(self.instr, self.filename)
+        drv = ivi.Driver(instr)
+        drv._ask('*IDN?')
+        # readable before the recording is closed
+        self.assertEqual(len(record.read_records(self.filename)), 2)
+        self.assertFalse(hasattr(instr, 'read_ieee_block'))
+        self.assertFalse(hasattr(instr, 'wait_for_srq'))
+        drv.close()
+
+    def test_optional_methods(self):
+        instr = VirtualBlockInstrument('ACME,SCOPE1,0,1.0')
+        instr.add_command(':WAVeform:DATA', 'block', bytes(bytearray(range(256))))
+        drv = ivi.Driver(record.RecordingInstrument(instr, self.filename))
+        self.assertEqual(drv._interface.wait_for_srq(1.0), ivi.STB_ESB | ivi.STB_RQS)
+        data = drv._ask_for_ieee_block(':waveform:data?', '>u2')
+        drv.close()
+        self.assertEqual([r[0] for r in record.read_records(self.filename)], [b'Q', b'W', b'B'])
+
+        drv = ivi.Driver(record.ReplayInstrument(self.filename))
+        self.assertEqual(drv._interface.wait_for_srq(1.0), ivi.STB_ESB | ivi.STB_RQS)
+        self.assertTrue(np.array_equal(drv._ask_for_ieee_block(':waveform:data?', '>u2'), data))
+
+if __name__ == '__main__':
+    unittest.main()
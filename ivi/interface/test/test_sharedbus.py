@@ -0,0 +1,170 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2012-2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import threading
+import time
+import unittest
+
+from ... import ivi
+from .. import sharedbus
+
+class VirtualBusWire(object):
+    "Records traffic on a bus shared by several virtual devices"
+    def __init__(self):
+        self.last_write = None
+        self.log = list()
+
+class VirtualDevice(object):
+    def __init__(self, wire, address):
+        self.wire = wire
+        self.address = address
+        self.term_char = None
+        self.closed = False
+
+    def write_raw(self, data):
+        self.wire.last_write = (self.address, data)
+        self.wire.log.append((self.address, data))
+        # give other threads a chance to interleave
+        time.sleep(0.0005)
+
+    def read_raw(self, num=-1):
+        address, data = self.wire.last_write
+        return ('%d:' % address).encode() + data + b'\n'
+
+    def close(self):
+        self.closed = True
+
+
+class TestSharedBus(unittest.TestCase):
+
+    def setUp(self):
+        self.wire = VirtualBusWire()
+        self.opened = list()
+        def open_device(address):
+            self.opened.append(address)
+            return VirtualDevice(self.wire, address)
+        self.bus = sharedbus.SharedBus('GPIB9', open_device)
+
+    def tearDown(self):
+        sharedbus.remove_bus('test-bus')
+
+    def test_device_handle_reused(self):
+        s1 = self.bus.session(5)
+        s2 = self.bus.session(5)
+        s3 = self.bus.session(6)
+        s1.write('a')
+        s2.write('b')
+        s3.write('c')
+        self.assertEqual(self.opened, [5, 6])
+        self.assertTrue(s1.device is s2.device)
+
+    def test_concurrent_ask(self):
+        errors = list()
+        def worker(address):
+            s = self.bus.session(address)
+            for i in range(20):
+                cmd = 'cmd%d' % i
+                if s.ask(cmd) != '%d:%s' % (address, cmd):
+                    errors.append((address, i))
+        threads = [threading.Thread(target=worker, args=(a,)) for a in range(1, 5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        stats = self.bus.get_statistics()
+        self.assertEqual(stats['transactions'], 80)
+        self.assertEqual(sorted(stats['addresses'].keys()), [1, 2, 3, 4])
+        self.assertTrue(0.0 < stats['utilization'] <= 1.0)
+
+    def test_fair_order(self):
+        order = list()
+        self.bus.acquire()
+        threads = list()
+        for a in range(5):
+            def worker(a=a):
+                self.bus.acquire(a)
+                order.append(a)
+                self.bus.release()
+            t = threading.Thread(target=worker)
+            t.start()
+            threads.append(t)
+            # wait until the thread is queued before starting the next one
+            while self.bus.get_statistics()['waiting'] < a + 1:
+                time.sleep(0.001)
+        self.bus.release()
+        for t in threads:
+            t.join()
+        self.assertEqual(order, [0, 1, 2, 3, 4])
+
+    def test_lock_holds_bus(self):
+        s = self.bus.session(3)
+        s.lock()
+        s.write('a')
+        s.write('b')
+        self.assertEqual(self.bus.get_statistics()['transactions'], 1)
+        s.unlock()
+
+    def test_driver_with_session(self):
+        drv = ivi.Driver(self.bus.session(7))
+        drv._set_termination_character('\r')
+        self.assertEqual(self.bus.devices[7].term_char, '\r')
+        self.assertEqual(drv._ask('*IDN?'), '7:*IDN?')
+        drv.close()
+        self.assertFalse(self.bus.devices[7].closed)
+        self.bus.close()
+        self.assertEqual(self.bus.devices, {})
+
+    def test_transaction(self):
+        errors = list()
+        def driver():
+            drv = ivi.Driver(self.bus.session(7))
+            for i in range(20):
+                # query and block read are one transaction
+                if drv._ask_for_ieee_block('#15q%03d?' % i) != ('q%03d?' % i).encode():
+                    errors.append(i)
+        def worker(address):
+            s = self.bus.session(address)
+            for i in range(20):
+                s.ask('#15a%03d?' % i)
+        threads = [threading.Thread(target=driver)]
+        threads += [threading.Thread(target=worker, args=(a,)) for a in range(1, 4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.bus.get_statistics()['addresses'][7]['transactions'], 20)
+
+    def test_get_bus(self):
+        bus = sharedbus.get_bus('test-bus')
+        self.assertTrue(sharedbus.get_bus('test-bus') is bus)
+        self.assertTrue(bus in sharedbus.get_buses())
+        sharedbus.remove_bus('test-bus')
+        self.assertFalse(bus in sharedbus.get_buses())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -25,9 +25,23 @@ THE SOFTWARE.
 """
 
 # import libraries
-import inspect
+import bisect
+import collections
+import contextlib
+import copy
+import fnmatch
+import hashlib
+import importlib
+import io
+import json
+import logging
 import numpy as np
+import os
 import re
+import sys
+import threading
+import time
+import types
 from functools import partial
 
 # try importing drivers
@@ -50,6 +64,12 @@ try:
 except ImportError:
     pass
 
+# HiSLIP client for LAN instruments
+try:
+    from .interface import hislip
+except ImportError:
+    pass
+
 # pySerial wrapper for serial instrument support
 try:
     from .interface import pyserial
@@ -74,11 +94,176 @@ def set_prefer_pyvisa(value=True):
     global _prefer_pyvisa
     _prefer_pyvisa = bool(value)
 
+# pool of open interfaces shared by driver instances
+from .interface import pool
+session_pool = pool.SessionPool()
+
+# set to True to keep interfaces open in the session pool
+# when drivers are closed and reuse them for new drivers
+_use_session_pool = False
+
+def get_use_session_pool():
+    global _use_session_pool
+    return _use_session_pool
+
+def set_use_session_pool(value=True):
+    global _use_session_pool
+    _use_session_pool = bool(value)
+
+# set to True to keep instrument identity and configuration in the cache
+# directory and restore it on initialize after a single identity query
+_use_identity_cache = False
+
+def get_use_identity_cache():
+    global _use_identity_cache
+    return _use_identity_cache
+
+def set_use_identity_cache(value=True):
+    global _use_identity_cache
+    _use_identity_cache = bool(value)
+
+# simulated I/O is reported on this logger at debug level
+log = logging.getLogger('ivi')
+
+# upper bounds in seconds of the latency histogram buckets in
+# driver_operation.io_statistics, the last bucket counts everything slower
+io_histogram_bounds = (1e-4, 2e-4, 5e-4, 1e-3, 2e-3, 5e-3, 1e-2, 2e-2, 5e-2,
+        0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0)
+
+# attribute cache policies, see driver_operation.set_cache_policy
+CACHE_NEVER = 'never'
+CACHE_ALWAYS = 'always'
+
+_cache_index_re = re.compile(r'_\d+$')
+
+# commands that do not change the instrument setup, see system.load_setup
+_setup_neutral_commands = ('*cls', '*ese', '*sre', '*opc', '*wai')
+
+_cache_dir = None
+def get_cache_dir():
+    "Directory for files python-ivi keeps between sessions"
+    if _cache_dir is not None:
+        return _cache_dir
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+    else:
+        base = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, 'python-ivi')
+def set_cache_dir(value):
+    global _cache_dir
+    _cache_dir = value
+
+def _get_identity_cache_file():
+    return os.path.join(get_cache_dir(), 'identity_cache.json')
+
+def _read_identity_cache():
+    try:
+        with io.open(_get_identity_cache_file(), encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return dict()
+
+def _json_value(value):
+    if hasattr(value, 'tolist'):
+        # NumPy arrays and scalars
+        return value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_json_value(v) for v in value]
+    if isinstance(value, dict):
+        return dict((k, _json_value(v)) for k, v in value.items())
+    return value
+
+def _identity_cache_value(value):
+    "Convert a value to plain JSON types, returns None if it cannot be stored"
+    value = _json_value(value)
+    try:
+        json.dumps(value)
+    except (TypeError, ValueError):
+        return None
+    return value
+
+def _write_identity_cache(cache):
+    filename = _get_identity_cache_file()
+    try:
+        # serialize first so a bad value does not truncate the file
+        data = json.dumps(cache, sort_keys=True)
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        with io.open(filename, 'wb') as f:
+            f.write(data.encode('utf-8'))
+    except (IOError, OSError, TypeError, ValueError):
+        pass
+
 # version information
 from .version import __version__
 version = __version__
 
+# registry of driver class names and the modules that define them,
+# filled in by the vendor packages
+driver_registry = dict()
+
+class _DriverPackage(types.ModuleType):
+    "Vendor package module that binds driver classes in place of their modules"
+    def __setattr__(self, name, value):
+        # the import system binds each imported submodule on its package,
+        # bind the driver class defined in it instead
+        if (isinstance(value, types.ModuleType) and
+                driver_registry.get(name) == self.__name__ + '.' + name):
+            value = getattr(value, name, value)
+        types.ModuleType.__setattr__(self, name, value)
+
+def register_drivers(package, names):
+    """Register the driver classes of a vendor package for loading on first access
+    
+    Returns __getattr__ and __dir__ functions for the package module.  Each
+    driver module is imported the first time its class is accessed.  Python
+    versions without module __getattr__ support import everything right away.
+    """
+    module = sys.modules[package]
+    names = list(names)
+    
+    for name in names:
+        driver_registry[name] = package + '.' + name
+    
+    # driver modules imported directly, as in import ivi.agilent.agilentMSOX3104A,
+    # also leave the driver class on the package; module classes can only be
+    # changed from Python 3.5, earlier versions bind the class when the
+    # modules are imported below
+    if sys.version_info >= (3, 5):
+        module.__class__ = _DriverPackage
+    
+    def __getattr__(name):
+        if name not in driver_registry or driver_registry[name] != package + '.' + name:
+            raise AttributeError("module %r has no attribute %r" % (package, name))
+        cls = getattr(importlib.import_module(package + '.' + name), name)
+        setattr(module, name, cls)
+        return cls
+    
+    def __dir__():
+        return sorted(set(module.__dict__.keys()) | set(names))
+    
+    if sys.version_info < (3, 7):
+        for name in names:
+            __getattr__(name)
+    
+    return __getattr__, __dir__
+
+def get_driver_class(name):
+    "Get a driver class by name, importing only the module that defines it"
+    try:
+        path = driver_registry[name]
+    except KeyError:
+        raise IviException("Unknown driver %s" % name)
+    package = path.rsplit('.', 1)[0]
+    return getattr(importlib.import_module(package), name)
+
 # Exceptions
+# IEEE 488.2 status byte and standard event status register bits
+STB_MAV = 1 << 4
+STB_ESB = 1 << 5
+STB_RQS = 1 << 6
+ESR_OPC = 1 << 0
+
 class IviException(Exception): pass
 class IviDriverException(IviException): pass
 class FileFormatException(IviDriverException): pass
@@ -109,22 +294,126 @@ class UnknownPhysicalNameException(IviDriverException): pass
 class ValueNotSupportedException(IviDriverException): pass
 
 
+_selector_alias_re = re.compile(r'^([a-z_]+?)(\d+)$')
+
+def get_selector_aliases(name):
+    """Case-insensitive aliases of a repeated capability name
+
+    The lower case name, plus abbreviations of the word before a trailing
+    number, so channel1 can also be selected as CH1, Chan1, etc.
+    """
+    if not isinstance(name, str):
+        return []
+    n = name.lower()
+    aliases = [n]
+    m = _selector_alias_re.match(n)
+    if m:
+        prefix, num = m.groups()
+        for k in range(1, len(prefix)):
+            aliases.append(prefix[:k] + num)
+    return aliases
+
+
+def _add_selector_aliases(d, l):
+    "Add unambiguous aliases for the names in l to d"
+    # lower case names take precedence over abbreviations
+    ambiguous = set()
+    for full in (True, False):
+        aliases = dict()
+        for i in range(len(l)):
+            for a in get_selector_aliases(l[i])[:1] if full else get_selector_aliases(l[i])[1:]:
+                if aliases.setdefault(a, i) != i:
+                    ambiguous.add(a)
+        for a in aliases:
+            if a not in ambiguous and a not in d:
+                d[a] = aliases[a]
+    return d
+
+
+class SelectorList(list):
+    """List of repeated capability names
+
+    Keeps the name and alias map used by get_index, built on the first
+    lookup and dropped whenever the list is modified.
+    """
+    def __init__(self, *args):
+        list.__init__(self, *args)
+        self._selector_map = None
+
+    def _get_selector_map(self):
+        "Get (names, aliases) dicts, None if the names are not hashable"
+        m = self._selector_map
+        if m is None:
+            names = dict()
+            try:
+                for i in range(len(self)):
+                    names.setdefault(self[i], i)
+            except TypeError:
+                m = False
+            else:
+                m = (names, _add_selector_aliases(dict(), self))
+            self._selector_map = m
+        return m or None
+
+def _selector_list_mutator(name):
+    f = getattr(list, name)
+    def mutator(self, *args, **kwargs):
+        self._selector_map = None
+        return f(self, *args, **kwargs)
+    mutator.__name__ = name
+    return mutator
+
+# Python 2 lists have no clear but change slices with __setslice__ and
+# __delslice__
+for _name in ('__setitem__', '__delitem__', '__setslice__', '__delslice__',
+        '__iadd__', '__imul__', 'append', 'extend', 'insert', 'pop', 'remove',
+        'clear', 'sort', 'reverse'):
+    if hasattr(list, _name):
+        setattr(SelectorList, _name, _selector_list_mutator(_name))
+del _name
+
+
 def get_index(l, i):
-    """Validate index from list or dict of possible values"""
+    """Validate index from list or dict of possible values
+
+    Names can also be given as their case-insensitive aliases (see
+    get_selector_aliases).  A SelectorList keeps a map of its names, so
+    lookups take constant time; other lists are searched.
+    """
     if type(l) is dict:
         try:
             return l[i]
         except KeyError:
+            if isinstance(i, str) and i.lower() in l:
+                return l[i.lower()]
             if type(i) is int:
                 raise SelectorRangeException()
             raise SelectorNameException()
+        except TypeError:
+            raise SelectorNameException()
 
-    if i in l:
+    m = None
+    if isinstance(l, SelectorList):
+        m = l._get_selector_map()
+    if m is not None:
+        try:
+            k = m[0].get(i)
+        except TypeError:
+            raise SelectorNameException()
+        if k is not None:
+            return k
+    elif i in l:
         return l.index(i)
+    
     if type(i) == int:
         if i < 0 or i >= len(l):
             raise SelectorRangeException()
         return i
+    if isinstance(i, str):
+        aliases = m[1] if m is not None else _add_selector_aliases(dict(), l)
+        k = aliases.get(i.lower())
+        if k is not None:
+            return k
     raise SelectorNameException()
 
 
@@ -132,98 +421,146 @@ def get_index_dict(l):
     """Construct a dict object for faster index lookups"""
     d = {}
     for i in range(len(l)):
-        d[l[i]] = i
+        d.setdefault(l[i], i)
         d[i] = i
-    return d
+    return _add_selector_aliases(d, l)
+
+
+class ManagedProperty(object):
+    "Descriptor forwarding to the get, set and delete functions of a managed property"
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            f = obj._props[self.name][0]
+        except (KeyError, AttributeError):
+            # not managed on this instance
+            try:
+                return obj.__dict__[self.name]
+            except KeyError:
+                raise AttributeError(self.name)
+        if f is None:
+            raise AttributeError("unreadable attribute")
+        return f()
+
+    def __set__(self, obj, value):
+        try:
+            f = obj._props[self.name][1]
+        except (KeyError, AttributeError):
+            obj.__dict__[self.name] = value
+            return
+        if f is None:
+            raise AttributeError("can't set attribute")
+        f(value)
+
+    def __delete__(self, obj):
+        try:
+            f = obj._props[self.name][2]
+        except (KeyError, AttributeError):
+            try:
+                del obj.__dict__[self.name]
+            except KeyError:
+                raise AttributeError(self.name)
+            return
+        if f is None:
+            raise AttributeError("can't delete attribute")
+        f()
+
+
+def _add_managed_property(cls, name):
+    "Install a ManagedProperty descriptor on a class"
+    if type(cls.__dict__.get(name)) is ManagedProperty:
+        return
+    if cls is PropertyCollection:
+        raise AttributeError("cannot add managed properties to the PropertyCollection base class")
+    setattr(cls, name, ManagedProperty(name))
+
+
+def property_collection_class(name='PropertyCollection'):
+    "Create a PropertyCollection subclass to hold the descriptors of one tree node"
+    return type(str(name), (PropertyCollection,), {})
 
 
 class PropertyCollection(object):
-    "A building block to create hierarchical trees of methods and properties"
+    """A building block to create hierarchical trees of methods and properties
+
+    Managed properties are ManagedProperty descriptors on the class, so every
+    tree node should be an instance of its own subclass (see
+    property_collection_class) shared by all nodes at the same position in
+    the tree.  A plain PropertyCollection moves to a subclass of its own when
+    its first property is added.  Other attribute access runs at normal
+    Python speed.
+    """
     def __init__(self):
-        d = object.__getattribute__(self, '__dict__')
+        d = self.__dict__
         d.setdefault('_props', dict())
         d.setdefault('_docs', dict())
         d.setdefault('_locked', False)
     
     def _add_property(self, name, fget=None, fset=None, fdel=None, doc=None):
         "Add a managed property"
-        d = object.__getattribute__(self, '__dict__')
-        d['_props'][name] = (fget, fset, fdel)
-        d['_docs'][name] = doc
+        d = self.__dict__
+        d.setdefault('_props', dict())[name] = (fget, fset, fdel)
+        d.setdefault('_docs', dict())[name] = doc
         d[name] = None
+        cls = type(self)
+        if cls is PropertyCollection:
+            # descriptors on the base class would reach every collection,
+            # give this one a class of its own
+            cls = property_collection_class()
+            object.__setattr__(self, '__class__', cls)
+        _add_managed_property(cls, name)
     
     def _add_method(self, name, f=None, doc=None):
         "Add a managed method"
-        d = object.__getattribute__(self, '__dict__')
-        d['_docs'][name] = doc
+        d = self.__dict__
+        d.setdefault('_docs', dict())[name] = doc
         d[name] = f
     
     def _del_property(self, name):
         "Remove managed property or method"
-        d = object.__getattribute__(self, '__dict__')
-        del d['_props'][name]
+        d = self.__dict__
+        d['_props'].pop(name, None)
         del d['_docs'][name]
         del d[name]
     
     def _lock(self, lock=True):
         "Set lock state to prevent creation or deletion of unmanaged members"
-        d = object.__getattribute__(self, '__dict__')
-        d['_locked'] = lock
+        self.__dict__['_locked'] = lock
     
     def _unlock(self):
         "Unlock object to allow creation or deletion of unmanaged members, equivalent to _lock(False)"
         self._lock(False)
         
-    def __getattribute__(self, name):
-        if name == '__dict__':
-            return object.__getattribute__(self, name)
-        d = object.__getattribute__(self, '__dict__')
-        d.setdefault('_props', dict())
-        d.setdefault('_locked', False)
-        if name in d['_props']:
-            f = d['_props'][name][0]
-            if f is None:
-                raise AttributeError("unreadable attribute")
-            return f()
-        return object.__getattribute__(self, name)
-        
     def __setattr__(self, name, value):
-        d = object.__getattribute__(self, '__dict__')
-        d.setdefault('_props', dict())
-        d.setdefault('_locked', False)
-        if name in d['_props']:
-            f = d['_props'][name][1]
-            if f is None:
-                raise AttributeError("can't set attribute")
-            f(value)
-            return
-        if name not in d and self._locked:
+        d = self.__dict__
+        if name not in d and d.get('_locked', False):
             raise AttributeError("locked")
         object.__setattr__(self, name, value)
         
     def __delattr__(self, name):
-        d = object.__getattribute__(self, '__dict__')
-        d.setdefault('_props', dict())
-        d.setdefault('_locked', False)
-        if name in d['_props']:
-            f = d['_props'][name][2]
-            if f is None:
-                raise AttributeError("can't delete attribute")
-            f()
-            return
-        if name not in d and self._locked:
+        d = self.__dict__
+        if name not in d and d.get('_locked', False):
             raise AttributeError("locked")
         object.__delattr__(self, name)
         
 
 class IndexedPropertyCollection(object):
     "A building block to create hierarchical trees of methods and properties with an index that is converted to a parameter"
-    def __init__(self):
+    def __init__(self, node_classes=None):
         self._props = dict()
         self._docs = dict()
         self._indicies = list()
         self._indicies_dict = dict()
         self._objs = list()
+        if node_classes is None:
+            node_classes = dict()
+        self._node_classes = node_classes
     
     def _add_property(self, name, fget=None, fset=None, fdel=None, doc=None, props = None, docs = None):
         "Add a managed property"
@@ -287,9 +624,18 @@ class IndexedPropertyCollection(object):
             del self._props[name]
             del self._docs[name]
     
-    def _build_obj(self, props, docs, i):
+    def _get_node_class(self, path):
+        "Get the PropertyCollection subclass for a node of the entry trees"
+        try:
+            return self._node_classes[path]
+        except KeyError:
+            cls = property_collection_class(path[-1] if path else 'IndexedPropertyCollectionEntry')
+            self._node_classes[path] = cls
+            return cls
+    
+    def _build_obj(self, props, docs, i, path=()):
         "Build a tree of PropertyCollection objects with the proper index associations"
-        obj = PropertyCollection()
+        obj = self._get_node_class(path)()
         for n in props:
             itm = props[n]
             doc = docs[n]
@@ -301,7 +647,7 @@ class IndexedPropertyCollection(object):
                 if fdel is not None: fdeli = partial(fdel, i)
                 obj._add_property(n, fgeti, fseti, fdeli, doc)
             elif type(itm) == dict:
-                o2 = self._build_obj(itm, doc, i)
+                o2 = self._build_obj(itm, doc, i, path+(n,))
                 obj.__dict__[n] = o2
             elif hasattr(itm, "__call__"):
                 obj._add_method(n, partial(itm, i), doc)
@@ -312,16 +658,27 @@ class IndexedPropertyCollection(object):
         "Set a list of allowable indicies as an associative array"
         self._indicies = list(l)
         self._indicies_dict = get_index_dict(self._indicies)
-        self._objs = list()
-        for i in range(len(self._indicies)):
-            self._objs.append(self._build_obj(self._props, self._docs, i))
+        # entries are built on first access
+        self._objs = [None] * len(self._indicies)
+    
+    def _get_obj(self, i):
+        "Get the entry for index i, building it if needed"
+        obj = self._objs[i]
+        if obj is None:
+            obj = self._build_obj(self._props, self._docs, i)
+            self._objs[i] = obj
+        return obj
     
     def __getitem__(self, key):
         i = get_index(self._indicies_dict, key)
-        return self._objs[i]
+        obj = self._objs[i]
+        if obj is None:
+            return self._get_obj(i)
+        return obj
 
     def __iter__(self):
-        return self._objs.__iter__()
+        for i in range(len(self._objs)):
+            yield self._get_obj(i)
     
     def __len__(self):
         return len(self._indicies)
@@ -330,15 +687,49 @@ class IndexedPropertyCollection(object):
         return len(self._indicies)
 
 
-class IviContainer(PropertyCollection):
-    def __init__(self, *args, **kwargs):
-        super(IviContainer, self).__init__(*args, **kwargs)
+class AttributeSchema(object):
+    """Parsed attribute names of a driver class
 
-    def _add_attribute(self, name, attr, doc = None):
-        cur_obj = self
+    Caches the collection path of every attribute added by instances of one
+    class, along with the first Doc object seen for it, and the node classes
+    of the attribute tree.  Every instance still runs its __init__, adding
+    each attribute and constructing each Doc; later instances only skip
+    parsing the dotted names and trimming the docstrings, and share the Doc
+    objects.
+    """
+    def __init__(self):
+        self._entries = dict()
+        self._node_classes = dict()
+
+    def get_node_class(self, path):
+        "Get the PropertyCollection subclass for the node at path"
+        try:
+            return self._node_classes[path]
+        except KeyError:
+            cls = property_collection_class(path[-1])
+            self._node_classes[path] = cls
+            return cls
+
+    def get_node_classes(self, path):
+        "Get the node class cache for the entries of the indexed collection at path"
+        return self._node_classes.setdefault(path + ('[]',), dict())
+
+    def get(self, name, doc):
+        "Get (path, base, doc) for an attribute, parsing the name on first use"
+        key = _doc_key(doc)
+        entry = self._entries.get(name)
+        if entry is None or entry[0] != key:
+            entry = (key,) + self._compile(name, doc)
+            self._entries[name] = entry
+        return entry[1:]
+
+    def _compile(self, name, doc):
+        path = list()
+        key = ()
 
         # iterate over name
         rest = name
+        base = ''
         while len(rest) > 0:
             # split at first dot
             l = rest.split('.',1)
@@ -353,20 +744,59 @@ class IviContainer(PropertyCollection):
                 k = base.find('[')
                 if k > 0:
                     # if so, stop here and add an indexed property collection
-                    base = base[:k]
-                    cur_obj.__dict__.setdefault(base, IndexedPropertyCollection())
-                    cur_obj = cur_obj.__dict__[base]
+                    key = key + (base[:k],)
+                    path.append((base[:k], True, key))
                     base = rest
                     rest = ''
                 else:
                     # if not, add a property collection and keep going
-                    cur_obj.__dict__.setdefault(base, PropertyCollection())
-                    cur_obj = cur_obj.__dict__[base]
+                    key = key + (base,)
+                    path.append((base, False, key))
 
         if type(doc) == Doc:
             doc.name = name
 
-        if cur_obj == self:
+        return tuple(path), base, doc
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _doc_key(doc):
+    if type(doc) == Doc:
+        return (doc._raw_doc, doc.cls, doc.grp, doc.section)
+    return doc
+
+
+def get_schema(cls):
+    "Get the attribute schema of a class, see AttributeSchema"
+    try:
+        return cls.__dict__['_attribute_schema']
+    except KeyError:
+        schema = AttributeSchema()
+        setattr(cls, '_attribute_schema', schema)
+        return schema
+
+
+class IviContainer(PropertyCollection):
+    def __init__(self, *args, **kwargs):
+        super(IviContainer, self).__init__(*args, **kwargs)
+
+    def _add_attribute(self, name, attr, doc = None):
+        schema = get_schema(type(self))
+        path, base, doc = schema.get(name, doc)
+
+        cur_obj = self
+        for n, indexed, key in path:
+            d = cur_obj.__dict__
+            if n not in d:
+                if indexed:
+                    d[n] = IndexedPropertyCollection(schema.get_node_classes(key))
+                else:
+                    d[n] = schema.get_node_class(key)()
+            cur_obj = d[n]
+
+        if cur_obj is self:
             if type(attr) == tuple:
                 fget, fset, fdel = attr
                 PropertyCollection._add_property(self, base, fget, fset, fdel, doc)
@@ -389,12 +819,25 @@ class IviContainer(PropertyCollection):
 class Doc(object):
     "IVI documentation object"
     def __init__(self, doc = '', cls = '', grp = '', section = '', name = ''):
-        self.doc = trim_doc(doc)
+        self._raw_doc = doc
+        self._doc = None
         self.name = name
         self.cls = cls
         self.grp = grp
         self.section = section
     
+    @property
+    def doc(self):
+        "Documentation text, trimmed on first use"
+        if self._doc is None:
+            self._doc = trim_doc(self._raw_doc)
+        return self._doc
+    
+    @doc.setter
+    def doc(self, value):
+        self._raw_doc = value
+        self._doc = None
+    
     def render(self):
         txt = '.. attribute:: ' + self.name + '\n\n'
         if self.cls != '':
@@ -598,7 +1041,7 @@ def doc(obj=None, itm=None, docs=None, prefix=None):
             
             # add brackets for indexed property collections
             extra = ''
-            if type(o) == IndexedPropertyCollection:
+            if isinstance(o, IndexedPropertyCollection):
                 extra = '[]'
             
             if n == '_docs':
@@ -703,6 +1146,21 @@ class DriverOperation(IviContainer):
         
         self._driver_operation_interchange_warnings = list()
         self._driver_operation_coercion_records = list()
+        self._driver_operation_wait_statistics = dict()
+        self._driver_operation_record_io_statistics = False
+        self._driver_operation_io_statistics = dict()
+        self._driver_operation_io_statistics_hook = None
+        self._driver_operation_record_cache_statistics = False
+        self._driver_operation_cache_statistics = dict()
+        self._driver_operation_cache_policies = dict()
+        self._driver_operation_cache_invalidations = dict()
+        self._cache_policy_map = dict()
+        # true when I/O calls are measured
+        self._io_measure = False
+        # per thread measurement state: the call being measured and the
+        # header that reads are attributed to
+        self._io_state = threading.local()
+        self._io_statistics_lock = threading.Lock()
         
         self._add_property('driver_operation.cache',
                         self._get_driver_operation_cache,
@@ -1004,6 +1462,132 @@ class DriverOperation(IviContainer):
                         Refer to the Interchange Check attribute for more information on
                         interchangeability checking.
                         """)
+        self._add_property('driver_operation.wait_statistics',
+                        self._get_driver_operation_wait_statistics,
+                        None,
+                        None,
+                        """
+                        Statistics of the waits the driver performed while polling the instrument
+                        for status or operation completion, as a dict keyed by the name of the
+                        wait.  Each entry is a dict with the number of waits (count), the number
+                        of waits that exceeded their maximum time (timeouts), the number of
+                        status reads (polls), and the total, maximum and last wait durations in
+                        seconds (total_time, max_time, last_time).
+                        """)
+        self._add_method('driver_operation.reset_wait_statistics',
+                        self._driver_operation_reset_wait_statistics,
+                        """
+                        Clears the wait statistics.
+                        """)
+        self._add_property('driver_operation.record_io_statistics',
+                        self._get_driver_operation_record_io_statistics,
+                        self._set_driver_operation_record_io_statistics,
+                        None,
+                        """
+                        If True, the driver measures every write, read and query it sends to the
+                        instrument and keeps the results in the I/O Statistics attribute.
+                        
+                        The default value is False.
+                        """)
+        self._add_property('driver_operation.io_statistics',
+                        self._get_driver_operation_io_statistics,
+                        None,
+                        None,
+                        """
+                        Statistics of the I/O the driver performed while Record I/O Statistics
+                        was enabled, as a dict keyed by the lower case header of the first
+                        command in each message.  Reads are counted under the command that was
+                        written before them.  Each entry is a dict with the number of writes,
+                        reads and queries (writes, reads, asks), the number of bytes
+                        transferred (bytes_written, bytes_read), the total and maximum
+                        latency in seconds (total_time, max_time) and a latency histogram
+                        (histogram) with one count per bucket of ivi.io_histogram_bounds and a
+                        last bucket for longer calls.
+                        """)
+        self._add_property('driver_operation.io_statistics_hook',
+                        self._get_driver_operation_io_statistics_hook,
+                        self._set_driver_operation_io_statistics_hook,
+                        None,
+                        """
+                        Function called for every I/O operation recorded in the I/O statistics,
+                        as hook(prefix, operation, elapsed, bytes_written, bytes_read), where
+                        operation is 'write', 'read' or 'ask'.  Can be used to export the
+                        statistics to a metrics system.  None to disable.
+                        """)
+        self._add_method('driver_operation.reset_io_statistics',
+                        self._driver_operation_reset_io_statistics,
+                        """
+                        Clears the I/O statistics.
+                        """)
+        self._add_property('driver_operation.record_cache_statistics',
+                        self._get_driver_operation_record_cache_statistics,
+                        self._set_driver_operation_record_cache_statistics,
+                        None,
+                        """
+                        If True, the driver counts the use of the attribute cache and the I/O
+                        performed by each attribute in the Cache Statistics attribute.
+                        
+                        The default value is False.
+                        """)
+        self._add_property('driver_operation.cache_statistics',
+                        self._get_driver_operation_cache_statistics,
+                        None,
+                        None,
+                        """
+                        Statistics of the attribute cache collected while Record Cache
+                        Statistics was enabled, as a dict keyed by the cache tag of the
+                        attribute, with the channel index appended for repeated capabilities.
+                        Each entry is a dict with the number of reads served from the cache
+                        (hits), reads that had to query the instrument (misses), the number of
+                        times the cached value was marked valid (validations) and invalidated
+                        (invalidations), and the number of I/O operations performed by the
+                        attribute getter and setter (round_trips).
+                        
+                        An attribute with misses but no validations is never cached, usually
+                        because its getter does not call _set_cache_valid.
+                        """)
+        self._add_method('driver_operation.reset_cache_statistics',
+                        self._driver_operation_reset_cache_statistics,
+                        """
+                        Clears the cache statistics.
+                        """)
+        self._add_method('driver_operation.get_cache_report',
+                        self._driver_operation_get_cache_report,
+                        """
+                        Returns the cache statistics as a text table, attributes with the most
+                        round trips first.
+                        """)
+        self._add_method('driver_operation.set_cache_policy',
+                        self._driver_operation_set_cache_policy,
+                        """
+                        Sets how long the cached value of an attribute stays valid.  The
+                        attribute is given by its cache tag, the name of the getter without the
+                        _get_ prefix, for example 'channel_offset', or by a pattern such as
+                        'channel_*'.  The policy is one of:
+                        
+                        * 'never': the attribute is always read from the instrument
+                        * 'always': the cached value is used until it is invalidated (default)
+                        * a number: the cached value is used for that many seconds
+                        
+                        Use 'never' or a short time for settings that can change on the
+                        instrument without the driver knowing, such as front panel controls.
+                        Drivers declare their default policies in the _cache_policies class
+                        attribute.
+                        """)
+        self._add_method('driver_operation.get_cache_policy',
+                        self._driver_operation_get_cache_policy,
+                        """
+                        Returns the cache policy of an attribute, see Set Cache Policy.
+                        """)
+        self._add_method('driver_operation.set_cache_invalidation',
+                        self._driver_operation_set_cache_invalidation,
+                        """
+                        Sets the attributes that an operation invalidates, as a list of cache
+                        tags or patterns, for example
+                        set_cache_invalidation('measurement.auto_setup', ['channel_*']).
+                        '*' invalidates all attributes.  Drivers declare their defaults in the
+                        _cache_invalidations class attribute.
+                        """)
     
     
     def _get_driver_operation_cache(self):
@@ -1072,6 +1656,216 @@ class DriverOperation(IviContainer):
 
     def _driver_operation_reset_interchange_check(self):
         pass
+    
+    def _get_driver_operation_wait_statistics(self):
+        return dict((k, dict(v)) for k, v in self._driver_operation_wait_statistics.items())
+    
+    def _driver_operation_reset_wait_statistics(self):
+        self._driver_operation_wait_statistics = dict()
+    
+    def _record_wait(self, name, elapsed, polls, timed_out = False):
+        "Add a wait to the wait statistics"
+        st = self._driver_operation_wait_statistics.get(name)
+        if st is None:
+            st = dict(count=0, timeouts=0, polls=0, total_time=0.0, max_time=0.0, last_time=0.0)
+            self._driver_operation_wait_statistics[name] = st
+        st['count'] += 1
+        st['polls'] += polls
+        st['total_time'] += elapsed
+        st['max_time'] = max(st['max_time'], elapsed)
+        st['last_time'] = elapsed
+        if timed_out:
+            st['timeouts'] += 1
+    
+    def _get_driver_operation_record_io_statistics(self):
+        return self._driver_operation_record_io_statistics
+    
+    def _set_driver_operation_record_io_statistics(self, value):
+        self._driver_operation_record_io_statistics = bool(value)
+        self._update_io_measure()
+    
+    def _update_io_measure(self):
+        self._io_measure = (self._driver_operation_record_io_statistics or
+                self._driver_operation_record_cache_statistics)
+    
+    def _get_driver_operation_io_statistics(self):
+        stats = dict()
+        for k, v in self._driver_operation_io_statistics.items():
+            stats[k] = dict(v)
+            stats[k]['histogram'] = list(v['histogram'])
+        return stats
+    
+    def _get_driver_operation_io_statistics_hook(self):
+        return self._driver_operation_io_statistics_hook
+    
+    def _set_driver_operation_io_statistics_hook(self, value):
+        self._driver_operation_io_statistics_hook = value
+    
+    def _driver_operation_reset_io_statistics(self):
+        self._driver_operation_io_statistics = dict()
+    
+    def _get_io_prefix(self, data):
+        "Lower case header of the first command in a message"
+        if type(data) is tuple or type(data) is list:
+            data = data[0] if len(data) > 0 else ''
+        data = data[:64]
+        if isinstance(data, bytes):
+            data = data.decode('latin-1')
+        header = data.split(';', 1)[0].split(None, 1)
+        return header[0].lower() if header else ''
+    
+    def _io_measured(self):
+        "True if an I/O call made now should be measured"
+        return self._io_measure and not getattr(self._io_state, 'active', False)
+    
+    def _measure_io(self, operation, data, func, *args):
+        "Call an I/O method and add it to the I/O statistics"
+        state = self._io_state
+        if data is not None:
+            state.prefix = self._get_io_prefix(data)
+        prefix = getattr(state, 'prefix', '')
+        # nested I/O calls in this thread are part of this one
+        state.active = True
+        start = time.time()
+        try:
+            ret = func(*args)
+        finally:
+            state.active = False
+        elapsed = time.time() - start
+        
+        if self._driver_operation_record_cache_statistics:
+            tag = self._get_io_cache_tag()
+            if tag is not None:
+                self._count_cache(tag, 'round_trips')
+        
+        if not self._driver_operation_record_io_statistics:
+            return ret
+        
+        def length(d):
+            if d is None:
+                return 0
+            if type(d) is tuple or type(d) is list:
+                return sum(length(i) for i in d)
+            if isinstance(d, str):
+                return len(d.encode('utf-8'))
+            if isinstance(d, np.ndarray):
+                return d.nbytes
+            return len(d)
+        
+        self._record_io(prefix, operation, elapsed, length(data),
+                0 if operation == 'write' else length(ret))
+        return ret
+    
+    def _record_io(self, prefix, operation, elapsed, bytes_written, bytes_read):
+        "Add an I/O operation to the I/O statistics"
+        with self._io_statistics_lock:
+            st = self._driver_operation_io_statistics.get(prefix)
+            if st is None:
+                st = dict(writes=0, reads=0, asks=0, bytes_written=0, bytes_read=0,
+                        total_time=0.0, max_time=0.0, histogram=[0]*(len(io_histogram_bounds)+1))
+                self._driver_operation_io_statistics[prefix] = st
+            st[operation + 's'] += 1
+            st['bytes_written'] += bytes_written
+            st['bytes_read'] += bytes_read
+            st['total_time'] += elapsed
+            st['max_time'] = max(st['max_time'], elapsed)
+            st['histogram'][bisect.bisect_left(io_histogram_bounds, elapsed)] += 1
+        if self._driver_operation_io_statistics_hook is not None:
+            self._driver_operation_io_statistics_hook(prefix, operation, elapsed, bytes_written, bytes_read)
+    
+    def _get_driver_operation_record_cache_statistics(self):
+        return self._driver_operation_record_cache_statistics
+    
+    def _set_driver_operation_record_cache_statistics(self, value):
+        self._driver_operation_record_cache_statistics = bool(value)
+        self._update_io_measure()
+    
+    def _get_driver_operation_cache_statistics(self):
+        return dict((k, dict(v)) for k, v in self._driver_operation_cache_statistics.items())
+    
+    def _driver_operation_reset_cache_statistics(self):
+        self._driver_operation_cache_statistics = dict()
+    
+    def _driver_operation_get_cache_report(self):
+        stats = self._driver_operation_cache_statistics
+        tags = sorted(stats, key=lambda k: (-stats[k]['round_trips'], k))
+        width = max([len(k) for k in tags] + [9])
+        lines = ['%-*s %8s %8s %8s %8s %8s' % (width, 'attribute', 'hits', 'misses',
+                'valid', 'invalid', 'trips')]
+        for k in tags:
+            st = stats[k]
+            lines.append('%-*s %8d %8d %8d %8d %8d' % (width, k, st['hits'], st['misses'],
+                    st['validations'], st['invalidations'], st['round_trips']))
+        return '\n'.join(lines)
+    
+    def _driver_operation_set_cache_policy(self, attribute, policy):
+        if policy not in (CACHE_NEVER, CACHE_ALWAYS):
+            try:
+                policy = float(policy)
+            except (TypeError, ValueError):
+                raise InvalidOptionValueException()
+        self._driver_operation_cache_policies[attribute] = policy
+        self._cache_policy_map = dict()
+    
+    def _driver_operation_get_cache_policy(self, attribute):
+        return self._get_cache_policy(attribute)
+    
+    def _driver_operation_set_cache_invalidation(self, operation, attributes):
+        self._driver_operation_cache_invalidations[operation] = list(attributes)
+    
+    def _get_class_setting(self, name):
+        "Merge a dict class attribute over the class hierarchy, subclasses take precedence"
+        d = dict()
+        for cls in reversed(type(self).__mro__):
+            d.update(cls.__dict__.get(name, {}))
+        return d
+    
+    def _get_cache_policy(self, tag):
+        "Cache policy of an attribute tag"
+        try:
+            return self._cache_policy_map[tag]
+        except KeyError:
+            pass
+        policies = self._get_class_setting('_cache_policies')
+        policies.update(self._driver_operation_cache_policies)
+        base = _cache_index_re.sub('', tag)
+        policy = CACHE_ALWAYS
+        if tag in policies:
+            policy = policies[tag]
+        elif base in policies:
+            policy = policies[base]
+        else:
+            # most specific pattern first
+            for pattern in sorted(policies, key=len, reverse=True):
+                if fnmatch.fnmatchcase(tag, pattern) or fnmatch.fnmatchcase(base, pattern):
+                    policy = policies[pattern]
+                    break
+        self._cache_policy_map[tag] = policy
+        return policy
+    
+    def _count_cache(self, tag, name):
+        "Count a cache event for an attribute tag"
+        st = self._driver_operation_cache_statistics.get(tag)
+        if st is None:
+            st = dict(hits=0, misses=0, validations=0, invalidations=0, round_trips=0)
+            self._driver_operation_cache_statistics[tag] = st
+        st[name] += 1
+    
+    def _get_io_cache_tag(self):
+        "Cache tag of the attribute getter or setter that is performing I/O"
+        f = sys._getframe(2)
+        for i in range(20):
+            if f is None:
+                break
+            name = f.f_code.co_name
+            if name[0:5] in ('_get_', '_set_') and f.f_locals.get('self') is self:
+                tag = self._get_cache_tag(name)
+                index = f.f_locals.get('index')
+                if isinstance(index, int) and index >= 0:
+                    tag = tag + '_%d' % index
+                return tag
+            f = f.f_back
+        return None
 
 
 class DriverIdentity(IviContainer):
@@ -1481,21 +2275,67 @@ class DriverUtility(IviContainer):
         pass
 
 
+_error_re = re.compile(r'\s*([+-]?\d+)\s*,\s*"((?:[^"]|"")*)"')
+_wait_command_re = re.compile(r'\*(opc|wai)\b', re.I)
+
 class Driver(DriverOperation, DriverIdentity, DriverUtility):
     "Inherent IVI methods for all instruments"
+    
+    # SCPI style error queue query, None if not supported
+    _error_query_command = None
+    # lowercase headers of sequential commands as the driver sends them, the
+    # error query is not appended to writes that contain them as it would
+    # only be answered once the operation completes
+    _sequential_commands = ()
+    
+    # attribute cache policies by cache tag or pattern, see
+    # driver_operation.set_cache_policy
+    _cache_policies = {}
+    # attributes each operation invalidates, see _cache_operation
+    _cache_invalidations = {'system.load_setup': ['*']}
+    # attributes invalidated when an attribute is set, for example
+    # {'measurement_function': ['range', 'resolution']}; for repeated
+    # capabilities only the entries with the same index are invalidated
+    _cache_dependencies = {}
+    
+    # attributes kept in the identity cache as {cache tag: member}, see the
+    # identity_cache option
+    _identity_cache_attributes = {
+        'identity_instrument_manufacturer': '_identity_instrument_manufacturer',
+        'identity_instrument_model': '_identity_instrument_model',
+        'identity_instrument_serial_number': '_identity_instrument_serial_number',
+        'identity_instrument_firmware_revision': '_identity_instrument_firmware_revision'}
+    # query that identifies the instrument, the one the driver sends for its
+    # identity; the identity cache entry for a resource is only used when the
+    # response matches, and the cache is not used by drivers without one
+    _identity_cache_query = None
+    # number of setups cached attributes are kept for, see _setup_loaded
+    _setup_snapshot_count = 8
 
     def __init__(self, resource = None, id_query = False, reset = False, *args, **kwargs):
         # process out args for initialize
         kw = {}
         for k in ('range_check', 'query_instr_status', 'cache', 'simulate', 'record_coercions',
-                'interchange_check', 'driver_setup', 'prefer_pyvisa'):
+                'interchange_check', 'driver_setup', 'prefer_pyvisa', 'session_pool',
+                'record_io_statistics', 'identity_cache'):
             if k in kwargs:
                 kw[k] = kwargs.pop(k)
         
         self._interface = None
+        self._interface_pooled = False
+        self._identity_cache_id = None
+        self._identity_cache_pending = None
+        self._identity_cache_response = None
         self._initialized = False
         self.__dict__.setdefault('_instrument_id', '')
         self._cache_valid = dict()
+        self._cache_expiry = dict()
+        self._cache_dependency_map = None
+        self._setup_hash = None
+        self._setup_snapshots = collections.OrderedDict()
+        self._use_srq = True
+        self._poll_interval = 0.001
+        self._poll_interval_max = 0.1
         
         super(Driver, self).__init__(*args, **kwargs)
         
@@ -1575,6 +2415,8 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
                             'TCPIP0::10.0.0.1::gpib,5::INSTR'
                             'TCPIP0::10.0.0.1::usb0::INSTR'
                             'TCPIP0::10.0.0.1::usb0[1234::5678::MYSERIAL::0]::INSTR'
+                            'TCPIP::10.0.0.1::hislip0::INSTR'
+                            'TCPIP0::10.0.0.1::hislip0,4880::INSTR'
                             'USB::1234::5678::INSTR'
                             'USB::1234::5678::SERIAL::INSTR'
                             'USB0::0x1234::0x5678::INSTR'
@@ -1607,25 +2449,31 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
                         attribute. These options are passed to the initialize function or the
                         constructor as key-value pairs.  
                         
-                        +-------------------------+----------------------+---------------------+
-                        | Attribute               | Default Inital Value | Options String Name |
-                        +=========================+======================+=====================+
-                        | Range Check             | True                 | range_check         |
-                        +-------------------------+----------------------+---------------------+
-                        | Query Instrument Status | False                | query_instr_status  |
-                        +-------------------------+----------------------+---------------------+
-                        | Cache                   | True                 | cache               |
-                        +-------------------------+----------------------+---------------------+
-                        | Simulate                | False                | simulate            |
-                        +-------------------------+----------------------+---------------------+
-                        | Record Value Coercions  | False                | record_coercions    |
-                        +-------------------------+----------------------+---------------------+
-                        | Interchange Check       | False                | interchange_check   |
-                        +-------------------------+----------------------+---------------------+
-                        | Driver Setup            | ''                   | driver_setup        |
-                        +-------------------------+----------------------+---------------------+
-                        | Prefer PyVISA           | False                | prefer_pyvisa       |
-                        +-------------------------+----------------------+---------------------+
+                        +-------------------------+----------------------+----------------------+
+                        | Attribute               | Default Inital Value | Options String Name  |
+                        +=========================+======================+======================+
+                        | Range Check             | True                 | range_check          |
+                        +-------------------------+----------------------+----------------------+
+                        | Query Instrument Status | False                | query_instr_status   |
+                        +-------------------------+----------------------+----------------------+
+                        | Cache                   | True                 | cache                |
+                        +-------------------------+----------------------+----------------------+
+                        | Simulate                | False                | simulate             |
+                        +-------------------------+----------------------+----------------------+
+                        | Record Value Coercions  | False                | record_coercions     |
+                        +-------------------------+----------------------+----------------------+
+                        | Interchange Check       | False                | interchange_check    |
+                        +-------------------------+----------------------+----------------------+
+                        | Driver Setup            | ''                   | driver_setup         |
+                        +-------------------------+----------------------+----------------------+
+                        | Prefer PyVISA           | False                | prefer_pyvisa        |
+                        +-------------------------+----------------------+----------------------+
+                        | Use Session Pool        | False                | session_pool         |
+                        +-------------------------+----------------------+----------------------+
+                        | Record I/O Statistics   | False                | record_io_statistics |
+                        +-------------------------+----------------------+----------------------+
+                        | Use Identity Cache      | False                | identity_cache       |
+                        +-------------------------+----------------------+----------------------+
                         
                         Each IVI specific driver defines it own meaning and valid values for the
                         Driver Setup attribute. Many specific drivers ignore the value of the
@@ -1635,6 +2483,20 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
                         can use the Driver Setup attribute to allow the user to specify a
                         particular instrument model to simulate.
                         
+                        If Use Session Pool is enabled, the I/O session is taken from the session
+                        pool and returned to it by the Close function instead of being closed, so
+                        a later driver for the same resource reuses the open connection. Pooled
+                        sessions are health checked when reused and closed after they have been
+                        idle for ivi.session_pool.idle_timeout seconds.
+                        
+                        If Use Identity Cache is enabled and the resource is a resource string,
+                        the identity and the configuration the driver reads from the instrument
+                        (for example installed options or switch configuration) are saved in the
+                        cache directory as they are read.  The next Initialize for the
+                        same resource sends a single identity query and, if the response has
+                        not changed, restores the saved values instead of querying them again.
+                        Drivers for instruments without an identity query do not use the cache.
+                        
                         If the user attempts to initialize the instrument a second time without
                         first calling the Close function, the Initialize function returns the
                         Already Initialized error.
@@ -1681,8 +2543,10 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
                         * May deallocate internal resources used by the IVI session.
                         """)
 
-        # inherit prefer_pyvisa from global setting
+        # inherit prefer_pyvisa and session_pool from global settings
         self._prefer_pyvisa = _prefer_pyvisa
+        self._use_session_pool = _use_session_pool
+        self._use_identity_cache = _use_identity_cache
 
         # call initialize if resource string or other args present
         self._initialized_from_constructor = False
@@ -1712,106 +2576,27 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
                 self._driver_operation_driver_setup = val
             elif op == 'prefer_pyvisa':
                 self._prefer_pyvisa = bool(val)
+            elif op == 'session_pool':
+                self._use_session_pool = bool(val)
+            elif op == 'record_io_statistics':
+                self._set_driver_operation_record_io_statistics(val)
+            elif op == 'identity_cache':
+                self._use_identity_cache = bool(val)
             else:
                 raise UnknownOptionException('Invalid option')
 
         # process resource
         if self._driver_operation_simulate:
-            print("Simulating; ignoring resource")
+            log.debug("Simulating; ignoring resource")
         elif resource is None:
             raise IOException('No resource specified!')
         elif type(resource) == str:
-            # parse VISA resource string
-            # valid resource strings:
-            # TCPIP::10.0.0.1::INSTR
-            # TCPIP0::10.0.0.1::INSTR
-            # TCPIP::10.0.0.1::gpib,5::INSTR
-            # TCPIP0::10.0.0.1::gpib,5::INSTR
-            # TCPIP0::10.0.0.1::usb0::INSTR
-            # TCPIP0::10.0.0.1::usb0[1234::5678::MYSERIAL::0]::INSTR
-            # USB::1234::5678::INSTR
-            # USB::1234::5678::SERIAL::INSTR
-            # USB0::0x1234::0x5678::INSTR
-            # USB0::0x1234::0x5678::SERIAL::INSTR
-            # GPIB::10::INSTR
-            # GPIB0::10::INSTR
-            # ASRL1::INSTR
-            # ASRL::COM1,9600,8n1::INSTR
-            # ASRL::/dev/ttyUSB0,9600::INSTR
-            # ASRL::/dev/ttyUSB0,9600,8n1::INSTR
-            m = re.match('^(?P<prefix>(?P<type>TCPIP|USB|GPIB|ASRL)\d*)(::(?P<arg1>[^\s:]+))?(::(?P<arg2>[^\s:]+(\[.+\])?))?(::(?P<arg3>[^\s:]+))?(::(?P<suffix>INSTR))$', resource, re.I)
-            if m is None:
-                if 'pyvisa' in globals():
-                    # connect with PyVISA
-                    self._interface = pyvisa.PyVisaInstrument(resource)
-                else:
-                    raise IOException('Invalid resource string')
-
-            res_type = m.group('type').upper()
-            res_prefix = m.group('prefix')
-            res_arg1 = m.group('arg1')
-            res_arg2 = m.group('arg2')
-            res_arg3 = m.group('arg3')
-            res_suffix = m.group('suffix')
-
-            if res_type == 'TCPIP':
-                # TCP connection
-                if self._prefer_pyvisa and 'pyvisa' in globals():
-                    # connect with PyVISA
-                    self._interface = pyvisa.PyVisaInstrument(resource)
-                elif 'vxi11' in globals():
-                    # connect with VXI-11
-                    self._interface = vxi11.Instrument(resource)
-                elif 'pyvisa' in globals():
-                    # connect with PyVISA
-                    self._interface = pyvisa.PyVisaInstrument(resource)
-                else:
-                    raise IOException('Cannot use resource type %s' % res_type)
-            elif res_type == 'USB':
-                # USB connection
-                if self._prefer_pyvisa and 'pyvisa' in globals():
-                    # connect with PyVISA
-                    self._interface = pyvisa.PyVisaInstrument(resource)
-                elif 'usbtmc' in globals():
-                    # connect with USBTMC
-                    self._interface = usbtmc.Instrument(resource)
-                elif 'pyvisa' in globals():
-                    # connect with PyVISA
-                    self._interface = pyvisa.PyVisaInstrument(resource)
-                else:
-                    raise IOException('Cannot use resource type %s' % res_type)
-            elif res_type == 'GPIB':
-                # GPIB connection
-                if self._prefer_pyvisa and 'pyvisa' in globals():
-                    # connect with PyVISA
-                    self._interface = pyvisa.PyVisaInstrument(resource)
-                elif 'linuxgpib' in globals():
-                    # connect with linux-gpib
-                    self._interface = linuxgpib.LinuxGpibInstrument(resource)
-                elif 'pyvisa' in globals():
-                    # connect with PyVISA
-                    self._interface = pyvisa.PyVisaInstrument(resource)
-                else:
-                    raise IOException('Cannot use resource type %s' % res_type)
-            elif res_type == 'ASRL':
-                # Serial connection
-                if self._prefer_pyvisa and 'pyvisa' in globals():
-                    # connect with PyVISA
-                    self._interface = pyvisa.PyVisaInstrument(resource)
-                elif 'pyserial' in globals():
-                    # connect with PySerial
-                    self._interface = pyserial.SerialInstrument(resource)
-                elif 'pyvisa' in globals():
-                    # connect with PyVISA
-                    self._interface = pyvisa.PyVisaInstrument(resource)
-                else:
-                    raise IOException('Cannot use resource type %s' % res_type)
-                
-            elif 'pyvisa' in globals():
-                # connect with PyVISA
-                self._interface = pyvisa.PyVisaInstrument(resource)
+            if self._use_session_pool:
+                # reuse an open link to the same resource if there is one
+                self._interface = session_pool.checkout(resource, partial(self._open_interface, resource))
+                self._interface_pooled = True
             else:
-                raise IOException('Unknown resource type %s' % res_type)
+                self._interface = self._open_interface(resource)
 
             self._driver_operation_io_resource_descriptor = resource
 
@@ -1821,7 +2606,7 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
         elif 'usbtmc' in globals() and resource.__class__ == usbtmc.Instrument:
             # Got a usbtmc instrument, can use it as is
             self._interface = resource
-        elif set(['read_raw', 'write_raw']).issubset(set(resource.__class__.__dict__)):
+        elif hasattr(resource.__class__, 'read_raw') and hasattr(resource.__class__, 'write_raw'):
             # has read_raw and write_raw, so should be a usable interface
             self._interface = resource
         else:
@@ -1832,16 +2617,176 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
 
         self._initialized = True
 
+        if (self._use_identity_cache and not self._driver_operation_simulate and
+                self._driver_operation_io_resource_descriptor and self._identity_cache_query):
+            self._load_identity_cache()
+
+
+    def _open_interface(self, resource):
+        "Open an interface to the instrument from a VISA resource string"
+        # parse VISA resource string
+        # valid resource strings:
+        # TCPIP::10.0.0.1::INSTR
+        # TCPIP0::10.0.0.1::INSTR
+        # TCPIP::10.0.0.1::gpib,5::INSTR
+        # TCPIP0::10.0.0.1::gpib,5::INSTR
+        # TCPIP0::10.0.0.1::usb0::INSTR
+        # TCPIP0::10.0.0.1::usb0[1234::5678::MYSERIAL::0]::INSTR
+        # TCPIP::10.0.0.1::hislip0::INSTR
+        # TCPIP0::10.0.0.1::hislip0,4880::INSTR
+        # USB::1234::5678::INSTR
+        # USB::1234::5678::SERIAL::INSTR
+        # USB0::0x1234::0x5678::INSTR
+        # USB0::0x1234::0x5678::SERIAL::INSTR
+        # GPIB::10::INSTR
+        # GPIB0::10::INSTR
+        # ASRL1::INSTR
+        # ASRL::COM1,9600,8n1::INSTR
+        # ASRL::/dev/ttyUSB0,9600::INSTR
+        # ASRL::/dev/ttyUSB0,9600,8n1::INSTR
+        m = re.match('^(?P<prefix>(?P<type>TCPIP|USB|GPIB|ASRL)\d*)(::(?P<arg1>[^\s:]+))?(::(?P<arg2>[^\s:]+(\[.+\])?))?(::(?P<arg3>[^\s:]+))?(::(?P<suffix>INSTR))$', resource, re.I)
+        if m is None:
+            if 'pyvisa' in globals():
+                # connect with PyVISA
+                return pyvisa.PyVisaInstrument(resource)
+            else:
+                raise IOException('Invalid resource string')
+
+        res_type = m.group('type').upper()
+        res_prefix = m.group('prefix')
+        res_arg1 = m.group('arg1')
+        res_arg2 = m.group('arg2')
+        res_arg3 = m.group('arg3')
+        res_suffix = m.group('suffix')
+
+        if res_type == 'TCPIP':
+            # TCP connection
+            if self._prefer_pyvisa and 'pyvisa' in globals():
+                # connect with PyVISA
+                return pyvisa.PyVisaInstrument(resource)
+            elif res_arg2 is not None and res_arg2.lower().startswith('hislip') and 'hislip' in globals():
+                # connect with HiSLIP
+                return hislip.HislipInstrument(resource)
+            elif 'vxi11' in globals():
+                # connect with VXI-11
+                return vxi11.Instrument(resource)
+            elif 'pyvisa' in globals():
+                # connect with PyVISA
+                return pyvisa.PyVisaInstrument(resource)
+            else:
+                raise IOException('Cannot use resource type %s' % res_type)
+        elif res_type == 'USB':
+            # USB connection
+            if self._prefer_pyvisa and 'pyvisa' in globals():
+                # connect with PyVISA
+                return pyvisa.PyVisaInstrument(resource)
+            elif 'usbtmc' in globals():
+                # connect with USBTMC
+                return usbtmc.Instrument(resource)
+            elif 'pyvisa' in globals():
+                # connect with PyVISA
+                return pyvisa.PyVisaInstrument(resource)
+            else:
+                raise IOException('Cannot use resource type %s' % res_type)
+        elif res_type == 'GPIB':
+            # GPIB connection
+            if self._prefer_pyvisa and 'pyvisa' in globals():
+                # connect with PyVISA
+                return pyvisa.PyVisaInstrument(resource)
+            elif 'linuxgpib' in globals():
+                # connect with linux-gpib
+                return linuxgpib.LinuxGpibInstrument(resource)
+            elif 'pyvisa' in globals():
+                # connect with PyVISA
+                return pyvisa.PyVisaInstrument(resource)
+            else:
+                raise IOException('Cannot use resource type %s' % res_type)
+        elif res_type == 'ASRL':
+            # Serial connection
+            if self._prefer_pyvisa and 'pyvisa' in globals():
+                # connect with PyVISA
+                return pyvisa.PyVisaInstrument(resource)
+            elif 'pyserial' in globals():
+                # connect with PySerial
+                return pyserial.SerialInstrument(resource)
+            elif 'pyvisa' in globals():
+                # connect with PyVISA
+                return pyvisa.PyVisaInstrument(resource)
+            else:
+                raise IOException('Cannot use resource type %s' % res_type)
+
+        elif 'pyvisa' in globals():
+            # connect with PyVISA
+            return pyvisa.PyVisaInstrument(resource)
+        else:
+            raise IOException('Unknown resource type %s' % res_type)
+
+
+    def _load_identity_cache(self):
+        "Identify the instrument and look it up in the identity cache"
+        self._identity_cache_members = self._get_class_setting('_identity_cache_attributes')
+        self._identity_cache_pending = dict()
+        self._identity_cache_values = dict()
+        # the response may already be known, see index.open
+        self._identity_cache_id = self._ask_identity_query(self._identity_cache_query)
+        # handed to the first identification query of the driver
+        self._identity_cache_response = (self._identity_cache_query, self._identity_cache_id)
+        entry = _read_identity_cache().get(self._driver_operation_io_resource_descriptor)
+        if (entry is None or entry.get('driver') != self.__class__.__name__ or
+                entry.get('id') != self._identity_cache_id):
+            return
+        # restored on the first read, as drivers initialized from the
+        # constructor set their defaults after this
+        for tag, value in entry['attributes'].items():
+            if tag in self._identity_cache_members:
+                self._identity_cache_pending[tag] = value
+                self._identity_cache_values[tag] = value
+
+    def _ask_identity_query(self, query='*IDN?'):
+        "Send an identification query, reusing the response read for the identity cache"
+        response = self._identity_cache_response
+        self._identity_cache_response = None
+        if response is not None and response[0] == query:
+            return response[1]
+        return self._ask(query)
+
+    def _restore_identity_cache(self, tag):
+        "Restore an attribute from the identity cache, returns True if it was restored"
+        try:
+            value = self._identity_cache_pending.pop(tag)
+        except KeyError:
+            return False
+        setattr(self, self._identity_cache_members[tag], value)
+        self._cache_valid[tag] = True
+        return True
+
+    def _store_identity_cache(self):
+        "Save the identity and configuration read in this session to the identity cache"
+        entry = {'driver': self.__class__.__name__, 'id': self._identity_cache_id,
+                'attributes': self._identity_cache_values}
+        cache = _read_identity_cache()
+        if cache.get(self._driver_operation_io_resource_descriptor) != entry:
+            cache[self._driver_operation_io_resource_descriptor] = entry
+            _write_identity_cache(cache)
 
     def _close(self):
         "Closes an IVI session"
-        if self._interface:
+        if self._identity_cache_id is not None:
+            self._store_identity_cache()
+            self._identity_cache_id = None
+            self._identity_cache_pending = None
+            self._identity_cache_response = None
+        if self._interface and self._interface_pooled:
+            # keep the link open for the next driver
+            session_pool.checkin(self._interface)
+        elif self._interface:
             try:
                 self._interface.close()
             except:
                 pass
 
         self._interface = None
+        self._interface_pooled = False
         self._initialized = False
 
 
@@ -1851,11 +2796,12 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
     
     def _get_cache_tag(self, tag=None, skip=1):
         if tag is None:
-            stack = inspect.stack()
-            start = 0 + skip
-            if len(stack) < start + 1:
+            # name of the calling function, sys._getframe is much cheaper
+            # than inspect.stack
+            try:
+                tag = sys._getframe(skip).f_code.co_name
+            except ValueError:
                 return ''
-            tag = stack[start][3] 
         
         if tag[0:4] == "_get": tag = tag[4:]
         if tag[0:4] == "_set": tag = tag[4:]
@@ -1870,61 +2816,219 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
         if index >= 0:
             tag = tag + '_%d' % index
         try:
-            return self._cache_valid[tag]
+            valid = self._cache_valid[tag]
         except KeyError:
             self._cache_valid[tag] = False
-            return False
+            valid = False
+        if not valid and self._identity_cache_pending:
+            valid = self._restore_identity_cache(tag)
+        if valid:
+            policy = self._get_cache_policy(tag)
+            if policy != CACHE_ALWAYS and (policy == CACHE_NEVER or
+                    time.time() >= self._cache_expiry.get(tag, 0)):
+                self._cache_valid[tag] = False
+                valid = False
+        if self._driver_operation_record_cache_statistics:
+            self._count_cache(tag, 'hits' if valid else 'misses')
+        return valid
 
     def _set_cache_valid(self, valid=True, tag=None, index=-1):
-        tag = self._get_cache_tag(tag, 2)
+        name = tag = self._get_cache_tag(tag, 2)
         if index >= 0:
             tag = tag + '_%d' % index
+        if self._driver_operation_record_cache_statistics:
+            if valid:
+                self._count_cache(tag, 'validations')
+            elif self._cache_valid.get(tag):
+                self._count_cache(tag, 'invalidations')
         self._cache_valid[tag] = valid
+        if valid and self._identity_cache_id is not None and tag in self._identity_cache_members:
+            # keep the value as read, drivers may overwrite it later
+            value = _identity_cache_value(getattr(self, self._identity_cache_members[tag]))
+            if self._identity_cache_values.get(tag) != value:
+                if value is None:
+                    del self._identity_cache_values[tag]
+                else:
+                    self._identity_cache_values[tag] = value
+                # written right away, sessions are not always closed
+                self._store_identity_cache()
+        if valid:
+            policy = self._get_cache_policy(tag)
+            if policy != CACHE_ALWAYS and policy != CACHE_NEVER:
+                self._cache_expiry[tag] = time.time() + policy
+            if self._cache_dependency_map is None:
+                self._cache_dependency_map = self._get_class_setting('_cache_dependencies')
+            dependents = self._cache_dependency_map.get(name)
+            # only setters change the instrument state the dependents rely on
+            if dependents and sys._getframe(1).f_code.co_name[0:5] == '_set_':
+                self._invalidate_cache(dependents, index)
+
+    def _invalidate_cache(self, attributes, index=-1):
+        "Invalidate the cache entries matching a list of cache tags or patterns"
+        for pattern in attributes:
+            if index >= 0:
+                pattern = pattern + '_%d' % index
+            for tag in list(self._cache_valid):
+                if not self._cache_valid[tag]:
+                    continue
+                if fnmatch.fnmatchcase(tag, pattern) or fnmatch.fnmatchcase(_cache_index_re.sub('', tag), pattern):
+                    self._set_cache_valid(False, tag)
+
+    def _cache_operation(self, operation):
+        """Invalidate the attributes an operation changes on the instrument
+        
+        Called by operations such as measurement.auto_setup with the name of
+        the operation, the attributes are looked up in
+        driver_operation.set_cache_invalidation and the _cache_invalidations
+        class attribute.
+        """
+        attributes = self._driver_operation_cache_invalidations.get(operation)
+        if attributes is None:
+            attributes = self._get_class_setting('_cache_invalidations').get(operation)
+        if not attributes:
+            return
+        if '*' in attributes:
+            self.driver_operation.invalidate_all_attributes()
+        else:
+            self._invalidate_cache(attributes)
+
+    def _setup_hash_of(self, data):
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        return hashlib.sha1(data).hexdigest()
+
+    def _setup_unchanged(self, data):
+        """Returns True if the instrument is still in the setup data was last
+        loaded or fetched from, so system.load_setup can skip the transfer"""
+        return (self._driver_operation_cache and self._setup_hash is not None and
+                self._setup_hash == self._setup_hash_of(data))
+
+    def _setup_fetched(self, data):
+        "Called by system.fetch_setup with the setup read from the instrument"
+        self._setup_hash = self._setup_hash_of(data)
+        self._save_setup_snapshot()
+
+    def _setup_loaded(self, data):
+        """Called by system.load_setup after the setup was written and the
+        cache invalidated, restores the attributes cached while the
+        instrument was in this setup before"""
+        self._setup_hash = self._setup_hash_of(data)
+        snapshot = self._setup_snapshots.get(self._setup_hash)
+        if snapshot is None:
+            return
+        for tag, value in snapshot.items():
+            if self._set_cache_member(tag, copy.deepcopy(value)):
+                self._set_cache_valid(True, tag)
+
+    def _check_setup_write(self, data):
+        "Forget the current setup before a message that may change it is sent"
+        if isinstance(data, (list, tuple)):
+            data = ';'.join(d.decode('latin-1') if isinstance(d, bytes) else d for d in data)
+        elif isinstance(data, bytes):
+            data = data.decode('latin-1')
+        for cmd in data.split(';'):
+            cmd = cmd.split(None, 1)
+            if cmd and not cmd[0].endswith('?') and cmd[0].lower() not in _setup_neutral_commands:
+                self._save_setup_snapshot()
+                self._setup_hash = None
+                return
+
+    def _save_setup_snapshot(self):
+        "Keep the cached attributes for the current setup"
+        snapshot = dict()
+        for tag, valid in self._cache_valid.items():
+            if not valid:
+                continue
+            found, value = self._get_cache_member(tag)
+            if found:
+                snapshot[tag] = copy.deepcopy(value)
+        self._setup_snapshots.pop(self._setup_hash, None)
+        self._setup_snapshots[self._setup_hash] = snapshot
+        while len(self._setup_snapshots) > self._setup_snapshot_count:
+            self._setup_snapshots.popitem(last=False)
+
+    def _get_cache_member(self, tag):
+        """Value of the member a cache tag refers to, by convention _name for
+        tag name and _name[index] for tag name_index, as (found, value)"""
+        if hasattr(self, '_' + tag):
+            value = getattr(self, '_' + tag)
+            if not callable(value):
+                return True, value
+        m = _cache_index_re.search(tag)
+        if m:
+            value = getattr(self, '_' + tag[:m.start()], None)
+            index = int(tag[m.start()+1:])
+            if isinstance(value, list) and index < len(value):
+                return True, value[index]
+        return False, None
+
+    def _set_cache_member(self, tag, value):
+        "Set the member a cache tag refers to, returns False if there is none"
+        if hasattr(self, '_' + tag) and not callable(getattr(self, '_' + tag)):
+            setattr(self, '_' + tag, value)
+            return True
+        m = _cache_index_re.search(tag)
+        if m:
+            lst = getattr(self, '_' + tag[:m.start()], None)
+            index = int(tag[m.start()+1:])
+            if isinstance(lst, list) and index < len(lst):
+                lst[index] = value
+                return True
+        return False
 
     def _driver_operation_invalidate_all_attributes(self):
+        if self._driver_operation_record_cache_statistics:
+            for tag, valid in self._cache_valid.items():
+                if valid:
+                    self._count_cache(tag, 'invalidations')
         self._cache_valid = dict()
+        self._cache_expiry = dict()
+        # the instrument may have been changed from the front panel
+        self._setup_hash = None
 
     def _set_termination_character(self, character):
         "Set termination character for interfaces that use one"
         if self._driver_operation_simulate:
-            print("[simulating] Call to set_termination_character")
+            log.debug("[simulating] Call to set_termination_character")
             return
         if not self._initialized or self._interface is None:
             raise NotInitializedException()
-        if type(self._interface) is pyserial.SerialInstrument:
+        if hasattr(self._interface, 'term_char'):
             self._interface.term_char = character
-        elif type(self._interface) is pyvisa.PyVisaInstrument:
-            self._interface.instrument.set_term_chars(character)
             # TODO check consistency across interfaces and support more
            
     def _get_termination_character(self):
         "Get termination character"
         if self._driver_operation_simulate:
-            print("[simulating] Call to get_termination_character")
+            log.debug("[simulating] Call to get_termination_character")
             return ''
         if not self._initialized or self._interface is None:
             raise NotInitializedException()
-        if type(self._interface) is pyserial.SerialInstrument:
+        if hasattr(self._interface, 'term_char'):
             return self._interface.term_char
-        elif type(self._interface) is pyvisa.PyVisaInstrument:
-            return self._interface.instrument.get_term_chars()
             # TODO check consistency across interfaces and support more
         else:
             return ''
 
     def _write_raw(self, data):
         "Write binary data to instrument"
+        if self._io_measured():
+            return self._measure_io('write', data, self._write_raw, data)
         if self._driver_operation_simulate:
-            print("[simulating] Call to write_raw")
+            log.debug("[simulating] Call to write_raw")
             return
         if not self._initialized or self._interface is None:
             raise NotInitializedException()
+        if self._setup_hash is not None:
+            self._check_setup_write(data)
         self._interface.write_raw(data)
     
     def _read_raw(self, num=-1):
         "Read binary data from instrument"
+        if self._io_measured():
+            return self._measure_io('read', None, self._read_raw, num)
         if self._driver_operation_simulate:
-            print("[simulating] Call to read_raw")
+            log.debug("[simulating] Call to read_raw")
             return b''
         if not self._initialized or self._interface is None:
             raise NotInitializedException()
@@ -1932,25 +3036,43 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
     
     def _ask_raw(self, data, num=-1):
         "Write then read binary data"
+        if self._io_measured():
+            return self._measure_io('ask', data, self._ask_raw, data, num)
         if self._driver_operation_simulate:
-            print("[simulating] Call to ask_raw")
+            log.debug("[simulating] Call to ask_raw")
             return b''
         if not self._initialized or self._interface is None:
             raise NotInitializedException()
+        if self._setup_hash is not None:
+            self._check_setup_write(data)
         try:
             return self._interface.ask_raw(data, num)
         except AttributeError:
             # if interface does not implement ask_raw, emulate it
-            self._write_raw(data)
-            return self._read_raw(num)
+            with self._transaction():
+                self._write_raw(data)
+                return self._read_raw(num)
     
     def _write(self, data, encoding = 'utf-8'):
         "Write string to instrument"
+        if self._io_measured():
+            return self._measure_io('write', data, self._write, data, encoding)
         if self._driver_operation_simulate:
-            print("[simulating] Write (%s) '%s'" % (encoding, data))
+            log.debug("[simulating] Write (%s) '%s'", encoding, data)
             return
         if not self._initialized or self._interface is None:
             raise NotInitializedException()
+        if self._setup_hash is not None:
+            self._check_setup_write(data)
+        if (self._driver_operation_query_instrument_status and self._error_query_command
+                and isinstance(data, str) and '?' not in data
+                and not _wait_command_re.search(data)
+                and not self._is_sequential_command(data)):
+            # check the error queue in the same program message, except
+            # after *OPC, *WAI or a sequential command where the reply would
+            # wait for the operation
+            self._check_error(self._ask(data + ';' + self._error_query_command, encoding=encoding))
+            return
         try:
             self._interface.write(data, encoding)
         except AttributeError:
@@ -1962,10 +3084,19 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
 
             self._write_raw(str(data).encode(encoding))
     
+    def _is_sequential_command(self, data):
+        "Check whether a program message contains one of _sequential_commands"
+        if not self._sequential_commands:
+            return False
+        data = data.lower()
+        return any(cmd in data for cmd in self._sequential_commands)
+    
     def _read(self, num=-1, encoding = 'utf-8'):
         "Read string from instrument"
+        if self._io_measured():
+            return self._measure_io('read', None, self._read, num, encoding)
         if self._driver_operation_simulate:
-            print("[simulating] Read (%s)" % encoding)
+            log.debug("[simulating] Read (%s)", encoding)
             return ''
         if not self._initialized or self._interface is None:
             raise NotInitializedException()
@@ -1976,11 +3107,15 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
     
     def _ask(self, data, num=-1, encoding = 'utf-8'):
         "Write then read string"
+        if self._io_measured():
+            return self._measure_io('ask', data, self._ask, data, num, encoding)
         if self._driver_operation_simulate:
-            print("[simulating] Ask (%s) '%s'" % (encoding, data))
+            log.debug("[simulating] Ask (%s) '%s'", encoding, data)
             return ''
         if not self._initialized or self._interface is None:
             raise NotInitializedException()
+        if self._setup_hash is not None:
+            self._check_setup_write(data)
         try:
             return self._interface.ask(data, num, encoding)
         except AttributeError:
@@ -1992,47 +3127,229 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
                     val.append(self._ask(data_i, num, encoding))
                 return val
 
-            self._write(data, encoding)
-            return self._read(num, encoding)
+            with self._transaction():
+                self._write(data, encoding)
+                return self._read(num, encoding)
+    
+    def _parse_error(self, response):
+        "Parse a SCPI error queue entry into (code, message)"
+        m = _error_re.match(response)
+        if m is not None:
+            return (int(m.group(1)), m.group(2).replace('""', '"'))
+        # unquoted message
+        try:
+            code, message = response.split(',', 1)
+            return (int(code), message.strip(' "'))
+        except ValueError:
+            raise UnexpectedResponseException()
+    
+    def _read_error_queue(self):
+        "Read and clear all entries in the error queue, returns a list of (code, message)"
+        errors = list()
+        if self._driver_operation_simulate or not self._error_query_command:
+            return errors
+        # the queue holds a limited number of entries, guard against instruments
+        # that never report an empty queue
+        for i in range(100):
+            error = self._parse_error(self._ask(self._error_query_command))
+            if error[0] == 0:
+                break
+            errors.append(error)
+        return errors
+    
+    def _check_error(self, response):
+        """Check an error queue entry
+        
+        Raises InstrumentStatusExcpetion listing the entry and the rest of the
+        queue when it is not 0, "No error".
+        """
+        error = self._parse_error(response)
+        if error[0] == 0:
+            return
+        errors = [error] + self._read_error_queue()
+        raise InstrumentStatusExcpetion('; '.join('%d, "%s"' % e for e in errors))
     
     def _read_stb(self):
         "Read status byte"
         if self._driver_operation_simulate:
-            print("[simulating] Read status")
+            log.debug("[simulating] Read status")
             return 0
         if not self._initialized or self._interface is None:
             raise NotInitializedException()
         try:
             return self._interface.read_stb()
-        except (AttributeError, NotImplementedError):
+        except (AttributeError, NotImplementedError, OperationNotSupportedException):
             return int(self._ask("*STB?"))
     
+    def _get_deadline(self, maximum_time):
+        "Wall clock deadline for maximum_time in seconds, None for no limit"
+        if maximum_time is None or maximum_time < 0:
+            return None
+        return time.time() + maximum_time
+    
+    def _wait_until(self, condition, maximum_time = None, interval = None, max_interval = None, name = None):
+        """Poll condition until it returns true
+        
+        The polling interval starts at interval (default _poll_interval) and
+        doubles up to max_interval (default _poll_interval_max), so short waits
+        wake up quickly and long ones do not load the bus.  maximum_time is in
+        seconds, None or a negative value waits indefinitely.  Raises
+        MaxTimeoutExceededException when the condition is still false after
+        maximum_time.  The wait is recorded in driver_operation.wait_statistics
+        under name and its duration in seconds is returned.
+        """
+        if interval is None:
+            interval = self._poll_interval
+        if max_interval is None:
+            max_interval = self._poll_interval_max
+        if name is None:
+            name = getattr(condition, '__name__', 'wait')
+        
+        start = time.time()
+        deadline = self._get_deadline(maximum_time)
+        polls = 1
+        while not condition():
+            now = time.time()
+            if deadline is not None and now >= deadline:
+                self._record_wait(name, now - start, polls, True)
+                raise MaxTimeoutExceededException()
+            if deadline is not None:
+                time.sleep(min(interval, deadline - now))
+            else:
+                time.sleep(interval)
+            interval = min(interval * 2, max_interval)
+            polls += 1
+        
+        elapsed = time.time() - start
+        self._record_wait(name, elapsed, polls)
+        return elapsed
+    
+    def _wait_for_status_byte(self, mask, value = None, maximum_time = None, interval = None, max_interval = None, name = None):
+        """Poll the status byte until the bits in mask equal value
+        
+        Without a value, waits until any bit in mask is set.  The status byte
+        is read by serial poll where the interface supports it, otherwise with
+        *STB?.  Returns the last status byte read.  See _wait_until for the
+        other parameters.
+        """
+        if name is None:
+            name = "stb & 0x%02x" % mask
+        stb = [0]
+        def condition():
+            stb[0] = self._read_stb()
+            if value is None:
+                return stb[0] & mask != 0
+            return stb[0] & mask == value
+        self._wait_until(condition, maximum_time, interval, max_interval, name)
+        return stb[0]
+    
+    def _wait_for_query(self, query, condition, maximum_time = None, interval = None, max_interval = None, name = None):
+        """Repeat query until condition(response) returns true
+        
+        Returns the last response.  See _wait_until for the other parameters.
+        """
+        if name is None:
+            name = query
+        response = [None]
+        def check():
+            response[0] = self._ask(query)
+            return condition(response[0])
+        self._wait_until(check, maximum_time, interval, max_interval, name)
+        return response[0]
+    
+    def _wait_for_operation_complete(self, command = None, maximum_time = None):
+        """Send command followed by *OPC and wait for the operation complete event
+        
+        The standard event status register is cleared first and *ESE 1 routes
+        the operation complete event to the ESB bit of the status byte.  If the
+        interface can wait for service requests, *SRE 32 makes the instrument
+        request service on that event and the wait blocks on SRQ.  Otherwise
+        the status byte is polled with backoff, by serial poll where the
+        interface supports it.  The previous event status and service request
+        enable masks are restored afterwards.  Raises
+        MaxTimeoutExceededException if the operation does not complete within
+        maximum_time seconds.
+        """
+        if self._driver_operation_simulate:
+            return
+        if not self._initialized or self._interface is None:
+            raise NotInitializedException()
+        
+        deadline = self._get_deadline(maximum_time)
+        use_srq = self._use_srq and hasattr(self._interface, 'wait_for_srq')
+        
+        # clear event status register
+        self._ask("*ESR?")
+        
+        # enable masks to restore afterwards
+        ese = int(self._ask("*ESE?"))
+        if use_srq:
+            sre = int(self._ask("*SRE?"))
+        
+        cmd = "*ESE 1;"
+        if use_srq:
+            cmd += "*SRE 32;"
+        if command:
+            cmd += command + ";"
+        self._write(cmd + "*OPC")
+        
+        try:
+            if use_srq:
+                start = time.time()
+                while True:
+                    timeout = None
+                    if deadline is not None:
+                        timeout = max(deadline - time.time(), 0)
+                    stb = self._interface.wait_for_srq(timeout)
+                    if stb is None:
+                        self._record_wait('*OPC', time.time() - start, 0, True)
+                        raise MaxTimeoutExceededException()
+                    if stb & STB_ESB:
+                        break
+                self._record_wait('*OPC', time.time() - start, 0)
+            else:
+                remaining = None
+                if deadline is not None:
+                    remaining = max(deadline - time.time(), 0)
+                self._wait_for_status_byte(STB_ESB, maximum_time=remaining, name='*OPC')
+        finally:
+            cmd = "*ESE %d" % ese
+            if use_srq:
+                cmd += ";*SRE %d" % sre
+            self._write(cmd)
+        
+        # clear the event
+        self._ask("*ESR?")
+    
     def _trigger(self):
         "Device trigger"
         if self._driver_operation_simulate:
-            print("[simulating] Trigger")
+            log.debug("[simulating] Trigger")
+            return
         if not self._initialized or self._interface is None:
             raise NotInitializedException()
         try:
             self._interface.trigger()
-        except (AttributeError, NotImplementedError):
+        except (AttributeError, NotImplementedError, OperationNotSupportedException):
             self._write("*TRG")
     
     def _clear(self):
         "Device clear"
         if self._driver_operation_simulate:
-            print("[simulating] Clear")
+            log.debug("[simulating] Clear")
+            return
         if not self._initialized or self._interface is None:
             raise NotInitializedException()
         try:
             return self._interface.clear()
-        except (AttributeError, NotImplementedError):
+        except (AttributeError, NotImplementedError, OperationNotSupportedException):
             self._write("*CLS")
     
     def _remote(self):
         "Device set remote"
         if self._driver_operation_simulate:
-            print("[simulating] Remote")
+            log.debug("[simulating] Remote")
+            return
         if not self._initialized or self._interface is None:
             raise NotInitializedException()
         return self._interface.remote()
@@ -2040,19 +3357,65 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
     def _local(self):
         "Device set local"
         if self._driver_operation_simulate:
-            print("[simulating] Local")
+            log.debug("[simulating] Local")
+            return
         if not self._initialized or self._interface is None:
             raise NotInitializedException()
         return self._interface.local()
     
-    def _read_ieee_block(self):
-        "Read IEEE block"
+    def _read_ieee_block(self, dtype = None):
+        """Read IEEE block
+        
+        Returns the block contents as bytes, or as a NumPy array when a dtype
+        is given.
+        """
         # IEEE block binary data is prefixed with #lnnnnnnnn
         # where l is length of n and n is the
         # length of the data
         # ex: #800002000 prefixes 2000 data bytes
         
-        return decode_ieee_block(self._read_raw())
+        if self._io_measured():
+            return self._measure_io('read', None, self._read_ieee_block, dtype)
+        
+        with self._transaction():
+            if not self._driver_operation_simulate and self._interface is not None:
+                try:
+                    read_ieee_block = self._interface.read_ieee_block
+                except AttributeError:
+                    pass
+                else:
+                    # interface can read the block without buffering the whole response
+                    return read_ieee_block(dtype)
+            
+            data = decode_ieee_block(self._read_raw())
+        if dtype is None:
+            return data
+        dtype = np.dtype(dtype)
+        return np.frombuffer(data, dtype, len(data) // dtype.itemsize)
+    
+    def _ask_for_ieee_block(self, data, dtype = None, encoding = 'utf-8'):
+        "Write query then read IEEE block, see _read_ieee_block"
+        with self._transaction():
+            self._write(data, encoding)
+            return self._read_ieee_block(dtype)
+    
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Keep other sessions off the interface for a sequence of I/O calls
+        
+        Interfaces to a shared bus provide a transaction context manager that
+        holds the bus, so a query and the read of its response cannot be
+        interleaved with traffic from other threads.  Other interfaces are
+        used as they are.
+        """
+        transaction = None
+        if not self._driver_operation_simulate and self._interface is not None:
+            transaction = getattr(self._interface, 'transaction', None)
+        if transaction is None:
+            yield
+        else:
+            with transaction():
+                yield
     
     def _write_ieee_block(self, data, prefix = None, encoding = 'utf-8'):
         "Write IEEE block"
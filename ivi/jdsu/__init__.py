@@ -24,7 +24,10 @@ THE SOFTWARE.
 
 """
 
-# Optical Grating Filters
-from .jdsuTB9 import jdsuTB9
+from .. import ivi
 
+__all__ = [
+        # Optical Grating Filters
+        "jdsuTB9"]
 
+__getattr__, __dir__ = ivi.register_drivers(__name__, __all__)
@@ -160,11 +160,14 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
                        ivi.Driver):
     "LeCroy generic IVI oscilloscope driver"
 
+    # :digitize blocks until the acquisition completes
+    _sequential_commands = (':digitize',)
+
     def __init__(self, *args, **kwargs):
         self.__dict__.setdefault('_instrument_id', '')
-        self._analog_channel_name = list()
+        self._analog_channel_name = ivi.SelectorList()
         self._analog_channel_count = 4
-        self._digital_channel_name = list()
+        self._digital_channel_name = ivi.SelectorList()
         self._digital_channel_count = 16
         self._channel_count = self._analog_channel_count + self._digital_channel_count
         self._channel_label = list()
@@ -180,9 +183,9 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
 
         self._memory_size = 5
 
-        self._analog_channel_name = list()
+        self._analog_channel_name = ivi.SelectorList()
         self._analog_channel_count = 4
-        self._digital_channel_name = list()
+        self._digital_channel_name = ivi.SelectorList()
         self._digital_channel_count = 16
         self._channel_count = self._analog_channel_count + self._digital_channel_count
         self._bandwidth = 1e9
@@ -416,7 +419,8 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
                          self._system_load_setup,
                          ivi.Doc("""
                         Transfers a binary block of setup data to the scope to reload a setup
-                        previously saved with system.fetch_setup.
+                        previously saved with system.fetch_setup.  If the scope is still in the
+                        setup that was last loaded or fetched, the transfer is skipped.
                         """))
         self._add_method('system.display_string',
                          self._system_display_string,
@@ -474,7 +478,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
             self._identity_instrument_model = "Not available while simulating"
             self._identity_instrument_firmware_revision = "Not available while simulating"
         else:
-            lst = self._ask("*IDN?").split(",")
+            lst = self._ask_identity_query("*IDN?").split(",")
             self._identity_instrument_manufacturer = lst[0]
             self._identity_instrument_model = lst[1]
             self._identity_instrument_firmware_revision = lst[3]
@@ -547,7 +551,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
         except AttributeError:
             pass
 
-        self._channel_name = list()
+        self._channel_name = ivi.SelectorList()
         self._channel_label = list()
         self._channel_label_position = list()
         self._channel_noise_filter = list()
@@ -559,7 +563,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
         self._channel_input_impedance = list()
         self._channel_trigger_level = list()
 
-        self._analog_channel_name = list()
+        self._analog_channel_name = ivi.SelectorList()
         for i in range(self._analog_channel_count):
             self._channel_name.append("C%d" % (i + 1))
             self._channel_label.append("%d" % (i + 1))
@@ -577,7 +581,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
 
 
         # digital channels
-        self._digital_channel_name = list()
+        self._digital_channel_name = ivi.SelectorList()
         if (self._digital_channel_count > 0):
             for i in range(self._digital_channel_count):
                 self._channel_name.append("digital%d" % i)
@@ -601,18 +605,22 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
         if self._driver_operation_simulate:
             return b''
 
-        self._write(":system:setup?")
-
-        return self._read_ieee_block()
+        data = self._ask_for_ieee_block(":system:setup?")
+        self._setup_fetched(data)
+        return data
 
     # TODO: how to implement the following on LeCroy scope?
     def _system_load_setup(self, data):
         if self._driver_operation_simulate:
             return
 
+        if self._setup_unchanged(data):
+            return
+
         self._write_ieee_block(data, ':system:setup ')
 
-        self.driver_operation.invalidate_all_attributes()
+        self._cache_operation('system.load_setup')
+        self._setup_loaded(data)
 
     # TODO: test display_string
     def _system_display_string(self, string=None):
@@ -646,7 +654,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":timebase:mode?").lower()
             self._timebase_mode = [k for k, v in TimebaseModeMapping.items() if v == value][0]
-            self._set_cache_valid
+            self._set_cache_valid()
         return self._timebase_mode
 
     def _set_timebase_mode(self, value):
@@ -661,7 +669,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":timebase:reference?").lower()
             self._timebase_reference = [k for k, v in TimebaseReferenceMapping.items() if v == value][0]
-            self._set_cache_valid
+            self._set_cache_valid()
         return self._timebase_reference
 
     def _set_timebase_reference(self, value):
@@ -1450,8 +1458,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
             raise ivi.UnexpectedResponseException()
 
         # Read waveform data
-        self._write("%s:WAVEFORM? DAT1" % self._channel_name[index])
-        raw_data = raw_data = self._read_ieee_block()
+        raw_data = self._ask_for_ieee_block("%s:WAVEFORM? DAT1" % self._channel_name[index])
 
         # Split out points and convert to time and voltage pairs
         data = list()
@@ -1612,6 +1619,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
     def _measurement_auto_setup(self):
         if not self._driver_operation_simulate:
             self._write("ASET")
+        self._cache_operation('measurement.auto_setup')
 
     # WORKING ON WR104XI-A
     def _memory_save(self, index):
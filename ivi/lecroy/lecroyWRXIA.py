@@ -63,9 +63,9 @@ class lecroyWRXIA(lecroyBaseScope):
         super(lecroyWRXIA, self).__init__(*args, **kwargs)
 
         self._channel_interpolation = list()
-        self._analog_channel_name = list()
+        self._analog_channel_name = ivi.SelectorList()
         self._analog_channel_count = 4
-        self._digital_channel_name = list()
+        self._digital_channel_name = ivi.SelectorList()
         self._digital_channel_count = 16
         self._channel_count = self._analog_channel_count + self._digital_channel_count
         self._bandwidth = 1e9
@@ -372,3 +372,4 @@ class lecroyWRXIA(lecroyBaseScope):
     def _measurement_auto_setup(self):
         if not self._driver_operation_simulate:
             self._write("VBS \"app.AutoSetup\"")
+        self._cache_operation('measurement.auto_setup')
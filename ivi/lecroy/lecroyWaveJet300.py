@@ -102,6 +102,9 @@ class lecroyWaveJet300(ivi.Driver, scope.Base,
                 extra.common.SystemSetup, extra.common.Screenshot):
     "Lecroy WaveJet 300/300A series IVI oscilloscope driver"
     
+    # identity query sent by _load_id_string, see ivi.Driver
+    _identity_cache_query = '*IDN?'
+    
     def __init__(self, *args, **kwargs):
         self.__dict__.setdefault('_instrument_id', '')
         self._channel_count = 4
@@ -235,7 +238,7 @@ class lecroyWaveJet300(ivi.Driver, scope.Base,
             self._identity_instrument_model = "Not available while simulating"
             self._identity_instrument_firmware_revision = "Not available while simulating"
         else:
-            lst = self._ask("*IDN?").split(",")
+            lst = self._ask_identity_query("*IDN?").split(",")
             self._identity_instrument_manufacturer = lst[0]
             self._identity_instrument_model = lst[1]
             self._identity_instrument_firmware_revision = lst[3]
@@ -310,8 +313,8 @@ class lecroyWaveJet300(ivi.Driver, scope.Base,
         except AttributeError:
             pass
         
-        self._channel_name = list()
-        self._channel_command_name = list()
+        self._channel_name = ivi.SelectorList()
+        self._channel_command_name = ivi.SelectorList()
         self._channel_scale = list()
         self._channel_bw_limit = list()
         for i in range(self._channel_count):
@@ -325,23 +328,26 @@ class lecroyWaveJet300(ivi.Driver, scope.Base,
     def _system_fetch_setup(self):
         if self._driver_operation_simulate:
             return b''
-        self._write("DTSTUP?")
-        return self._read_ieee_block()
+        data = self._ask_for_ieee_block("DTSTUP?")
+        self._setup_fetched(data)
+        return data
     
     def _system_load_setup(self, data):
         if self._driver_operation_simulate:
             return
+        if self._setup_unchanged(data):
+            return
         self._write("DTSTUP")
         self._write_ieee_block(data)
-        self.driver_operation.invalidate_all_attributes()
+        self._cache_operation('system.load_setup')
+        self._setup_loaded(data)
 
     def _display_fetch_screenshot(self, format='png'):
         if self._driver_operation_simulate:
             return b''
         if format not in ScreenshotImageFormatMapping:
             raise ivi.ValueNotSupportedException()
-        self._write("TSCRN? %s" % ScreenshotImageFormatMapping[format])
-        return self._read_ieee_block()
+        return self._ask_for_ieee_block("TSCRN? %s" % ScreenshotImageFormatMapping[format])
 
     def _get_timebase_mode(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
@@ -771,10 +777,8 @@ class lecroyWaveJet300(ivi.Driver, scope.Base,
         yincrement /= self._get_channel_probe_attenuation(index)
         yorigin /= self._get_channel_probe_attenuation(index)
 
-        self._write("DTWAVE?")
-
         # Read waveform data
-        raw_data = self._read_ieee_block()
+        raw_data = self._ask_for_ieee_block("DTWAVE?")
         
         # Split out points and convert to time and voltage pairs
         data = list()
@@ -889,6 +893,7 @@ class lecroyWaveJet300(ivi.Driver, scope.Base,
     def _measurement_auto_setup(self):
         if not self._driver_operation_simulate:
             self._write("ASET")
+        self._cache_operation('measurement.auto_setup')
 
     def _bool_to_onoff(self, value):
         return "on" if bool(value) else "off"
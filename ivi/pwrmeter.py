@@ -50,7 +50,7 @@ class Base(ivi.IviContainer):
         grp = 'Base'
         ivi.add_group_capability(self, cls+grp)
         
-        self._channel_name = list()
+        self._channel_name = ivi.SelectorList()
         self._channel_averaging_count_auto = list()
         self._channel_correction_frequency = list()
         self._channel_offset = list()
@@ -97,7 +97,7 @@ class Base(ivi.IviContainer):
         except AttributeError:
             pass
         
-        self._channel_name = list()
+        self._channel_name = ivi.SelectorList()
         self._channel_averaging_count_auto = list()
         self._channel_correction_frequency = list()
         self._channel_offset = list()
@@ -176,6 +176,7 @@ class Base(ivi.IviContainer):
     
     def _measurement_read(self, maximum_time):
         self._measurement_initiate()
+        self._wait_until(lambda: self._get_measurement_measurement_state() != 'in_progress', maximum_time)
         return self._measurement_fetch()
     
     
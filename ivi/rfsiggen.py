@@ -133,10 +133,7 @@ class Base(ivi.IviContainer):
         return True
     
     def _rf_wait_until_settled(self, maximum_time):
-        t = 0
-        while not self._rf_is_settled() and t < maximum_time:
-            time.sleep(0.01)
-            t = t + 0.01
+        self._wait_until(self._rf_is_settled, maximum_time, name='rf.wait_until_settled')
     
     
 class ModulateAM(ivi.IviContainer):
@@ -390,7 +387,7 @@ class AnalogModulationSource(ivi.IviContainer):
         ivi.add_group_capability(self, cls+grp)
         
         self._analog_modulation_source_count = 0
-        self._analog_modulation_source_name = list()
+        self._analog_modulation_source_name = ivi.SelectorList()
     
     def _get_analog_modulation_source_count(self):
         return self._analog_modulation_source_count
@@ -460,7 +457,7 @@ class LFGenerator(ivi.IviContainer):
         
         self._lf_generator_active_lf_generator = ""
         self._lf_generator_count = 0
-        self._lf_generator_name = list()
+        self._lf_generator_name = ivi.SelectorList()
         self._lf_generator_frequency = 0.0
         self._lf_generator_waveform = 'sine'
         
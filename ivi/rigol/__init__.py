@@ -24,11 +24,16 @@ THE SOFTWARE.
 
 """
 
-# DC Power Supplies
-# DP800
-from .rigolDP831A import rigolDP831A
-from .rigolDP832 import rigolDP832
-from .rigolDP832A import rigolDP832A
-# DP1000
-from .rigolDP1116A import rigolDP1116A
-from .rigolDP1308A import rigolDP1308A
+from .. import ivi
+
+__all__ = [
+        # DC Power Supplies
+        # DP800
+        "rigolDP831A",
+        "rigolDP832",
+        "rigolDP832A",
+        # DP1000
+        "rigolDP1116A",
+        "rigolDP1308A"]
+
+__getattr__, __dir__ = ivi.register_drivers(__name__, __all__)
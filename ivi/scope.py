@@ -24,6 +24,8 @@ THE SOFTWARE.
 
 """
 
+import numpy as np
+
 from . import ivi
 
 # Exceptions
@@ -54,9 +56,62 @@ MeasurementFunction = set(['rise_time', 'fall_time', 'frequency', 'period',
         'overshoot', 'preshoot'])
 AcquisitionStatus = set(['complete', 'in_progress', 'unknown'])
 
+class Waveform(object):
+    """Waveform transferred from an oscilloscope
+
+    Holds the sample codes as sent by the instrument in raw and the scaling
+    to time and voltage:
+    
+    x = (i - x_reference) * x_increment + x_origin
+    y = (raw - y_reference) * y_increment + y_origin
+    
+    Samples equal to hole carry no data and are NaN in y.  x and y are
+    computed on first access.  Iterating a waveform yields the (x, y) pairs
+    that fetch_waveform returns.
+    """
+    def __init__(self, raw, x_increment=1.0, x_origin=0.0, x_reference=0,
+            y_increment=1.0, y_origin=0.0, y_reference=0, hole=None):
+        self.raw = raw
+        self.x_increment = x_increment
+        self.x_origin = x_origin
+        self.x_reference = x_reference
+        self.y_increment = y_increment
+        self.y_origin = y_origin
+        self.y_reference = y_reference
+        self.hole = hole
+        self._x = None
+        self._y = None
+    
+    @property
+    def x(self):
+        if self._x is None:
+            self._x = (np.arange(len(self.raw)) - self.x_reference) * self.x_increment + self.x_origin
+        return self._x
+    
+    @property
+    def y(self):
+        if self._y is None:
+            y = (self.raw.astype(np.int64) - self.y_reference) * self.y_increment + self.y_origin
+            if self.hole is not None:
+                y[self.raw == self.hole] = float('nan')
+            self._y = y
+        return self._y
+    
+    def __len__(self):
+        return len(self.raw)
+    
+    def __iter__(self):
+        # (x, y) pairs one at a time, on Python 2 zip would build a list
+        y = self.y.tolist()
+        for i, x in enumerate(self.x.tolist()):
+            yield (x, y[i])
+
 class Base(ivi.IviContainer):
     "Base IVI methods for all oscilloscopes"
     
+    # auto setup changes the vertical, horizontal, trigger and acquisition settings
+    _cache_invalidations = {'measurement.auto_setup': ['channel_*', 'timebase_*', 'trigger_*', 'acquisition_*']}
+    
     def __init__(self, *args, **kwargs):
         # needed for _init_channels calls from other __init__ methods
         self._channel_count = 1
@@ -72,7 +127,7 @@ class Base(ivi.IviContainer):
         self._acquisition_number_of_points_minimum = 0
         self._acquisition_record_length = 1000
         self._acquisition_time_per_record = 1e-3
-        self._channel_name = list()
+        self._channel_name = ivi.SelectorList()
         self._channel_enabled = list()
         self._channel_input_impedance = list()
         self._channel_input_frequency_max = list()
@@ -328,8 +383,9 @@ class Base(ivi.IviContainer):
                         error. It then waits for the acquisition to complete, and returns the
                         waveform for the channel the end-user specifies. If the oscilloscope did
                         not complete the acquisition within the time period the user specified
-                        with the max_time parameter, the function returns the Max Time Exceeded
-                        error.
+                        with the maximum_time parameter, the function returns the Max Time
+                        Exceeded error. maximum_time is in seconds, the IVI specification gives
+                        it in milliseconds.
                         
                         Use this function only when the acquisition mode is Normal, Hi Res, or
                         Average. If the acquisition type is not one of the listed types, the
@@ -545,7 +601,7 @@ class Base(ivi.IviContainer):
         except AttributeError:
             pass
         
-        self._channel_name = list()
+        self._channel_name = ivi.SelectorList()
         self._channel_enabled = list()
         self._channel_input_impedance = list()
         self._channel_input_frequency_max = list()
@@ -1366,8 +1422,9 @@ class WaveformMeasurement(ivi.IviContainer):
                         frequency, and voltage peak-to-peak.
                         
                         If the oscilloscope did not complete the acquisition within the time
-                        period the user specified with the MaxTimeMilliseconds parameter, the
-                        function returns the Max Time Exceeded error.
+                        period the user specified with the maximum_time parameter, the function
+                        returns the Max Time Exceeded error. maximum_time is in seconds, the IVI
+                        specification gives it in milliseconds.
                         
                         The end-user can call the Fetch Waveform Measurement function separately
                         to obtain any other waveform measurement on a specific channel without
@@ -1516,7 +1573,9 @@ class MinMaxWaveform(ivi.IviContainer):
                         obtain the min/max waveforms for each of the remaining enabled channels
                         without initiating another acquisition. If the oscilloscope did not
                         complete the acquisition within the time period the user specified with
-                        the max_time parameter, the function returns the Max Time Exceeded error.
+                        the maximum_time parameter, the function returns the Max Time Exceeded
+                        error. maximum_time is in seconds, the IVI specification gives it in
+                        milliseconds.
                         
                         The return value is a list of (x, y_min, y_max) tuples that represent the
                         time and voltage of each data point.  Either of the y points may be NaN in
@@ -33,6 +33,8 @@ from .. import extra
 class IdnCommand(extra.common.SerialNumber):
     "Implementation of standard SCPI instrument identity query"
 
+    _identity_cache_query = '*IDN?'
+
     def _load_id_string(self):
         if self._driver_operation_simulate:
             self._identity_instrument_manufacturer = "Not available while simulating"
@@ -40,7 +42,7 @@ class IdnCommand(extra.common.SerialNumber):
             self._identity_instrument_serial = "Not available while simulating"
             self._identity_instrument_firmware_revision = "Not available while simulating"
         else:
-            lst = self._ask("*IDN?").split(",")
+            lst = self._ask_identity_query("*IDN?").split(",")
             self._identity_instrument_manufacturer = lst[0].strip()
             self._identity_instrument_model = lst[1].strip()
             self._identity_instrument_serial_number = lst[2].strip()
@@ -74,13 +76,14 @@ class IdnCommand(extra.common.SerialNumber):
 class ErrorQuery(object):
     "Implementation of standard SCPI error query"
 
+    # enables status checking piggybacked on writes, see Driver._write
+    _error_query_command = ":system:error?"
+
     def _utility_error_query(self):
         error_code = 0
         error_message = "No error"
         if not self._driver_operation_simulate:
-            error_code, error_message = self._ask(":system:error?").split(',')
-            error_code = int(error_code)
-            error_message = error_message.strip(' "')
+            error_code, error_message = self._parse_error(self._ask(self._error_query_command))
         return (error_code, error_message)
 
 
@@ -152,12 +155,18 @@ class SystemSetup(extra.common.SystemSetup):
         
         self._write("*lrn?")
         
-        return self._read_raw()
+        data = self._read_raw()
+        self._setup_fetched(data)
+        return data
     
     def _system_load_setup(self, data):
         if self._driver_operation_simulate:
             return
         
+        if self._setup_unchanged(data):
+            return
+        
         self._write_raw(data)
         
-        self.driver_operation.invalidate_all_attributes()
+        self._cache_operation('system.load_setup')
+        self._setup_loaded(data)
@@ -82,6 +82,9 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
            dmm.Base):
     "Generic SCPI IVI DMM driver"
     
+    # range settings are per measurement function
+    _cache_dependencies = {'measurement_function': ['range', 'auto_range', 'resolution']}
+    
     def __init__(self, *args, **kwargs):
         self.__dict__.setdefault('_instrument_id', '')
         
@@ -149,9 +152,6 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
             self._write(":sense:function '%s'" % MeasurementFunctionMapping[value])
         self._measurement_function = value
         self._set_cache_valid()
-        self._set_cache_valid(False, 'range')
-        self._set_cache_valid(False, 'auto_range')
-        self._set_cache_valid(False, 'resolution')
     
     def _get_range(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
@@ -289,7 +289,8 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
     
     def _measurement_read(self, max_time):
         if not self._driver_operation_simulate:
-            return float(self._ask(":read?"))
+            self._wait_for_operation_complete(":initiate", max_time)
+            return float(self._ask(":fetch?"))
         return 0.0
     
     
@@ -0,0 +1,623 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+
+# Instrument server
+#
+# Hosts driver instances in one process and serves their properties and
+# methods to other processes over a Unix domain socket or a local TCP socket.
+# Every message is a 4 byte big endian length followed by a JSON object.
+#
+# Requests:
+#
+#   {"id": 1, "op": "get", "instrument": "scope", "path": "channels[0].scale"}
+#   {"id": 2, "op": "set", "instrument": "scope", "path": "channels[0].scale", "value": 0.5}
+#   {"id": 3, "op": "call", "instrument": "scope", "path": "measurement.fetch_waveform",
+#    "args": ["channel1"], "kwargs": {}}
+#   {"id": 4, "op": "list"}
+#
+# Requests may set "shm": true if the client can read shared memory, large
+# results are then returned in shared memory blocks that stay valid until
+# the client sends its next request.
+#
+# Responses:
+#
+#   {"id": 1, "result": 0.5}
+#   {"id": 1, "error": "ValueNotSupportedException", "module": "ivi.ivi", "message": ""}
+#
+# Values that JSON cannot represent are encoded as objects with a single
+# key: {"__tuple__": [...]}, {"__bytes__": base64}, {"__ndarray__": {dtype,
+# shape, data or shm, pairs}}, {"__waveform__": {raw, scaling}}.  A list of (x, y) pairs, as returned by
+# fetch_waveform, is sent as an n x 2 array and converted back by the client.
+
+import base64
+import collections
+import json
+import os
+import re
+import socket
+import struct
+import sys
+import threading
+
+import numpy as np
+
+from . import ivi
+from . import scope
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+# results of at least this many bytes are passed through shared memory
+# to clients on the same machine
+shared_memory_threshold = 65536
+# longest message accepted from the socket
+max_message_size = 256 * 1024 * 1024
+
+_length = struct.Struct('>I')
+_waveform_scaling = ('x_increment', 'x_origin', 'x_reference',
+        'y_increment', 'y_origin', 'y_reference', 'hole')
+_path_re = re.compile(r'(?:^|\.)([A-Za-z]\w*)|\[\s*([^\]]*?)\s*\]')
+
+class ServerException(ivi.IviException): pass
+
+def _send_message(sock, message):
+    data = json.dumps(message).encode('utf-8')
+    sock.sendall(_length.pack(len(data)) + data)
+
+def _recv_exactly(sock, n):
+    data = b''
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+def _recv_message(sock):
+    "Receive a message, returns None when the connection is closed"
+    header = _recv_exactly(sock, _length.size)
+    if header is None:
+        return None
+    length = _length.unpack(header)[0]
+    if length > max_message_size:
+        raise ValueError("Message of %d bytes exceeds max_message_size" % length)
+    data = _recv_exactly(sock, length)
+    if data is None:
+        return None
+    return json.loads(data.decode('utf-8'))
+
+def _open_shared_memory(name):
+    "Attach to a shared memory block without handing it to the resource tracker"
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name)
+        if shm._name not in _owned_blocks:
+            # before Python 3.13 attaching registers the block, and the
+            # tracker would remove it when this process exits
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, 'shared_memory')
+            except Exception:
+                pass
+        return shm
+
+# names of the blocks created by servers in this process
+_owned_blocks = set()
+
+def _is_binary_str(value):
+    "Check for a Python 2 str holding bytes that are not UTF-8 text"
+    if bytes is not str or not isinstance(value, str):
+        return False
+    try:
+        value.decode('utf-8')
+    except UnicodeDecodeError:
+        return True
+    return False
+
+def _encode(value, blocks=None):
+    """Encode a value for JSON, large arrays and byte strings are placed in
+    new shared memory blocks appended to blocks if it is not None"""
+    if value is None or (isinstance(value, (bool, int, float, str)) and
+            not _is_binary_str(value)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, tuple):
+        return {'__tuple__': [_encode(v, blocks) for v in value]}
+    if isinstance(value, bytes):
+        if blocks is not None and len(value) >= shared_memory_threshold:
+            return {'__bytes__': _encode(np.frombuffer(value, np.uint8), blocks)}
+        return {'__bytes__': base64.b64encode(value).decode('ascii')}
+    if isinstance(value, np.ndarray):
+        value = np.ascontiguousarray(value)
+        enc = {'dtype': value.dtype.str, 'shape': list(value.shape)}
+        if blocks is not None and value.nbytes >= shared_memory_threshold:
+            shm = shared_memory.SharedMemory(create=True, size=value.nbytes)
+            _owned_blocks.add(shm._name)
+            shm.buf[:value.nbytes] = value.tobytes()
+            blocks.append(shm)
+            enc['shm'] = shm.name
+        else:
+            enc['data'] = base64.b64encode(value.tobytes()).decode('ascii')
+        return {'__ndarray__': enc}
+    if isinstance(value, scope.Waveform):
+        enc = dict((k, getattr(value, k)) for k in _waveform_scaling)
+        enc['raw'] = _encode(value.raw, blocks)
+        return {'__waveform__': enc}
+    if isinstance(value, list):
+        if len(value) > 16 and isinstance(value[0], tuple) and len(value[0]) == 2:
+            # waveform as a list of (x, y) pairs
+            try:
+                arr = np.array(value, dtype=float)
+            except (TypeError, ValueError):
+                arr = None
+            if arr is not None and arr.ndim == 2:
+                enc = _encode(arr, blocks)
+                enc['__ndarray__']['pairs'] = True
+                return enc
+        return [_encode(v, blocks) for v in value]
+    if isinstance(value, dict):
+        return dict((str(k), _encode(v, blocks)) for k, v in value.items())
+    raise TypeError("Cannot send value of type %s" % type(value).__name__)
+
+def _decode(value):
+    "Decode a value encoded with _encode"
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if '__tuple__' in value:
+        return tuple(_decode(v) for v in value['__tuple__'])
+    if '__bytes__' in value:
+        data = value['__bytes__']
+        if isinstance(data, dict):
+            return _decode(data).tobytes()
+        return base64.b64decode(data)
+    if '__waveform__' in value:
+        enc = value['__waveform__']
+        return scope.Waveform(_decode(enc['raw']), **dict((k, enc[k]) for k in _waveform_scaling))
+    if '__ndarray__' in value:
+        enc = value['__ndarray__']
+        dtype = np.dtype(enc['dtype'])
+        shape = tuple(enc['shape'])
+        if 'shm' in enc:
+            shm = _open_shared_memory(enc['shm'])
+            try:
+                count = int(np.prod(shape))
+                arr = np.frombuffer(shm.buf, dtype, count).reshape(shape).copy()
+            finally:
+                shm.close()
+        else:
+            arr = np.frombuffer(base64.b64decode(enc['data']), dtype).reshape(shape).copy()
+        if enc.get('pairs'):
+            return [tuple(p) for p in arr.tolist()]
+        return arr
+    return dict((k, _decode(v)) for k, v in value.items())
+
+def _parse_path(path):
+    "Split a path such as channels[0].scale into attribute names and indices"
+    parts = list()
+    pos = 0
+    for m in _path_re.finditer(path):
+        if m.start() != pos:
+            break
+        pos = m.end()
+        if m.group(1) is not None:
+            parts.append((False, m.group(1)))
+        else:
+            key = m.group(2)
+            if re.match(r'^-?\d+$', key):
+                key = int(key)
+            else:
+                key = key.strip('\'"')
+            parts.append((True, key))
+    if pos != len(path) or not parts or parts[-1][0]:
+        raise ServerException("Invalid path %r" % path)
+    return parts
+
+def _resolve(driver, path):
+    "Returns the object holding the last attribute of a path and its name"
+    parts = _parse_path(path)
+    obj = driver
+    for index, key in parts[:-1]:
+        if index:
+            obj = obj[key]
+        else:
+            obj = getattr(obj, key)
+    return obj, parts[-1][1]
+
+class _Instrument(object):
+    "Driver hosted by the server, requests are executed in order by a worker thread"
+    def __init__(self, name, driver):
+        self.name = name
+        self.driver = driver
+        self.queue = collections.deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.statistics = dict(requests=0, executed=0, coalesced=0)
+        self.thread = threading.Thread(target=self.run, name='ivi.server %s' % name)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, request, reply):
+        with self.cond:
+            self.statistics['requests'] += 1
+            self.queue.append((request, reply))
+            self.cond.notify()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        self.thread.join()
+
+    def _next(self):
+        "Take the next request and the queued requests it can be coalesced with"
+        batch = [self.queue.popleft()]
+        op = batch[0][0]['op']
+        path = batch[0][0].get('path')
+        if op == 'get':
+            # identical gets queued before any set or call get the same result
+            rest = collections.deque()
+            while self.queue and self.queue[0][0]['op'] == 'get':
+                item = self.queue.popleft()
+                if item[0].get('path') == path:
+                    batch.append(item)
+                else:
+                    rest.append(item)
+            rest.extend(self.queue)
+            self.queue = rest
+        elif op == 'set':
+            # only the last of consecutive sets of the same attribute is sent
+            while (self.queue and self.queue[0][0]['op'] == 'set' and
+                    self.queue[0][0].get('path') == path):
+                batch.append(self.queue.popleft())
+        return batch
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.queue and not self.closed:
+                    self.cond.wait()
+                if not self.queue:
+                    return
+                batch = self._next()
+                self.statistics['executed'] += 1
+                self.statistics['coalesced'] += len(batch) - 1
+            request = batch[-1][0]
+            try:
+                result = (self.execute(request), None)
+            except Exception as e:
+                result = (None, e)
+            for request, reply in batch:
+                reply(request, *result)
+
+    def execute(self, request):
+        op = request['op']
+        path = request['path']
+        obj, name = _resolve(self.driver, path)
+        if name.startswith('_'):
+            raise ServerException("Cannot access private member %s" % name)
+        if op == 'get':
+            # the driver decides whether its cached value is still valid
+            return getattr(obj, name)
+        if op == 'set':
+            setattr(obj, name, _decode(request['value']))
+            return None
+        if op == 'call':
+            args = _decode(request.get('args', []))
+            kwargs = _decode(request.get('kwargs', {}))
+            return getattr(obj, name)(*args, **kwargs)
+        raise ServerException("Unknown operation %s" % op)
+
+class _Connection(object):
+    "Client connection, replies are sent from the instrument worker threads"
+    def __init__(self, server, sock):
+        self.server = server
+        self.sock = sock
+        self.lock = threading.Lock()
+        self.blocks = list()
+        self.thread = threading.Thread(target=self.run, name='ivi.server connection')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def release(self):
+        # the client has read the previous result once it sends a request
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+            _owned_blocks.discard(shm._name)
+        self.blocks = list()
+
+    def reply(self, request, result=None, error=None):
+        with self.lock:
+            message = {'id': request.get('id')}
+            if error is None:
+                try:
+                    use_shm = request.get('shm') and shared_memory is not None
+                    message['result'] = _encode(result, self.blocks if use_shm else None)
+                except Exception as e:
+                    error = e
+            if error is not None:
+                message = {'id': request.get('id'), 'error': error.__class__.__name__,
+                        'module': error.__class__.__module__, 'message': str(error)}
+            try:
+                _send_message(self.sock, message)
+            except (IOError, OSError):
+                pass
+
+    def run(self):
+        try:
+            while True:
+                try:
+                    request = _recv_message(self.sock)
+                except (IOError, OSError, ValueError):
+                    break
+                if request is None:
+                    break
+                with self.lock:
+                    self.release()
+                self.server._handle(request, self.reply)
+        finally:
+            self.close()
+
+    def close(self):
+        with self.lock:
+            self.release()
+            try:
+                self.sock.close()
+            except (IOError, OSError):
+                pass
+        self.server._remove_connection(self)
+
+class InstrumentServer(object):
+    """Serves drivers to several client processes
+
+    Each driver is used by one worker thread that executes the requests of
+    all clients in order.  Identical gets waiting in the queue are answered
+    with a single read, and consecutive sets of the same attribute only send
+    the last value.  Every other get is passed to the driver, which serves
+    it from its own cache according to its cache policies.
+
+    address is a path for a Unix domain socket or a (host, port) tuple, by
+    default a free port on the loopback interface.  Example:
+
+    server = ivi.server.InstrumentServer('/tmp/ivi.sock')
+    server.add_driver('scope', ivi.agilent.agilentMSO7104A("TCPIP0::192.168.1.104::INSTR"))
+    server.serve_forever()
+    """
+    def __init__(self, address=None):
+        if address is None:
+            address = ('127.0.0.1', 0)
+        self.address = address
+        self.instruments = dict()
+        self.connections = list()
+        self.lock = threading.Lock()
+        self.sock = None
+        self.thread = None
+
+    def add_driver(self, name, driver):
+        "Serve an initialized driver under name"
+        with self.lock:
+            if name in self.instruments:
+                raise ServerException("Instrument %s already added" % name)
+            self.instruments[name] = _Instrument(name, driver)
+
+    def get_statistics(self):
+        "Request counts per instrument"
+        with self.lock:
+            return dict((name, dict(inst.statistics)) for name, inst in self.instruments.items())
+
+    def start(self):
+        "Start serving in a background thread"
+        if isinstance(self.address, str):
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.bind(self.address)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.sock.bind(self.address)
+            self.address = self.sock.getsockname()
+        self.sock.listen(16)
+        self.thread = threading.Thread(target=self._accept, name='ivi.server')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def serve_forever(self):
+        "Serve until close is called"
+        if self.thread is None:
+            self.start()
+        while self.thread.is_alive():
+            self.thread.join(1.0)
+
+    def close(self):
+        "Stop serving, the drivers are not closed"
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except (IOError, OSError):
+                pass
+            self.sock.close()
+            self.sock = None
+            if isinstance(self.address, str) and os.path.exists(self.address):
+                os.unlink(self.address)
+        if self.thread is not None:
+            self.thread.join()
+        with self.lock:
+            connections = list(self.connections)
+        for conn in connections:
+            try:
+                conn.sock.shutdown(socket.SHUT_RDWR)
+            except (IOError, OSError):
+                pass
+            conn.thread.join()
+        for inst in self.instruments.values():
+            inst.close()
+
+    def _accept(self):
+        while True:
+            try:
+                sock, addr = self.sock.accept()
+            except (IOError, OSError, AttributeError):
+                return
+            with self.lock:
+                self.connections.append(_Connection(self, sock))
+
+    def _remove_connection(self, conn):
+        with self.lock:
+            if conn in self.connections:
+                self.connections.remove(conn)
+
+    def _handle(self, request, reply):
+        if request.get('op') == 'list':
+            with self.lock:
+                reply(request, sorted(self.instruments))
+            return
+        inst = self.instruments.get(request.get('instrument'))
+        if inst is None:
+            reply(request, error=ServerException("Unknown instrument %s" % request.get('instrument')))
+            return
+        inst.submit(request, reply)
+
+class RemoteInstrument(object):
+    "Instrument served by an InstrumentServer, see Client.instrument"
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def get(self, path):
+        "Read a property, for example get('channels[0].scale')"
+        return self.client.get(self.name, path)
+
+    def set(self, path, value):
+        "Write a property"
+        self.client.set(self.name, path, value)
+
+    def call(self, path, *args, **kwargs):
+        "Call a method, for example call('measurement.fetch_waveform', 'channel1')"
+        return self.client.call(self.name, path, *args, **kwargs)
+
+class Client(object):
+    """Connection to an InstrumentServer
+
+    Example:
+
+    client = ivi.server.Client('/tmp/ivi.sock')
+    scope = client.instrument('scope')
+    scope.set('channels[0].scale', 0.5)
+    waveform = scope.call('measurement.fetch_waveform', 'channel1')
+    """
+    def __init__(self, address, timeout=None):
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            local = True
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            local = address[0] in ('127.0.0.1', 'localhost', '::1')
+        self.sock.settimeout(timeout)
+        self.sock.connect(address)
+        self.use_shared_memory = local and shared_memory is not None
+        self.lock = threading.Lock()
+        self.last_id = 0
+
+    def close(self):
+        self.sock.close()
+
+    def _request(self, request):
+        with self.lock:
+            self.last_id += 1
+            request['id'] = self.last_id
+            if self.use_shared_memory:
+                request['shm'] = True
+            _send_message(self.sock, request)
+            response = _recv_message(self.sock)
+            if response is None:
+                raise ivi.IOException("Connection closed by server")
+            if 'error' in response:
+                raise self._exception(response)
+            return _decode(response.get('result'))
+
+    def _exception(self, response):
+        "Exception matching an error response"
+        name = response['error']
+        module = sys.modules.get(response.get('module', ''))
+        cls = None
+        if module is not None and module.__name__.split('.')[0] in ('ivi', 'builtins', 'exceptions'):
+            cls = getattr(module, name, None)
+        if isinstance(cls, type) and issubclass(cls, Exception):
+            try:
+                return cls(response['message'])
+            except Exception:
+                pass
+        return ServerException("%s: %s" % (name, response['message']))
+
+    def list(self):
+        "Names of the served instruments"
+        return self._request({'op': 'list'})
+
+    def instrument(self, name):
+        return RemoteInstrument(self, name)
+
+    def get(self, instrument, path):
+        return self._request({'op': 'get', 'instrument': instrument, 'path': path})
+
+    def set(self, instrument, path, value):
+        self._request({'op': 'set', 'instrument': instrument, 'path': path,
+                'value': _encode(value)})
+
+    def call(self, instrument, path, *args, **kwargs):
+        return self._request({'op': 'call', 'instrument': instrument, 'path': path,
+                'args': _encode(list(args)), 'kwargs': _encode(kwargs)})
+
+def main(argv=None):
+    "Command line entry point: python -m ivi.server ADDRESS NAME=DRIVER:RESOURCE ..."
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve IVI drivers to other processes")
+    parser.add_argument('address', help="Unix socket path or TCP port on the loopback interface")
+    parser.add_argument('instruments', nargs='+', metavar='NAME=DRIVER:RESOURCE')
+    args = parser.parse_args(argv)
+
+    address = args.address
+    if address.isdigit():
+        address = ('127.0.0.1', int(address))
+    server = InstrumentServer(address)
+    for spec in args.instruments:
+        name, spec = spec.split('=', 1)
+        driver, resource = spec.split(':', 1)
+        server.add_driver(name, ivi.get_driver_class(driver)(resource))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.close()
+
+if __name__ == '__main__':
+    main()
@@ -66,7 +66,7 @@ class Base(ivi.IviContainer):
         self._acquisition_sweep_mode_continuous = True
         self._sweep_coupling_sweep_time = 1e-1
         self._sweep_coupling_sweep_time_auto = False
-        self._trace_name = list()
+        self._trace_name = ivi.SelectorList()
         self._trace_type = list()
         self._acquisition_vertical_scale = 'logarithmic'
         self._sweep_coupling_video_bandwidth = 1e2
@@ -377,7 +377,7 @@ class Base(ivi.IviContainer):
         except AttributeError:
             pass
         
-        self._trace_name = list()
+        self._trace_name = ivi.SelectorList()
         self._trace_type = list()
         for i in range(self._trace_count):
             self._trace_name.append("trace%d" % (i+1))
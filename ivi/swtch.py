@@ -67,7 +67,7 @@ class Base(ivi.IviContainer):
         grp = 'Base'
         ivi.add_group_capability(self, cls+grp)
         
-        self._channel_name = list()
+        self._channel_name = ivi.SelectorList()
         self._channel_characteristics_ac_current_carry_max = list()
         self._channel_characteristics_ac_current_switching_max = list()
         self._channel_characteristics_ac_power_carry_max = list()
@@ -518,7 +518,7 @@ class Base(ivi.IviContainer):
         except AttributeError:
             pass
         
-        self._channel_name = list()
+        self._channel_name = ivi.SelectorList()
         self._channel_characteristics_ac_current_carry_max = list()
         self._channel_characteristics_ac_current_switching_max = list()
         self._channel_characteristics_ac_power_carry_max = list()
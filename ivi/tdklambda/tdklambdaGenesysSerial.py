@@ -26,10 +26,14 @@ THE SOFTWARE.
 
 from ivi import ivi
 from ivi import dcpwr
+from ivi.interface import multidrop
 
 class tdklambdaGenesysSerial(ivi.Driver, dcpwr.Base, dcpwr.Measurement):
     "TDK-Lambda Genesys IVI DC power supply driver - RS232/RS485 dialect only"
     
+    # serial port opened for this driver and wrapped in a bus unit
+    _owned_port = None
+    
     def __init__(self, *args, **kwargs):
         self.__dict__.setdefault('_instrument_id', '')
                 
@@ -66,17 +70,23 @@ class tdklambdaGenesysSerial(ivi.Driver, dcpwr.Base, dcpwr.Measurement):
         
         super(tdklambdaGenesysSerial, self)._initialize(resource, id_query, reset, **keywargs)
 
-        self._set_termination_character('\r') # termination character: CR
-        # specific serial port configuration for this instrument
-        if type(self._interface) is not ivi.pyserial.SerialInstrument:
-            raise ivi.IviDriverException("The tdklambdaGenesysSerial driver is only for RS232/RS485 interface")
-        self._interface.message_delay = 0.1 # 100ms delay after each command
-        self._interface.timeout = 1
-        self._interface.update_settings()
-#        self._interface.serial.flush()
-        
-        # select address 6 (factory default)
-        self._ask("ADR 6")
+        if not self._driver_operation_simulate:
+            if isinstance(self._interface, multidrop.MultiDropUnit):
+                # unit on a shared multi-drop bus, the bus takes care of addressing
+                port = self._interface.bus.interface
+            elif 'pyserial' in ivi.__dict__ and type(self._interface) is ivi.pyserial.SerialInstrument:
+                # single supply on its own port at address 6 (factory default)
+                port = self._interface
+                self._owned_port = port
+                self._interface = multidrop.MultiDropBus(port).unit(6)
+            else:
+                raise ivi.IviDriverException("The tdklambdaGenesysSerial driver is only for RS232/RS485 interface")
+            
+            # specific serial port configuration for this instrument
+            port.term_char = '\r' # termination character: CR
+            port.message_delay = 0.1 # 100ms delay after each command
+            port.timeout = 1
+            port.update_settings()
         
         # interface clear
         if not self._driver_operation_simulate:
@@ -103,6 +113,15 @@ class tdklambdaGenesysSerial(ivi.Driver, dcpwr.Base, dcpwr.Measurement):
         self._output_spec[0]['current_max'] = max_current
         self._output_spec[0]['ovp_max'] = max_voltage*1.05 
     
+    def _close(self):
+        "Closes an IVI session"
+        if self._owned_port is not None:
+            # close the port or check it back into the session pool, units
+            # on a bus handed to the driver leave the port open
+            self._interface = self._owned_port
+            self._owned_port = None
+        super(tdklambdaGenesysSerial, self)._close()
+    
     def _clear(self):
         self._ask("CLS")
     
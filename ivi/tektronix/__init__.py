@@ -24,22 +24,27 @@ THE SOFTWARE.
 
 """
 
-# Function Generators
-from .tektronixAWG2005 import tektronixAWG2005
-from .tektronixAWG2020 import tektronixAWG2020
-from .tektronixAWG2021 import tektronixAWG2021
-from .tektronixAWG2040 import tektronixAWG2040
-from .tektronixAWG2041 import tektronixAWG2041
-
-# Power Supplies
-from .tektronixPS2520G import tektronixPS2520G
-from .tektronixPS2521G import tektronixPS2521G
-
-# Optical attenuators
-from .tektronixOA5002 import tektronixOA5002
-from .tektronixOA5012 import tektronixOA5012
-from .tektronixOA5022 import tektronixOA5022
-from .tektronixOA5032 import tektronixOA5032
-
-# Current probe amplifiers
-from .tektronixAM5030 import tektronixAM5030
+from .. import ivi
+
+__all__ = [
+        # Function Generators
+        "tektronixAWG2005",
+        "tektronixAWG2020",
+        "tektronixAWG2021",
+        "tektronixAWG2040",
+        "tektronixAWG2041",
+
+        # Power Supplies
+        "tektronixPS2520G",
+        "tektronixPS2521G",
+
+        # Optical attenuators
+        "tektronixOA5002",
+        "tektronixOA5012",
+        "tektronixOA5022",
+        "tektronixOA5032",
+
+        # Current probe amplifiers
+        "tektronixAM5030"]
+
+__getattr__, __dir__ = ivi.register_drivers(__name__, __all__)
@@ -0,0 +1,59 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+Import time benchmark
+
+Each case runs in a fresh interpreter so nothing is cached in sys.modules.
+
+    python -m ivi.test.bench_import [repeat]
+
+"""
+
+import subprocess
+import sys
+
+cases = [
+        ("import ivi", "import ivi"),
+        ("one driver", "import ivi; ivi.agilent.agilentDSOX2002A"),
+        ("all drivers", "import ivi; [ivi.get_driver_class(n) for n in list(ivi.driver_registry)]")
+    ]
+
+template = """
+import time
+t = time.time()
+%s
+print(time.time() - t)
+"""
+
+def run(statement):
+    out = subprocess.check_output([sys.executable, '-c', template % statement])
+    return float(out.decode().split()[-1])
+
+def main(repeat=5):
+    for name, statement in cases:
+        times = [run(statement) for i in range(repeat)]
+        print("%-12s min %8.1f ms  avg %8.1f ms" % (name, min(times)*1e3, sum(times)/len(times)*1e3))
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
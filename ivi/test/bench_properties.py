@@ -0,0 +1,68 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+Property access benchmark
+
+Times the get and set paths of the property tree on a simulated scope.
+
+    python -m ivi.test.bench_properties [number]
+
+"""
+
+import io
+import sys
+import timeit
+
+import ivi
+
+# name, statement, fraction of the iterations to run
+cases = [
+        ("private member", "scope._channel_count", 1),
+        ("driver method", "scope._get_cache_valid", 1),
+        ("top level get", "scope.driver_operation.simulate", 1),
+        ("nested get", "scope.trigger.edge.slope", 1),
+        ("indexed get", "scope.channels[0].range", 1),
+        ("indexed by name", "scope.channels['channel1'].offset", 1),
+        ("indexed set", "scope.channels[0].range = 1.0", 100),
+        ("construct driver", "ivi.agilent.agilentMSOX4154A(simulate=True)", 1000)
+    ]
+
+def main(number=20000):
+    stdout = sys.stdout
+    sys.stdout = io.StringIO()
+    try:
+        scope = ivi.agilent.agilentMSOX4154A(simulate=True)
+        env = {'ivi': ivi, 'scope': scope}
+        results = list()
+        for name, statement, fraction in cases:
+            n = max(number // fraction, 1)
+            t = min(timeit.repeat(statement, globals=env, number=n, repeat=3))
+            results.append((name, t / n))
+    finally:
+        sys.stdout = stdout
+    for name, t in results:
+        print("%-18s %10.3f us" % (name, t*1e6))
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
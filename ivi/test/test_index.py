@@ -0,0 +1,117 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import ivi
+
+class VirtualInstrument(object):
+    def __init__(self, idn):
+        self.idn = idn
+        self.queries = list()
+        self.response = b''
+        self.closed = False
+
+    def write_raw(self, data):
+        self.queries.append(data)
+        if data.strip() == b'*IDN?':
+            self.response = self.idn.encode('utf-8') + b'\n'
+
+    def read_raw(self, num=-1):
+        data, self.response = self.response, b''
+        return data
+
+    def clear(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+class TestIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        ivi.set_cache_dir(self.cache_dir)
+        ivi.index._index = None
+
+    def tearDown(self):
+        ivi.set_cache_dir(None)
+        ivi.index._index = None
+        shutil.rmtree(self.cache_dir)
+
+    def test_find_drivers(self):
+        self.assertEqual(ivi.index.find_drivers('AGILENT TECHNOLOGIES,DSO-X 2002A,MY123,02.35'),
+                ['ivi.agilent.agilentDSOX2002A'])
+        self.assertEqual(ivi.index.find_drivers('Agilent Technologies, E4433B, US123, B.03.50'),
+                ['ivi.agilent.agilentE4433B'])
+        self.assertEqual(ivi.index.find_drivers('AGILENT TECHNOLOGIES,DSA90254A,MY123,1.0'),
+                ['ivi.agilent.agilentDSA90254A'])
+        self.assertEqual(ivi.index.find_drivers('TestEquity,8099,0,1.0'),
+                ['ivi.testequity.testequity140'])
+        self.assertEqual(ivi.index.find_drivers('ACME,WIDGET,0,1.0'), [])
+        self.assertEqual(ivi.index.find_drivers('garbage'), [])
+
+    def test_index_cached(self):
+        ivi.index.get_index()
+        filename = os.path.join(self.cache_dir, 'driver_index.json')
+        self.assertTrue(os.path.exists(filename))
+        ivi.index._index = None
+        mtime = os.stat(filename).st_mtime
+        self.assertTrue('DSOX2002A' in ivi.index.get_index())
+        self.assertEqual(os.stat(filename).st_mtime, mtime)
+
+    def test_open(self):
+        instr = VirtualInstrument('AGILENT TECHNOLOGIES,DSO-X 2002A,MY123,02.35')
+        scope = ivi.open(instr)
+        self.assertTrue(isinstance(scope, ivi.agilent.agilentDSOX2002A))
+        self.assertTrue(scope._interface is instr)
+        self.assertEqual(instr.queries.count(b'*IDN?'), 1)
+        self.assertFalse(instr.closed)
+
+    def test_open_id_query(self):
+        instr = VirtualInstrument('AGILENT TECHNOLOGIES,DSO-X 2002A,MY123,02.35')
+        open_interface = ivi.Driver._open_interface
+        ivi.Driver._open_interface = lambda self, resource: instr
+        try:
+            scope = ivi.open('TCPIP0::10.0.0.1::INSTR', id_query=True, identity_cache=True)
+        finally:
+            ivi.Driver._open_interface = open_interface
+        self.assertEqual(scope._driver_operation_io_resource_descriptor, 'TCPIP0::10.0.0.1::INSTR')
+        self.assertEqual(scope.identity.instrument_serial_number, 'MY123')
+        # the probe's response is used for the identity cache and the id query
+        self.assertEqual(instr.queries.count(b'*IDN?'), 1)
+        self.assertEqual(scope._identity_cache_id, 'AGILENT TECHNOLOGIES,DSO-X 2002A,MY123,02.35')
+
+    def test_open_unknown(self):
+        instr = VirtualInstrument('ACME,WIDGET,0,1.0')
+        self.assertRaises(ivi.IviException, ivi.open, instr)
+        self.assertTrue(instr.closed)
+
+if __name__ == '__main__':
+    unittest.main()
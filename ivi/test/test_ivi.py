@@ -24,9 +24,23 @@ THE SOFTWARE.
 
 """
 
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
 
+import numpy
+
 import ivi
+from ivi import counter
+from ivi import scpi
+from ivi.test import virtual
 
 class TestIndex(unittest.TestCase):
 
@@ -57,5 +71,752 @@ class TestIndex(unittest.TestCase):
         self.assertRaises(ivi.SelectorRangeException, ivi.get_index, self.index_dict, 100);
         self.assertRaises(ivi.SelectorNameException, ivi.get_index, self.index_dict, 'bad_item');
 
+class TestSchema(unittest.TestCase):
+
+    def test_shared_docs(self):
+        a = ivi.agilent.agilentDSOX2002A(simulate=True)
+        b = ivi.agilent.agilentDSOX2002A(simulate=True)
+        self.assertTrue(a.channels._docs['range'] is b.channels._docs['range'])
+        self.assertEqual(a.channels._docs['range'].name, 'channels[].range')
+        schema = ivi.get_schema(ivi.agilent.agilentDSOX2002A)
+        self.assertTrue(len(schema) > 0)
+
+    def test_doc_trimmed_lazily(self):
+        doc = ivi.Doc("""
+            First line
+            
+                indented
+            """)
+        self.assertTrue(doc._doc is None)
+        self.assertEqual(str(doc), 'First line\n\n    indented')
+
+    def test_changed_doc(self):
+        class Container(ivi.IviContainer):
+            def __init__(self, text):
+                super(Container, self).__init__()
+                self._add_property('value', lambda: 1, None, None, ivi.Doc(text))
+
+        self.assertEqual(str(Container('one')._docs['value']), 'one')
+        self.assertEqual(str(Container('two')._docs['value']), 'two')
+        self.assertEqual(Container('two').value, 1)
+
+class TestSelector(unittest.TestCase):
+
+    def setUp(self):
+        self.names = ['channel1', 'channel2', 'digital0', 'digital1']
+
+    def test_aliases(self):
+        for l in (self.names, ivi.get_index_dict(self.names)):
+            self.assertEqual(ivi.get_index(l, 'CH1'), 0)
+            self.assertEqual(ivi.get_index(l, 'Channel2'), 1)
+            self.assertEqual(ivi.get_index(l, 'D1'), 3)
+            self.assertRaises(ivi.SelectorNameException, ivi.get_index, l, 'CH3')
+
+    def test_ambiguous_alias(self):
+        l = ['chan1', 'channel1']
+        self.assertEqual(ivi.get_index(l, 'channel1'), 1)
+        self.assertEqual(ivi.get_index(l, 'CHAN1'), 0)
+        self.assertRaises(ivi.SelectorNameException, ivi.get_index, l, 'ch1')
+
+    def test_list_changes(self):
+        for l in (list(), ivi.SelectorList()):
+            self.assertRaises(ivi.SelectorNameException, ivi.get_index, l, 'output1')
+            l.append('output1')
+            self.assertEqual(ivi.get_index(l, 'output1'), 0)
+            l.append('output2')
+            self.assertEqual(ivi.get_index(l, 'OUT2'), 1)
+            del l[:]
+            l.extend(['output2', 'output1'])
+            self.assertEqual(ivi.get_index(l, 'output1'), 1)
+            self.assertEqual(ivi.get_index(l, 'output2'), 0)
+            l[0] = 'output3'
+            self.assertEqual(ivi.get_index(l, 'out3'), 0)
+            l += ['output2']
+            self.assertEqual(ivi.get_index(l, 'output2'), 2)
+
+    def test_selector_list(self):
+        l = ivi.SelectorList(self.names)
+        self.assertEqual(l, self.names)
+        self.assertEqual(ivi.get_index(l, 'digital0'), 2)
+        m = l._selector_map
+        self.assertTrue(m is not None)
+        self.assertEqual(ivi.get_index(l, 'D1'), 3)
+        self.assertTrue(l._selector_map is m)
+        l.insert(0, 'channel0')
+        self.assertTrue(l._selector_map is None)
+        self.assertEqual(ivi.get_index(l, 'digital0'), 3)
+        l[0:1] = []
+        self.assertEqual(ivi.get_index(l, 'digital0'), 2)
+        del l[:]
+        self.assertRaises(ivi.SelectorNameException, ivi.get_index, l, 'digital0')
+        self.assertEqual(ivi.get_index(ivi.SelectorList([['a'], ['b']]), ['b']), 1)
+        scope = ivi.agilent.agilentDSOX2002A(simulate=True)
+        self.assertTrue(isinstance(scope._channel_name, ivi.SelectorList))
+
+    def test_collection(self):
+        scope = ivi.agilent.agilentDSOX2002A(simulate=True)
+        self.assertTrue(scope.channels['CH2'] is scope.channels[1])
+
+class TestPropertyCollection(unittest.TestCase):
+
+    def setUp(self):
+        self.value = 0
+        self.obj = ivi.property_collection_class('node')()
+        self.obj._add_property('value', self._get_value, self._set_value, None, 'doc')
+        self.obj._add_property('read_only', self._get_value)
+        self.obj._add_method('method', self._get_value)
+
+    def _get_value(self):
+        return self.value
+
+    def _set_value(self, value):
+        self.value = value
+
+    def test_descriptor(self):
+        self.assertTrue(isinstance(type(self.obj).__dict__['value'], ivi.ManagedProperty))
+        self.obj.value = 5
+        self.assertEqual(self.value, 5)
+        self.assertEqual(self.obj.value, 5)
+        self.assertEqual(self.obj.method(), 5)
+        self.assertRaises(AttributeError, setattr, self.obj, 'read_only', 1)
+        self.assertRaises(AttributeError, delattr, self.obj, 'value')
+
+    def test_lock(self):
+        self.obj.other = 1
+        self.obj._lock()
+        self.obj.other = 2
+        self.assertEqual(self.obj.other, 2)
+        self.assertRaises(AttributeError, setattr, self.obj, 'new_member', 1)
+        self.obj.value = 3
+        self.assertEqual(self.value, 3)
+        self.obj._unlock()
+        self.obj.new_member = 1
+
+    def test_base_class(self):
+        a = ivi.PropertyCollection()
+        b = ivi.PropertyCollection()
+        a._add_property('value', self._get_value, self._set_value)
+        b._add_property('other', self._get_value)
+        a.value = 4
+        self.assertEqual(a.value, 4)
+        self.assertEqual(b.other, 4)
+        self.assertTrue(isinstance(a, ivi.PropertyCollection))
+        self.assertFalse(type(a) is type(b))
+        self.assertFalse('value' in ivi.PropertyCollection.__dict__)
+        self.assertRaises(AttributeError, getattr, b, 'value')
+        self.assertRaises(AttributeError, getattr, ivi.PropertyCollection(), 'value')
+
+    def test_shared_class(self):
+        a = ivi.agilent.agilentDSOX2002A(simulate=True)
+        b = ivi.agilent.agilentDSOX2002A(simulate=True)
+        self.assertTrue(type(a.trigger.edge) is type(b.trigger.edge))
+        self.assertTrue(type(a.channels[0]) is type(b.channels[1]))
+        a.channels[1].range = 2.0
+        self.assertEqual(a.channels[1].range, 2.0)
+        self.assertNotEqual(b.channels[1].range, 2.0)
+
+class TestIndexedPropertyCollection(unittest.TestCase):
+
+    def setUp(self):
+        self.values = [0, 10, 20]
+        self.obj = ivi.IndexedPropertyCollection()
+        self.obj._add_property('value', self.values.__getitem__, self.values.__setitem__)
+        self.obj._add_property('sub.value', self.values.__getitem__)
+        self.obj._set_list(['a', 'b', 'c'])
+
+    def test_lazy_entries(self):
+        self.assertEqual(self.obj._objs, [None, None, None])
+        self.assertEqual(self.obj['b'].value, 10)
+        self.assertTrue(self.obj._objs[0] is None)
+        self.assertTrue(self.obj[1] is self.obj['b'])
+        self.assertEqual(len(self.obj), 3)
+
+    def test_iteration(self):
+        self.assertEqual([o.sub.value for o in self.obj], [0, 10, 20])
+        self.assertTrue(None not in self.obj._objs)
+        self.obj[2].value = 5
+        self.assertEqual(self.values[2], 5)
+
+    def test_set_list(self):
+        self.obj['a']
+        self.obj._set_list(['a', 'b'])
+        self.assertEqual(self.obj._objs, [None, None])
+        self.assertRaises(ivi.SelectorNameException, self.obj.__getitem__, 'c')
+
+class VirtualInstrument(object):
+    "Instrument that completes operations after a delay"
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.log = list()
+        self.response = b''
+        self.complete_time = None
+
+    def write_raw(self, data):
+        for cmd in data.decode().strip().split(';'):
+            self.log.append(cmd)
+            if cmd == '*OPC':
+                self.complete_time = time.time() + self.delay
+            elif cmd == '*ESR?':
+                self.response = b'1\n'
+            elif cmd == '*ESE?':
+                self.response = b'4\n'
+            elif cmd == '*SRE?':
+                self.response = b'16\n'
+
+    def read_raw(self, num=-1):
+        data, self.response = self.response, b''
+        return data
+
+    def read_stb(self):
+        self.log.append('stb')
+        if self.complete_time is not None and time.time() >= self.complete_time:
+            return ivi.STB_ESB
+        return 0
+
+class VirtualSrqInstrument(VirtualInstrument):
+    def wait_for_srq(self, timeout=None):
+        self.log.append('srq')
+        remaining = self.complete_time - time.time()
+        if timeout is not None and remaining > timeout:
+            time.sleep(timeout)
+            return None
+        time.sleep(max(remaining, 0))
+        return ivi.STB_ESB | ivi.STB_RQS
+
+class TestCompletion(unittest.TestCase):
+
+    def test_wait_until(self):
+        drv = ivi.Driver()
+        start = time.time()
+        self.assertRaises(ivi.MaxTimeoutExceededException, drv._wait_until, lambda: False, 0.05)
+        self.assertTrue(0.05 <= time.time() - start < 0.5)
+        end = time.time() + 0.02
+        drv._wait_until(lambda: time.time() >= end, None)
+
+    def test_polling(self):
+        instr = VirtualInstrument(0.02)
+        drv = ivi.Driver(instr)
+        drv._wait_for_operation_complete(':digitize', 1.0)
+        self.assertEqual(instr.log[:5], ['*ESR?', '*ESE?', '*ESE 1', ':digitize', '*OPC'])
+        self.assertEqual(instr.log[-3:-1], ['stb', '*ESE 4'])
+        self.assertTrue(instr.log.count('stb') > 1)
+        # polling backs off, so a 20 ms wait takes only a handful of polls
+        self.assertTrue(instr.log.count('stb') < 15)
+
+        instr = VirtualInstrument(1.0)
+        drv = ivi.Driver(instr)
+        self.assertRaises(ivi.MaxTimeoutExceededException, drv._wait_for_operation_complete, None, 0.05)
+
+    def test_srq(self):
+        instr = VirtualSrqInstrument(0.02)
+        drv = ivi.Driver(instr)
+        drv._wait_for_operation_complete(':initiate', 1.0)
+        self.assertEqual(instr.log, ['*ESR?', '*ESE?', '*SRE?', '*ESE 1', '*SRE 32', ':initiate', '*OPC',
+                'srq', '*ESE 4', '*SRE 16', '*ESR?'])
+
+        instr = VirtualSrqInstrument(1.0)
+        drv = ivi.Driver(instr)
+        self.assertRaises(ivi.MaxTimeoutExceededException, drv._wait_for_operation_complete, None, 0.05)
+        self.assertEqual(instr.log[-2:], ['*ESE 4', '*SRE 16'])
+
+class CounterDriver(counter.Base, ivi.Driver):
+    "Counter whose measurement completes after a number of status checks"
+    def __init__(self, *args, **kwargs):
+        self.checks = 0
+        super(CounterDriver, self).__init__(*args, **kwargs)
+
+    def _measurement_is_measurement_complete(self):
+        self.checks += 1
+        return 'complete' if self.checks >= 3 else 'in_progress'
+
+    def _measurement_fetch(self):
+        return self.checks
+
+class TestCounterRead(unittest.TestCase):
+
+    def test_read_waits(self):
+        drv = CounterDriver()
+        self.assertEqual(drv.measurement.read(1.0), 3)
+
+class TestPolling(unittest.TestCase):
+
+    def test_status_byte(self):
+        instr = VirtualInstrument(0.05)
+        instr.complete_time = time.time() + 0.05
+        drv = ivi.Driver(instr)
+        stb = drv._wait_for_status_byte(ivi.STB_ESB, maximum_time=1.0, interval=0.005,
+                max_interval=0.02, name='test')
+        self.assertEqual(stb, ivi.STB_ESB)
+        st = drv.driver_operation.wait_statistics['test']
+        self.assertEqual(st['count'], 1)
+        self.assertEqual(st['polls'], instr.log.count('stb'))
+        self.assertTrue(0.05 <= st['last_time'] < 0.5)
+        # 5, 10, 20, 20, ... ms
+        self.assertTrue(3 <= st['polls'] <= 6)
+
+    def test_value(self):
+        instr = VirtualInstrument()
+        drv = ivi.Driver(instr)
+        self.assertEqual(drv._wait_for_status_byte(ivi.STB_MAV, 0, maximum_time=0), 0)
+        self.assertRaises(ivi.MaxTimeoutExceededException, drv._wait_for_status_byte,
+                ivi.STB_MAV, maximum_time=0.01, name='mav')
+        st = drv.driver_operation.wait_statistics['mav']
+        self.assertEqual(st['timeouts'], 1)
+        drv.driver_operation.reset_wait_statistics()
+        self.assertEqual(drv.driver_operation.wait_statistics, {})
+
+    def test_query(self):
+        instr = VirtualInstrument()
+        drv = ivi.Driver(instr)
+        self.assertEqual(drv._wait_for_query('*ESR?', lambda v: int(v) & 1, maximum_time=1), '1')
+        self.assertEqual(drv.driver_operation.wait_statistics['*ESR?']['polls'], 1)
+
+class VirtualErrorQueue(object):
+    "Instrument that logs program messages and keeps an error queue"
+    def __init__(self):
+        self.log = list()
+        self.errors = list()
+        self.response = b''
+
+    def write_raw(self, data):
+        self.log.append(data.decode().strip())
+        responses = list()
+        for cmd in data.decode().strip().split(';'):
+            if cmd == ':system:error?':
+                if self.errors:
+                    responses.append('%d,"%s"' % self.errors.pop(0))
+                else:
+                    responses.append('+0,"No error"')
+            elif cmd == 'BAD':
+                self.errors.append((-113, 'Undefined header'))
+                self.errors.append((-222, 'Data out of range'))
+        self.response = (';'.join(responses) + '\n').encode()
+
+    def read_raw(self, num=-1):
+        data, self.response = self.response, b''
+        return data
+
+class ErrorQueryDriver(scpi.common.ErrorQuery, ivi.Driver):
+    pass
+
+class TestErrorQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.instr = VirtualErrorQueue()
+        self.drv = ErrorQueryDriver(self.instr, query_instr_status=True)
+
+    def test_piggyback(self):
+        self.drv._write(':acquire:type normal')
+        self.assertEqual(self.instr.log, [':acquire:type normal;:system:error?'])
+        # queries and plain drivers are left alone
+        self.drv._ask(':acquire:type?')
+        self.assertEqual(self.instr.log[-1], ':acquire:type?')
+        # the reply to an error query after *OPC waits for the operation
+        self.drv._write(':digitize;*OPC')
+        self.drv._write('*wai')
+        self.assertEqual(self.instr.log[-2:], [':digitize;*OPC', '*wai'])
+        # as does the reply to one after a sequential command
+        self.drv._write(':digitize')
+        self.assertEqual(self.instr.log[-1], ':digitize;:system:error?')
+        self.drv._sequential_commands = (':digitize',)
+        self.drv._write(':DIGitize')
+        self.assertEqual(self.instr.log[-1], ':DIGitize')
+        self.drv.driver_operation.query_instrument_status = False
+        self.drv._write(':acquire:type normal')
+        self.assertEqual(self.instr.log[-1], ':acquire:type normal')
+
+    def test_error(self):
+        try:
+            self.drv._write('BAD')
+            self.fail()
+        except ivi.InstrumentStatusExcpetion as e:
+            self.assertEqual(str(e), '-113, "Undefined header"; -222, "Data out of range"')
+        self.assertEqual(self.instr.log[-1], ':system:error?')
+        self.assertEqual(self.instr.errors, [])
+
+    def test_parse_error(self):
+        self.assertEqual(self.drv._parse_error('-100,"Command ""X"" error"'), (-100, 'Command "X" error'))
+        self.assertEqual(self.drv._parse_error('+0,No error'), (0, 'No error'))
+        self.assertEqual(self.drv.utility.error_query(), (0, 'No error'))
+
+class TestSimulation(unittest.TestCase):
+
+    def test_log(self):
+        class Handler(logging.Handler):
+            def emit(self, record):
+                output.append("%s:%s:%s" % (record.levelname, record.name, record.getMessage()))
+        drv = ivi.Driver(simulate=True)
+        output = []
+        handler = Handler()
+        logger = logging.getLogger('ivi')
+        level = logger.level
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+        try:
+            drv._write(':acquire:type normal')
+            self.assertEqual(drv._ask('*IDN?'), '')
+            drv._trigger()
+            drv._clear()
+        finally:
+            logger.removeHandler(handler)
+            logger.setLevel(level)
+        self.assertEqual(output, [
+                "DEBUG:ivi:[simulating] Write (utf-8) ':acquire:type normal'",
+                "DEBUG:ivi:[simulating] Ask (utf-8) '*IDN?'",
+                "DEBUG:ivi:[simulating] Trigger",
+                "DEBUG:ivi:[simulating] Clear"])
+
+class TestIoStatistics(unittest.TestCase):
+
+    def setUp(self):
+        self.instr = virtual.VirtualInstrument('ACME,SCOPE1,0,1.0')
+        self.instr.add_command(':WAVeform:DATA', 'block', b'\x01' * 1000)
+        self.drv = ivi.Driver(self.instr)
+
+    def test_disabled(self):
+        self.drv._ask('*IDN?')
+        self.assertEqual(self.drv.driver_operation.io_statistics, {})
+
+    def test_statistics(self):
+        events = list()
+        self.drv.driver_operation.record_io_statistics = True
+        self.drv.driver_operation.io_statistics_hook = lambda *args: events.append(args)
+        self.assertEqual(self.drv._ask('*IDN?'), 'ACME,SCOPE1,0,1.0')
+        self.drv._ask('*idn?')
+        self.drv._write(':WAV:DATA?')
+        self.assertEqual(len(self.drv._read_ieee_block()), 1000)
+        self.drv._write_raw(b':wav:data #13abc')
+
+        stats = self.drv.driver_operation.io_statistics
+        self.assertEqual(sorted(stats), ['*idn?', ':wav:data', ':wav:data?'])
+        st = stats['*idn?']
+        self.assertEqual((st['asks'], st['writes'], st['reads']), (2, 0, 0))
+        self.assertEqual((st['bytes_written'], st['bytes_read']), (10, 34))
+        self.assertEqual(sum(st['histogram']), 2)
+        self.assertEqual(len(st['histogram']), len(ivi.io_histogram_bounds) + 1)
+        st = stats[':wav:data?']
+        self.assertEqual((st['writes'], st['reads'], st['bytes_read']), (1, 1, 1000))
+        self.assertEqual(stats[':wav:data']['bytes_written'], 16)
+        self.assertEqual([e[:2] for e in events], [('*idn?', 'ask'), ('*idn?', 'ask'),
+                (':wav:data?', 'write'), (':wav:data?', 'read'), (':wav:data', 'write')])
+
+        self.drv.driver_operation.reset_io_statistics()
+        self.drv.driver_operation.record_io_statistics = False
+        self.drv._ask('*IDN?')
+        self.assertEqual(self.drv.driver_operation.io_statistics, {})
+
+    @unittest.skipIf(sys.version_info < (3,), "str is not text")
+    def test_encoded_length(self):
+        self.drv.driver_operation.record_io_statistics = True
+        self.drv._write(':chan1:label "\u00b5V"')
+        self.assertEqual(self.drv.driver_operation.io_statistics[':chan1:label']['bytes_written'], 18)
+
+    def test_threads(self):
+        class Interface(object):
+            def write_raw(self, data):
+                pass
+            def read_raw(self, num=-1):
+                return b''
+            def ask(self, data, num=-1, encoding='utf-8'):
+                time.sleep(0.0005)
+                return 'ACME,SCOPE1,0,1.0'
+        drv = ivi.Driver(Interface())
+        drv.driver_operation.record_io_statistics = True
+        def worker(header):
+            for i in range(50):
+                drv._ask(header)
+        threads = [threading.Thread(target=worker, args=(h,)) for h in ('*idn?', '*opt?', '*idn?')]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = drv.driver_operation.io_statistics
+        self.assertEqual(stats['*idn?']['asks'], 100)
+        self.assertEqual(stats['*opt?']['asks'], 50)
+        self.assertEqual(stats['*opt?']['bytes_written'], 250)
+
+class TestCacheStatistics(unittest.TestCase):
+
+    def setUp(self):
+        self.instr = virtual.VirtualInstrument('LECROY,WR104XI-A,0,1.0')
+        self.instr.add_command(':TIMebase:MODE', str, 'main')
+        self.scope = ivi.lecroy.lecroyWR104XIA(self.instr)
+        self.scope.driver_operation.record_cache_statistics = True
+
+    def test_statistics(self):
+        for i in range(3):
+            self.assertEqual(self.scope.timebase.mode, 'main')
+        self.scope.timebase.mode = 'roll'
+        self.scope.driver_operation.invalidate_all_attributes()
+        self.assertEqual(self.scope.timebase.mode, 'roll')
+        self.assertEqual(self.scope.driver_operation.cache_statistics['timebase_mode'],
+                dict(hits=2, misses=2, validations=3, invalidations=1, round_trips=3))
+
+        report = self.scope.driver_operation.get_cache_report().splitlines()
+        self.assertEqual(report[1].split(), ['timebase_mode', '2', '2', '3', '1', '3'])
+
+        self.scope.driver_operation.reset_cache_statistics()
+        self.scope.driver_operation.record_cache_statistics = False
+        self.scope.timebase.mode
+        self.assertEqual(self.scope.driver_operation.cache_statistics, {})
+
+class CachePolicyDriver(ivi.Driver):
+    _cache_policies = {'volatile': ivi.CACHE_NEVER, 'level': 0.05}
+    _cache_dependencies = {'mode': ['level']}
+    _cache_invalidations = {'measurement.auto_setup': ['mode']}
+
+    def _get_mode(self):
+        if not self._get_cache_valid():
+            self._mode = self._ask(':mode?')
+            self._set_cache_valid()
+        return self._mode
+
+    def _set_mode(self, value):
+        self._write(':mode %s' % value)
+        self._mode = value
+        self._set_cache_valid()
+
+    def _get_level(self, index):
+        if not self._get_cache_valid(index=index):
+            self._level = float(self._ask(':level%d?' % (index+1)))
+            self._set_cache_valid(index=index)
+        return self._level
+
+    def _get_volatile(self):
+        if not self._get_cache_valid():
+            self._ask(':mode?')
+            self._set_cache_valid()
+
+    def _measurement_auto_setup(self):
+        self._cache_operation('measurement.auto_setup')
+
+class TestCachePolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.instr = virtual.VirtualInstrument()
+        self.instr.add_command(':MODE', str, 'a')
+        self.instr.add_command(':LEVel#', float, 1.0)
+        self.drv = CachePolicyDriver(self.instr)
+
+    def queries(self):
+        return len([c for c in self.instr.cmd_log if c.endswith('?')])
+
+    def test_policies(self):
+        self.assertEqual(self.drv.driver_operation.get_cache_policy('volatile'), 'never')
+        self.assertEqual(self.drv.driver_operation.get_cache_policy('level_1'), 0.05)
+        self.assertEqual(self.drv.driver_operation.get_cache_policy('mode'), 'always')
+        self.drv._get_volatile()
+        self.drv._get_volatile()
+        self.assertEqual(self.queries(), 2)
+
+        self.drv._get_level(0)
+        self.drv._get_level(0)
+        self.assertEqual(self.queries(), 3)
+        time.sleep(0.06)
+        self.drv._get_level(0)
+        self.assertEqual(self.queries(), 4)
+
+        self.drv.driver_operation.set_cache_policy('level*', 'always')
+        self.drv.driver_operation.set_cache_policy('level', 'never')
+        self.assertEqual(self.drv.driver_operation.get_cache_policy('level_0'), 'never')
+        self.assertRaises(ivi.InvalidOptionValueException,
+                self.drv.driver_operation.set_cache_policy, 'mode', 'sometimes')
+
+    def test_dependencies(self):
+        self.drv._get_mode()
+        self.drv._get_level(0)
+        self.drv._get_level(1)
+        # reading an attribute does not invalidate its dependents
+        self.drv._get_mode()
+        self.assertEqual(self.drv._cache_valid, {'mode': True, 'level_0': True, 'level_1': True})
+        self.drv._set_mode('b')
+        self.assertEqual(self.drv._cache_valid, {'mode': True, 'level_0': False, 'level_1': False})
+
+    def test_operation(self):
+        self.drv._get_mode()
+        self.drv._get_level(0)
+        self.drv._measurement_auto_setup()
+        self.assertEqual(self.drv._cache_valid, {'mode': False, 'level_0': True})
+        self.drv.driver_operation.set_cache_invalidation('measurement.auto_setup', ['*'])
+        self.drv._measurement_auto_setup()
+        self.assertEqual(self.drv._cache_valid, {})
+
+class TestSetupCache(unittest.TestCase):
+
+    def setUp(self):
+        self.instr = virtual.VirtualInstrument('LECROY,WR104XI-A,0,1.0')
+        self.instr.add_command(':TIMebase:MODE', str, 'main')
+        # the setup is the timebase mode
+        self.instr.add_command(':SYSTem:SETup', 'block',
+                get=lambda key: self.instr.vals.get('timebase:mode', 'main').encode(),
+                set=lambda key, value: self.instr.vals.__setitem__('timebase:mode', value.decode()))
+        self.scope = ivi.lecroy.lecroyWR104XIA(self.instr)
+
+    def test_setup_cache(self):
+        self.assertEqual(self.scope.timebase.mode, 'main')
+        setup = self.scope.system.fetch_setup()
+        self.assertEqual(setup, b'main')
+
+        # nothing written since the fetch
+        del self.instr.cmd_log[:]
+        self.scope.system.load_setup(setup)
+        self.assertEqual(self.scope.timebase.mode, 'main')
+        self.assertEqual(self.instr.cmd_log, [])
+
+        self.scope.timebase.mode = 'roll'
+        self.scope.system.load_setup(setup)
+        self.assertEqual(self.instr.vals['timebase:mode'], 'main')
+        # restored from the snapshot of the fetched setup
+        del self.instr.cmd_log[:]
+        self.assertEqual(self.scope.timebase.mode, 'main')
+        self.assertEqual(self.instr.cmd_log, [])
+
+        # queries do not change the setup
+        self.scope._ask('*IDN?')
+        self.scope.system.load_setup(setup)
+        self.assertEqual(self.instr.cmd_log, ['*idn?'])
+
+    def test_invalidate(self):
+        setup = self.scope.system.fetch_setup()
+        self.scope.driver_operation.invalidate_all_attributes()
+        del self.instr.cmd_log[:]
+        self.scope.system.load_setup(setup)
+        self.assertEqual(len(self.instr.cmd_log), 1)
+
+class VirtualGP700(ivi.dicon.diconGP700):
+    instrument = None
+
+    def _open_interface(self, resource):
+        return self.instrument
+
+class TestIdentityCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        ivi.set_cache_dir(self.cache_dir)
+        self.instr = virtual.VirtualInstrument('DICON,GP700,1234,1.0')
+        self.instr.add_command(':SYSTem:CONFig', str, 'A1 30, A2 60', settable=False)
+        VirtualGP700.instrument = self.instr
+
+    def tearDown(self):
+        ivi.set_cache_dir(None)
+        shutil.rmtree(self.cache_dir)
+
+    def connect(self):
+        del self.instr.cmd_log[:]
+        return VirtualGP700('TCPIP0::10.0.0.1::INSTR', id_query=True, identity_cache=True)
+
+    def test_identity_cache(self):
+        sw = self.connect()
+        self.assertEqual(self.instr.cmd_log, ['*idn?', 'system:config?'])
+        sw.close()
+
+        sw = self.connect()
+        self.assertEqual(self.instr.cmd_log, ['*idn?'])
+        self.assertEqual(sw.identity.instrument_serial_number, '1234')
+        self.assertEqual(sw.attenuators[1].name, 'A2')
+        sw.close()
+
+        # a different instrument at the same address
+        self.instr.idn = 'DICON,GP700,5678,1.0'
+        sw = self.connect()
+        self.assertEqual(self.instr.cmd_log, ['*idn?', 'system:config?'])
+        sw.close()
+
+    def test_not_closed(self):
+        self.connect()
+        sw = self.connect()
+        self.assertEqual(self.instr.cmd_log, ['*idn?'])
+        self.assertEqual(sw.attenuators[1].name, 'A2')
+
+    def test_values(self):
+        sw = self.connect()
+        sw._config = ('A1 30', numpy.int64(60))
+        sw._set_cache_valid(tag='config')
+        entry = ivi.ivi._read_identity_cache()['TCPIP0::10.0.0.1::INSTR']
+        self.assertEqual(entry['attributes']['config'], ['A1 30', 60])
+        # values that cannot be stored are left out
+        sw._config = object()
+        sw._set_cache_valid(tag='config')
+        sw.close()
+        entry = ivi.ivi._read_identity_cache()['TCPIP0::10.0.0.1::INSTR']
+        self.assertFalse('config' in entry['attributes'])
+
+    def test_no_identity_query(self):
+        # the driver does not know how to identify the instrument
+        instr = self.instr
+        class Driver(ivi.Driver):
+            def _open_interface(self, resource):
+                return instr
+        Driver('TCPIP0::10.0.0.1::INSTR', identity_cache=True).close()
+        self.assertEqual(self.instr.cmd_log, [])
+        self.assertEqual(ivi.ivi._read_identity_cache(), {})
+
+    def test_disabled(self):
+        VirtualGP700('TCPIP0::10.0.0.1::INSTR').close()
+        sw = self.connect()
+        self.assertEqual(self.instr.cmd_log, ['*idn?', 'system:config?'])
+
+class TestDriverRegistry(unittest.TestCase):
+
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+
+    def tox_interpreters(self):
+        "Interpreters listed in tox.ini that are installed with numpy"
+        try:
+            with open(os.path.join(self.root, 'tox.ini')) as f:
+                envlist = re.search(r'^envlist\s*=\s*(.*)$', f.read(), re.M).group(1)
+        except (IOError, OSError, AttributeError):
+            return []
+        interpreters = list()
+        for env in re.findall(r'py(\d)(\d)', envlist):
+            exe = 'python%s.%s' % env
+            try:
+                subprocess.check_output([exe, '-c', 'import numpy'], stderr=subprocess.STDOUT)
+            except (OSError, subprocess.CalledProcessError):
+                continue
+            interpreters.append(exe)
+        return interpreters
+
+    def test_import(self):
+        code = ("import ivi; import ivi.rigol.rigolDP832; "
+                "print('%s %s' % (isinstance(ivi.agilent.agilentDSOX2002A, type), "
+                "isinstance(ivi.rigol.rigolDP832, type)))")
+        for exe in [sys.executable] + self.tox_interpreters():
+            out = subprocess.check_output([exe, '-c', code], cwd=self.root)
+            self.assertEqual(out.decode().split(), ['True', 'True'], exe)
+
+    @unittest.skipIf(sys.version_info < (3, 7), "no module __getattr__")
+    def test_import_is_lazy(self):
+        code = ("import sys, ivi; "
+                "print(len([m for m in sys.modules if m.startswith('ivi.agilent.')]))")
+        out = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual(int(out.decode().split()[-1]), 0)
+
+    def test_attribute_access(self):
+        cls = ivi.agilent.agilentDSOX2002A
+        self.assertTrue(isinstance(cls, type))
+        self.assertEqual(cls.__name__, 'agilentDSOX2002A')
+        self.assertTrue(ivi.agilent.agilentDSOX2002A is cls)
+        self.assertTrue('agilentMSOX4154A' in dir(ivi.agilent))
+        self.assertRaises(AttributeError, getattr, ivi.agilent, 'agilentBogus')
+
+    def test_submodule_import(self):
+        code = ("import importlib, ivi; "
+                "import ivi.agilent.agilentMSOX3104A; "
+                "importlib.import_module('ivi.rigol.rigolDP832'); "
+                "from ivi.agilent import agilentMSOX3104A; "
+                "print('%s %s %s' % (isinstance(agilentMSOX3104A, type), "
+                "ivi.agilent.agilentMSOX3104A is agilentMSOX3104A, "
+                "isinstance(ivi.rigol.rigolDP832, type)))")
+        out = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual(out.decode().split(), ['True', 'True', 'True'])
+
+    def test_registry(self):
+        self.assertEqual(ivi.driver_registry['tektronixAM5030'],
+                'ivi.tektronix.tektronixAM5030')
+        self.assertTrue(ivi.get_driver_class('rigolDP832') is ivi.rigol.rigolDP832)
+        self.assertRaises(ivi.IviException, ivi.get_driver_class, 'bogus')
+
 if __name__ == '__main__':
     unittest.main()
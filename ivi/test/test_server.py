@@ -0,0 +1,193 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+import numpy as np
+
+import ivi
+from ivi import scope
+from ivi import server
+
+class ServerTestDriver(ivi.Driver):
+
+    def __init__(self, *args, **kwargs):
+        super(ServerTestDriver, self).__init__(*args, **kwargs)
+        self._level = 0.0
+        self._level_reads = 0
+        self._event = threading.Event()
+        self._add_property('level', self._get_level, self._set_level)
+        self._add_method('measurement.fetch_waveform', self._measurement_fetch_waveform)
+        self._add_method('measurement.fetch_array', self._measurement_fetch_array)
+        self._add_method('measurement.fetch_waveforms', self._measurement_fetch_waveforms)
+        self._add_method('utility.error_query', self._utility_error_query)
+        self._add_method('wait', self._wait)
+
+    def _get_level(self):
+        self._level_reads += 1
+        return self._level
+
+    def _set_level(self, value):
+        self._level = float(value)
+
+    def _measurement_fetch_waveform(self, points):
+        return [(i * 1e-3, float(i)) for i in range(points)]
+
+    def _measurement_fetch_array(self, points, data=b''):
+        return np.arange(points, dtype=np.int16), data
+
+    def _measurement_fetch_waveforms(self, points):
+        raw = np.arange(points, dtype=np.uint16)
+        return {'channel1': scope.Waveform(raw, 1e-6, 0.0, 0, 1e-3, 0.0, 128, 0)}
+
+    def _utility_error_query(self):
+        return (0, "No error")
+
+    def _wait(self):
+        self._event.wait(5)
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = ServerTestDriver()
+        self.server = server.InstrumentServer()
+        self.server.add_driver('dmm', self.driver)
+        self.server.start()
+        self.client = server.Client(self.server.address, timeout=5)
+        self.dmm = self.client.instrument('dmm')
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def test_requests(self):
+        self.assertEqual(self.client.list(), ['dmm'])
+        self.dmm.set('level', 1.5)
+        self.assertEqual(self.dmm.get('level'), 1.5)
+        self.assertEqual(self.dmm.call('utility.error_query'), (0, "No error"))
+        self.assertEqual(self.dmm.call('measurement.fetch_waveform', 4),
+                [(0.0, 0.0), (1e-3, 1.0), (2e-3, 2.0), (3e-3, 3.0)])
+
+    def test_bulk(self):
+        for use_shared_memory in (True, False):
+            self.client.use_shared_memory = use_shared_memory and server.shared_memory is not None
+            data = bytes(bytearray(range(256))) * 1024
+            arr, ret = self.dmm.call('measurement.fetch_array', 100000, data=data)
+            self.assertEqual(arr.dtype, np.int16)
+            self.assertTrue(np.array_equal(arr, np.arange(100000, dtype=np.int16)))
+            self.assertEqual(ret, data)
+            waveform = self.dmm.call('measurement.fetch_waveform', 10000)
+            self.assertEqual(waveform[9999], (9.999, 9999.0))
+            wfm = self.dmm.call('measurement.fetch_waveforms', 50000)['channel1']
+            self.assertTrue(np.array_equal(wfm.raw, np.arange(50000, dtype=np.uint16)))
+            self.assertEqual((wfm.y_reference, wfm.hole), (128, 0))
+
+    def test_errors(self):
+        self.assertRaises(AttributeError, self.dmm.get, 'bogus')
+        self.assertRaises(server.ServerException, self.dmm.get, '_level')
+        self.assertRaises(server.ServerException, self.dmm.get, 'level[0')
+        self.assertRaises(server.ServerException, self.client.get, 'scope', 'level')
+        self.assertRaises(ValueError, self.dmm.set, 'level', 'abc')
+        # the connection is still usable
+        self.assertEqual(self.dmm.get('level'), 0.0)
+
+    def test_live_values(self):
+        self.assertEqual(self.dmm.get('level'), 0.0)
+        # changed on the instrument, reads are not served from a server cache
+        self.driver._level = 2.0
+        self.assertEqual(self.dmm.get('level'), 2.0)
+        self.assertEqual(self.driver._level_reads, 2)
+        self.assertEqual(self.server.get_statistics()['dmm']['requests'], 2)
+
+    def test_message_size(self):
+        sock = socket.create_connection(self.server.address, 5)
+        try:
+            sock.sendall(server._length.pack(server.max_message_size + 1))
+            # the server drops the connection instead of reading the message
+            self.assertEqual(sock.recv(1), b'')
+        finally:
+            sock.close()
+        self.assertEqual(self.client.list(), ['dmm'])
+
+    def wait_until(self, condition):
+        deadline = time.time() + 5
+        while not condition():
+            if time.time() > deadline:
+                self.fail("Timed out")
+            time.sleep(0.001)
+
+    def test_coalesce(self):
+        inst = self.server.instruments['dmm']
+        results = list()
+        def request(func, *args):
+            client = server.Client(self.server.address, timeout=5)
+            results.append((func.__name__, func(client, *args)))
+            client.close()
+        threads = [threading.Thread(target=request, args=(server.Client.call, 'dmm', 'wait'))]
+        threads[0].start()
+        self.wait_until(lambda: inst.statistics['executed'] > 0)
+        for value in (1.0, 2.0, 3.0):
+            threads.append(threading.Thread(target=request,
+                    args=(server.Client.set, 'dmm', 'level', value)))
+            threads[-1].start()
+            self.wait_until(lambda: len(inst.queue) == len(threads) - 1)
+        for i in range(3):
+            threads.append(threading.Thread(target=request,
+                    args=(server.Client.get, 'dmm', 'level')))
+            threads[-1].start()
+        self.wait_until(lambda: len(inst.queue) == 6)
+        self.driver._event.set()
+        for t in threads:
+            t.join(5)
+        self.assertEqual([r[1] for r in results if r[0] == 'get'], [3.0, 3.0, 3.0])
+        self.assertEqual(self.driver._level_reads, 1)
+        self.assertEqual(inst.statistics['executed'], 3)
+        self.assertEqual(inst.statistics['coalesced'], 4)
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "no Unix domain sockets")
+    def test_unix_socket(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            srv = server.InstrumentServer(os.path.join(tmp, 'ivi.sock'))
+            srv.add_driver('dmm', self.driver)
+            srv.start()
+            client = server.Client(srv.address, timeout=5)
+            client.set('dmm', 'level', 4.0)
+            self.assertEqual(client.get('dmm', 'level'), 4.0)
+            client.close()
+            srv.close()
+            self.assertFalse(os.path.exists(srv.address))
+        finally:
+            shutil.rmtree(tmp)
+
+if __name__ == '__main__':
+    unittest.main()
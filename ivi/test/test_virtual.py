@@ -0,0 +1,110 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import unittest
+
+import ivi
+from ivi.test import virtual
+
+class TestVirtualInstrument(unittest.TestCase):
+
+    def setUp(self):
+        self.instr = virtual.VirtualInstrument('ACME,SCOPE1,0,1.0')
+        self.instr.add_command('[:SENSe]:VOLTage[:DC]:RANGe', float, 10.0)
+        self.instr.add_command(':CHANnel#:SCALe', float, 1.0)
+        self.instr.add_command(':CHANnel#:DISPlay', bool, False)
+        self.instr.add_command(':CHANnel#:LABel', 'qstr', '')
+        self.instr.add_command(':WAVeform:DATA', 'block', b'')
+        self.instr.add_command(':MEASure:STATistics', (int, float), (0, 0.0))
+        self.drv = ivi.Driver(self.instr)
+
+    def test_headers(self):
+        self.drv._write(':sens:volt:dc:rang 2')
+        self.assertEqual(self.instr.vals['sense:voltage:dc:range'], 2.0)
+        self.drv._write('VOLTAGE:RANGE 5')
+        self.assertEqual(self.drv._ask(':SENSe:VOLTage:RANGe?'), '+5.000000E+00')
+        self.drv._write(':chan2:scal 0.5;disp on')
+        self.assertEqual(self.instr.vals['channel2:scale'], 0.5)
+        self.assertEqual(self.instr.vals['channel2:display'], True)
+        self.assertEqual(self.drv._ask(':channel:scale?'), '+1.000000E+00')
+        self.assertEqual(self.instr.cmd_log[-3:], ['chan2:scal', 'disp', 'channel:scale?'])
+        self.assertEqual(self.instr.errors, [])
+
+    def test_message(self):
+        self.drv._write(':chan1:lab "A;B"')
+        self.assertEqual(self.instr.vals['channel1:label'], 'A;B')
+        self.assertEqual(self.drv._ask('*IDN?;:chan1:disp?;:chan1:lab?'), 'ACME,SCOPE1,0,1.0;0;"A;B"')
+        self.drv._write(':measure:statistics 3,1.5')
+        self.assertEqual(self.drv._ask(':measure:statistics?'), '3,+1.500000E+00')
+
+    def test_block(self):
+        data = bytes(bytearray(range(256))) * 4
+        self.drv._write_ieee_block(data, ':wav:data ')
+        self.assertEqual(self.instr.vals['waveform:data'], data)
+        self.drv._write(':waveform:data?')
+        self.assertEqual(self.drv._read_ieee_block(), data)
+        # a semicolon in the block does not split the message
+        self.drv._write_raw(b':wav:data #13a;b;:chan1:scal 2')
+        self.assertEqual(self.instr.vals['waveform:data'], b'a;b')
+        self.assertEqual(self.instr.vals['channel1:scale'], 2.0)
+
+    def test_errors(self):
+        self.drv._write(':bogus 1;:chan1:scal abc;:chan1:scal')
+        self.assertEqual(self.instr.errors, [(-113, 'Undefined header'),
+                (-104, 'Data type error'), (-109, 'Missing parameter')])
+        self.assertEqual(self.drv._ask('*ESR?'), '32')
+        self.assertEqual(self.drv._ask(':system:error?'), '-113,"Undefined header"')
+        self.drv._write('*CLS')
+        self.assertEqual(self.drv._ask(':syst:err?'), '+0,"No error"')
+        self.assertRaises(ivi.IOTimeoutException, self.drv._read)
+        self.instr.strict = True
+        self.assertRaises(virtual.CommandError, self.drv._write, ':bogus')
+
+    def test_reset(self):
+        self.drv._write(':chan3:scal 2;:volt:rang 1')
+        self.drv._write('*RST')
+        self.assertEqual(self.instr.vals, {'sense:voltage:dc:range': 10.0,
+                'waveform:data': b'', 'measure:statistics': (0, 0.0),
+                '*tst': 0})
+
+    def test_operation_complete(self):
+        self.drv._wait_for_operation_complete(':chan1:disp 1', 1.0)
+        self.assertEqual(self.instr.esr, 0)
+        self.assertEqual(self.instr.vals['channel1:display'], True)
+
+    def test_latency(self):
+        self.instr.latency = 0.001
+        self.instr.bandwidth = 1000.0
+        self.instr.set_latency(':CHAN:SCAL', 0.1)
+        self.drv._write(':chan1:scal 1')
+        self.assertAlmostEqual(self.instr.clock, 0.001 + 0.013 + 0.1)
+        self.instr.clock = 0
+        self.assertEqual(self.drv._ask('*IDN?'), 'ACME,SCOPE1,0,1.0')
+        self.assertAlmostEqual(self.instr.clock, 0.001 + 0.005 + 0.001 + 0.018)
+        self.assertEqual((self.instr.bytes_written, self.instr.bytes_read), (18, 18))
+
+if __name__ == '__main__':
+    unittest.main()
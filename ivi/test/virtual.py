@@ -0,0 +1,435 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import re
+import time
+
+from .. import ivi
+
+__all__ = ['CommandError', 'Command', 'VirtualInstrument']
+
+# standard event status register bits
+ESR_OPC = 1 << 0
+ESR_EXE = 1 << 4
+ESR_CME = 1 << 5
+
+# SCPI error/event queue summary bit in the status byte
+STB_EAV = 1 << 2
+
+_node_re = re.compile(r'\[:?([^\]]+)\]|:?([^:\[]+)')
+_part_re = re.compile(r'^(.*?)(\d*)$')
+
+class CommandError(Exception): pass
+
+class Command(object):
+    """Command tree entry of a virtual instrument
+
+    The pattern uses the SCPI notation, upper case letters give the short
+    form, optional nodes are in brackets and a trailing # accepts a numeric
+    suffix, for example '[:SENSe]:VOLTage[:DC]:RANGe' or
+    ':CHANnel#:SCALe'.  A pattern in lower case only has to be matched
+    exactly.  Each instance of the command keeps its own state under a key
+    made of the long form of every node, 'sense:voltage:dc:range' and
+    'channel1:scale' for the examples above.
+    """
+    def __init__(self, pattern, type=None, value=None, fmt=None, get=None, set=None,
+            latency=0.0, queryable=True, settable=True):
+        self.pattern = pattern
+        self.type = type
+        self.value = value
+        self.fmt = fmt
+        self.get = get
+        self.set = set
+        self.latency = latency
+        self.queryable = queryable
+        self.settable = settable
+        self.nodes = list()
+        for optional, required in _node_re.findall(pattern):
+            text = optional or required
+            suffix = text.endswith('#')
+            text = text.rstrip('#')
+            long = text.lower()
+            short = ''.join(c for c in text if not c.islower()).lower()
+            if text == long or not short:
+                short = long
+            self.nodes.append((short, long, suffix, bool(optional)))
+        self.key = ':'.join(n[1] + ('1' if n[2] else '') for n in self.nodes)
+        self.indexed = any(n[2] for n in self.nodes)
+
+    def match(self, parts, i=0, j=0):
+        "Match header parts, returns the state key or None"
+        if j == len(self.nodes):
+            return '' if i == len(parts) else None
+        short, long, suffix, optional = self.nodes[j]
+        if i < len(parts):
+            mnemonic, num = parts[i], ''
+            if suffix:
+                mnemonic, num = _part_re.match(mnemonic).groups()
+                num = num or '1'
+            if mnemonic == short or mnemonic == long:
+                rest = self.match(parts, i+1, j+1)
+                if rest is not None:
+                    return long + num + (':' + rest if rest else '')
+        if optional:
+            rest = self.match(parts, i, j+1)
+            if rest is not None:
+                return long + ('1' if suffix else '') + (':' + rest if rest else '')
+        return None
+
+class VirtualInstrument(object):
+    """Virtual SCPI instrument
+
+    Provides write_raw and read_raw, so it can be passed to any driver in
+    place of a resource string.  Program messages are split into commands at
+    semicolons outside of strings and IEEE blocks, and headers without a
+    leading colon are resolved relative to the previous command as on a real
+    instrument.  Queries in one message are answered together, separated by
+    semicolons and terminated with a newline.  Unknown headers and bad
+    parameters are reported through the error queue, or raise CommandError
+    with strict set.
+
+    Every command is logged in cmd_log.  I/O time is modelled with latency,
+    the turnaround time of every write_raw and read_raw call, bandwidth in
+    bytes per second and the latency of the individual commands.  The total
+    is accumulated in clock, and only slept when real_time is set, so
+    benchmarks against the virtual instrument are deterministic.
+
+    Example:
+
+    instr = VirtualInstrument('ACME,DMM1,0,1.0')
+    instr.add_command('[:SENSe]:VOLTage[:DC]:RANGe', float, 10.0, latency=0.01)
+    instr.add_command(':FETCh', float, 1.0, settable=False)
+    dmm = ivi.agilent.agilent34401A(instr)
+    """
+
+    formats = {
+        int: '{0:d}',
+        float: '{0:+E}',
+        bool: '{0:d}',
+        str: '{0}',
+        'qstr': '"{0}"'
+    }
+
+    def __init__(self, idn='VIRTUAL,INSTRUMENT,0,1.0', strict=False, latency=0.0,
+            bandwidth=None, real_time=False):
+        self.idn = idn
+        self.strict = strict
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.real_time = real_time
+
+        self.commands = list()
+        self.defaults = dict()
+        self.vals = dict()
+        self.errors = list()
+        self.cmd_log = list()
+        self.clock = 0.0
+        self.bytes_written = 0
+        self.bytes_read = 0
+
+        self.ese = 0
+        self.esr = 0
+        self.sre = 0
+
+        self._headers = dict()
+        self._output = b''
+
+        self.add_command('*IDN', str, get=lambda key: self.idn, settable=False)
+        self.add_command('*RST', set=lambda key, value: self.reset())
+        self.add_command('*CLS', set=lambda key, value: self.clear_status())
+        self.add_command('*ESE', int, get=lambda key: self.ese, set=self._set_ese)
+        self.add_command('*ESR', int, get=self._get_esr, settable=False)
+        self.add_command('*SRE', int, get=lambda key: self.sre, set=self._set_sre)
+        self.add_command('*STB', int, get=lambda key: self.read_stb(), settable=False)
+        self.add_command('*OPC', get=lambda key: 1, set=self._set_opc)
+        self.add_command('*TST', int, 0, settable=False)
+        self.add_command('*TRG')
+        self.add_command('*WAI')
+        self.add_command('SYSTem:ERRor[:NEXT]', str, get=self._get_error, settable=False)
+
+    def add_command(self, pattern, type=None, value=None, fmt=None, get=None, set=None,
+            latency=0.0, queryable=None, settable=True):
+        """Add a command to the command tree
+
+        type converts the parameter of the command and selects the response
+        format, one of int, float, bool, str, 'qstr' for quoted strings,
+        'block' for IEEE definite length blocks or a tuple of these for comma
+        separated parameters.  value is the state after *RST.  get(key) and
+        set(key, value) override reading and storing the state, latency is
+        added to the I/O time whenever the command is executed.  Commands
+        without a type take no parameter and can only be sent, others can be
+        sent and queried unless settable or queryable is false.  Returns the
+        Command.
+        """
+        if queryable is None:
+            queryable = type is not None or get is not None
+        cmd = Command(pattern, type, value, fmt, get, set, latency, queryable, settable)
+        self.commands.append(cmd)
+        if type is not None and get is None and not cmd.indexed:
+            self.defaults[cmd.key] = value
+            self.vals[cmd.key] = value
+        self._headers = dict()
+        return cmd
+
+    def set_latency(self, header, latency):
+        "Set the latency of the command matching header"
+        cmd, key = self._resolve(tuple(header.lower().strip(':').rstrip('?').split(':')))
+        if cmd is None:
+            raise CommandError('Unknown command %s' % header)
+        cmd.latency = latency
+
+    def reset(self):
+        "Return the state to the *RST values"
+        self.vals = dict(self.defaults)
+
+    def clear_status(self):
+        "Clear the status registers and the error queue"
+        self.esr = 0
+        self.errors = list()
+
+    def push_error(self, code, message):
+        "Add an entry to the error queue"
+        if -200 < code <= -100:
+            self.esr |= ESR_CME
+        elif -300 < code <= -200:
+            self.esr |= ESR_EXE
+        self.errors.append((code, message))
+
+    def read_stb(self):
+        "Status byte"
+        stb = 0
+        if self.errors:
+            stb |= STB_EAV
+        if self.esr & self.ese:
+            stb |= ivi.STB_ESB
+        if stb & self.sre:
+            stb |= ivi.STB_RQS
+        return stb
+
+    def _set_ese(self, key, value):
+        self.ese = value
+
+    def _set_sre(self, key, value):
+        self.sre = value
+
+    def _set_opc(self, key, value):
+        self.esr |= ESR_OPC
+
+    def _get_esr(self, key):
+        esr, self.esr = self.esr, 0
+        return esr
+
+    def _get_error(self, key):
+        if self.errors:
+            return '%+d,"%s"' % self.errors.pop(0)
+        return '+0,"No error"'
+
+    def _error(self, code, message):
+        if self.strict:
+            raise CommandError('%d, "%s"' % (code, message))
+        self.push_error(code, message)
+
+    def _delay(self, t):
+        if t <= 0:
+            return
+        self.clock += t
+        if self.real_time:
+            time.sleep(t)
+
+    def _transfer(self, count):
+        t = self.latency
+        if self.bandwidth:
+            t += float(count) / self.bandwidth
+        self._delay(t)
+
+    def _resolve(self, parts):
+        try:
+            return self._headers[parts]
+        except KeyError:
+            pass
+        result = (None, None)
+        for cmd in self.commands:
+            key = cmd.match(parts)
+            if key is not None:
+                result = (cmd, key)
+                break
+        self._headers[parts] = result
+        return result
+
+    def _split(self, data):
+        "Split a program message into commands"
+        units = list()
+        start = 0
+        i = 0
+        n = len(data)
+        while i < n:
+            c = data[i:i+1]
+            if c == b'"' or c == b"'":
+                j = data.find(c, i+1)
+                i = n if j < 0 else j+1
+            elif c == b'#':
+                d = data[i+1:i+2]
+                if d == b'0':
+                    # indefinite length block runs to the end of the message
+                    i = n
+                elif d.isdigit():
+                    l = int(d)
+                    i += 2 + l + int(data[i+2:i+2+l])
+                else:
+                    i += 1
+            elif c == b';':
+                units.append(data[start:i])
+                i += 1
+                start = i
+            else:
+                i += 1
+        units.append(data[start:])
+        return units
+
+    def _convert(self, t, arg):
+        if t == 'block':
+            if arg[0:1] != b'#':
+                raise ValueError()
+            return ivi.decode_ieee_block(arg)
+        arg = arg.decode('utf-8').strip()
+        if isinstance(t, tuple):
+            args = arg.split(',')
+            if len(args) != len(t):
+                raise ValueError()
+            return tuple(self._convert(ti, a.encode('utf-8')) for ti, a in zip(t, args))
+        if t is bool:
+            if arg.lower() in ('on', '1'):
+                return True
+            if arg.lower() in ('off', '0'):
+                return False
+            raise ValueError()
+        if t is int:
+            try:
+                return int(arg)
+            except ValueError:
+                return int(float(arg))
+        if t == 'qstr':
+            return arg.strip('"\'')
+        return t(arg)
+
+    def _format(self, cmd, t, value):
+        if t == 'block':
+            if hasattr(value, 'tobytes'):
+                value = value.tobytes()
+            return ivi.build_ieee_block(bytes(value))
+        if isinstance(t, tuple):
+            return b','.join(self._format(cmd, ti, v) for ti, v in zip(t, value))
+        fmt = cmd.fmt or self.formats.get(t, '{0}')
+        return fmt.format(value).encode('utf-8')
+
+    def execute(self, unit, prefix=()):
+        """Execute a single command
+
+        Returns the response, None for commands, and the header parts that
+        following relative headers are resolved against.
+        """
+        unit = unit.lstrip()
+        m = re.match(br'(\S+)\s*', unit)
+        header = m.group(1).decode('utf-8').lower()
+        arg = unit[m.end():]
+        self.cmd_log.append(header.lstrip(':'))
+
+        query = header.endswith('?')
+        name = header.rstrip('?')
+        parts = tuple(name.lstrip(':').split(':'))
+
+        cmd = key = None
+        if not name.startswith(':') and not name.startswith('*') and prefix:
+            cmd, key = self._resolve(prefix + parts)
+            if cmd is not None:
+                parts = prefix + parts
+        if cmd is None:
+            cmd, key = self._resolve(parts)
+        if name.startswith('*'):
+            next_prefix = prefix
+        else:
+            next_prefix = parts[:-1]
+
+        if cmd is None or (query and not cmd.queryable) or (not query and not cmd.settable):
+            self._error(-113, "Undefined header")
+            return None, next_prefix
+
+        self._delay(cmd.latency)
+
+        if query:
+            if cmd.get is not None:
+                value = cmd.get(key)
+            else:
+                value = self.vals.get(key, cmd.value)
+            return self._format(cmd, cmd.type, value), next_prefix
+
+        value = None
+        if cmd.type is not None:
+            if not arg.strip():
+                self._error(-109, "Missing parameter")
+                return None, next_prefix
+            try:
+                value = self._convert(cmd.type, arg)
+            except ValueError:
+                self._error(-104, "Data type error")
+                return None, next_prefix
+            if cmd.set is None:
+                self.vals[key] = value
+        if cmd.set is not None:
+            cmd.set(key, value)
+        return None, next_prefix
+
+    def write_raw(self, data):
+        self.bytes_written += len(data)
+        self._transfer(len(data))
+        responses = list()
+        prefix = ()
+        for unit in self._split(data):
+            if not unit.strip():
+                continue
+            response, prefix = self.execute(unit, prefix)
+            if response is not None:
+                responses.append(response)
+        if responses:
+            # a new query discards unread output
+            self._output = b';'.join(responses) + b'\n'
+
+    def read_raw(self, num=-1):
+        if not self._output:
+            raise ivi.IOTimeoutException()
+        if num < 0:
+            data, self._output = self._output, b''
+        else:
+            data, self._output = self._output[:num], self._output[num:]
+        self.bytes_read += len(data)
+        self._transfer(len(data))
+        return data
+
+    def clear(self):
+        self._output = b''
+
+    def close(self):
+        pass
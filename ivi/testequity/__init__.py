@@ -24,10 +24,11 @@ THE SOFTWARE.
 
 """
 
-# Enviromental Chambers
-from .testequityf4 import testequityf4
-from .testequity140 import testequity140
-
-
+from .. import ivi
 
+__all__ = [
+        # Enviromental Chambers
+        "testequityf4",
+        "testequity140"]
 
+__getattr__, __dir__ = ivi.register_drivers(__name__, __all__)
@@ -60,6 +60,7 @@ electronic test equipment that is remotely controllable.''',
                 'ivi.interface',
                 'ivi.extra',
                 'ivi.scpi',
+                'ivi.test',
                 'ivi.agilent',
                 'ivi.chroma',
                 'ivi.colby',
@@ -68,6 +69,7 @@ electronic test equipment that is remotely controllable.''',
                 'ivi.jdsu',
                 'ivi.lecroy',
                 'ivi.rigol',
+                'ivi.tdklambda',
                 'ivi.tektronix',
                 'ivi.testequity'],
     requires = ['numpy'],